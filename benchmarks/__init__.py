@@ -0,0 +1,12 @@
+# benchmarks/__init__.py
+import json
+import typing as tp
+from pathlib import Path
+
+DATA_DIR = Path(__file__).parent / "data"
+
+
+def load_token_streams() -> list[dict[str, tp.Any]]:
+    """Load the recorded LLM token streams used by the text benchmarks"""
+    with open(DATA_DIR / "token_streams.jsonl", "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -0,0 +1,88 @@
+# benchmarks/audio_buffer.py
+"""Peak memory and CPU per second of captured audio for utterance accumulation.
+
+Compares `UtteranceBuffer` with the previous torch.cat implementation. Each
+variant runs in its own process so peak RSS is not shared between them.
+
+Run with `python -m benchmarks.audio_buffer [--seconds 60]`.
+"""
+import argparse
+import multiprocessing as mp
+import resource
+import sys
+import time
+
+import numpy as np
+
+CHUNK = 2048
+RATE = 44100
+
+
+def _chunks(seconds: float) -> list[bytes]:
+    rng = np.random.default_rng(0)
+    count = int(seconds * RATE / CHUNK)
+    return [
+        (rng.standard_normal(CHUNK) * 3000).astype(np.int16).tobytes()
+        for _ in range(count)
+    ]
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def accumulate_buffer(chunks: list[bytes]) -> int:
+    from src.buffers import UtteranceBuffer
+
+    buffer = UtteranceBuffer(rate=RATE)
+    for chunk in chunks:
+        buffer.append(np.frombuffer(chunk, dtype=np.int16))
+    return len(buffer.view())
+
+
+def accumulate_torch(chunks: list[bytes]) -> int:
+    import torch
+
+    audio = None
+    for chunk in chunks:
+        samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32) / 32768.0
+        tensor = torch.from_numpy(samples).unsqueeze(0)
+        audio = tensor if audio is None else torch.cat([audio, tensor], dim=1)
+    assert audio is not None
+    return len(audio.numpy().squeeze())
+
+
+def _worker(name: str, seconds: float, queue: "mp.Queue[tuple[str, float, float]]"):
+    chunks = _chunks(seconds)
+    baseline = _peak_rss_mb()
+    accumulate = accumulate_torch if name == "torch.cat" else accumulate_buffer
+    start = time.process_time()
+    accumulate(chunks)
+    cpu = time.process_time() - start
+    queue.put((name, cpu / seconds * 1000, _peak_rss_mb() - baseline))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    args = parser.parse_args()
+
+    queue: "mp.Queue[tuple[str, float, float]]" = mp.Queue()
+    for name in ("UtteranceBuffer", "torch.cat"):
+        process = mp.Process(target=_worker, args=(name, args.seconds, queue))
+        process.start()
+        process.join()
+        if process.exitcode:
+            print(f"{name:>16}: failed (exit code {process.exitcode})")
+            continue
+        name, cpu_ms, peak_mb = queue.get()
+        print(
+            f"{name:>16}: {cpu_ms:8.3f} ms CPU per second of audio, "
+            f"peak +{peak_mb:.1f} MB over {args.seconds:.0f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
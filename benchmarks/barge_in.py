@@ -0,0 +1,164 @@
+# benchmarks/barge_in.py
+"""Barge-in, headless: the user talks over a long reply.
+
+A fake live microphone plays one utterance, then, while the reply to it is
+playing, a second one. The same recorder, transcriber, chatbot, speaker and
+`src.respond` the app uses run against an in-process stand-in server whose
+reply is long enough to still be generating and speaking at that point.
+Output goes to a fake device that plays in real time.
+
+For each trial it reports how long after the second utterance's onset the
+barge-in triggered, how long playback took to stop after that, when the
+server saw the chat and speech streams dropped, how long until `respond`
+returned, and whether the next turn heard exactly what was said over the
+reply. With `--sequential` nothing plays until generation ends, so the user
+cuts in while the model is still generating and only its stream is dropped.
+
+Run with `python -m benchmarks.barge_in [--trials 5] [--min-speech 0.25]`.
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+import numpy as np
+
+from src import respond
+from src.bargein import BargeIn
+from src.chatbot import ChatBot
+from src.clients import LazyClient
+from src.devices import AudioDeviceManager, FakeAudioBackend
+from src.logger import StatusLogger, configure_logging
+from src.recorder import RATE, Recorder
+from src.speaker import Speaker
+from src.tracing import percentile, tracer
+from src.transcriber import Transcriber
+
+from .standin import StandInServer, speak_words, text_deltas
+
+FIRST = "abre la carpeta de proyectos".split()
+SECOND = "muestra archivos que cambiaron".split()
+REPLY = " ".join(
+    [
+        "Claro, abro la carpeta de proyectos.",
+        "Dentro hay varias carpetas con trabajos de este año.",
+        "La más reciente se modificó esta mañana y tiene cambios sin guardar.",
+        "También hay un archivo de notas con tareas pendientes para la semana.",
+        "Si quieres, puedo ordenar las carpetas por fecha o por tamaño.",
+        "Dime qué prefieres y lo preparo enseguida.",
+    ]
+)
+
+
+def build_source(overlap: float) -> tuple[bytes, int]:
+    """Both utterances, the second `overlap` seconds after the first ends"""
+    lead = np.zeros(RATE // 2, dtype=np.int16)
+    first = speak_words(FIRST, RATE)
+    gap = np.zeros(int(overlap * RATE), dtype=np.int16)
+    second = speak_words(SECOND, RATE)
+    tail = np.zeros(4 * RATE, dtype=np.int16)
+    onset = len(lead) + len(first) + len(gap)
+    return np.concatenate([lead, first, gap, second, tail]).tobytes(), onset
+
+
+def trial(server: StandInServer, args: argparse.Namespace) -> dict[str, float]:
+    source, onset = build_source(args.overlap)
+    server.chat_replies.clear()
+    server.chat_replies.append(text_deltas(REPLY))
+    server.aborted.clear()
+    clients = [LazyClient(base_url=server.base_url, api_key="x") for _ in range(3)]
+    stt, llm, tts = clients
+    devices = AudioDeviceManager(FakeAudioBackend(source, live=True, realtime=True))
+    recorder = Recorder(devices=devices, callback=True)
+    barge_in = BargeIn(recorder, min_speech=args.min_speech)
+    chatbot, speaker = ChatBot(), Speaker(devices=devices)
+    logger = StatusLogger()
+    for client in clients:
+        client.get()
+
+    heard: list[str] = []
+    returned = 0
+    transcriber = Transcriber()
+    for text in transcriber.run(stream=recorder.run(), client=stt):
+        heard.append(text)
+        if len(heard) == 2:
+            break
+        respond(text, chatbot, speaker, llm, tts, logger, args.sequential, barge_in)
+        returned = time.perf_counter_ns()
+    devices.close()
+
+    opened = recorder.state.opened
+    triggered = barge_in.triggered_ns
+    stops = [s for s in tracer.spans if s.name == "playback.stop"]
+    stop = stops[-1].end_ns if stops and stops[-1].start_ns >= triggered else 0
+    dropped = {path.rsplit("/", 1)[-1]: at for path, at in server.aborted}
+
+    def since_trigger(at: float) -> float:
+        return at - triggered / 1e9 if at and triggered else -1.0
+
+    result = {
+        "onset → trigger": (
+            triggered / 1e9 - (opened + onset / RATE) if triggered else -1.0
+        ),
+        "onset error": ((barge_in.onset or 0) - onset) / RATE,
+        "trigger → playback stopped": since_trigger(stop / 1e9),
+        "trigger → llm stream dropped": since_trigger(dropped.get("completions", 0)),
+        "trigger → tts stream dropped": since_trigger(dropped.get("speech", 0)),
+        "trigger → respond returned": since_trigger(returned / 1e9),
+        "next turn heard": float(heard[1:] == [" ".join(SECOND)]),
+    }
+    if args.verbose:
+        print(f"heard {heard}, {barge_in.stats()}, {recorder.stats()}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trials", type=int, default=5)
+    parser.add_argument("--overlap", type=float, default=4.5)
+    parser.add_argument("--min-speech", type=float, default=0.25)
+    parser.add_argument("--sequential", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="Show the app's UI")
+    args = parser.parse_args()
+
+    configure_logging("rich" if args.verbose else "off")
+    server = StandInServer(
+        stt_latency=0.25,
+        llm_latency=0.3,
+        chunk_delay=0.08,
+        tts_latency=0.15,
+        tts_per_char=0.06,
+        fallback_text="(nothing)",
+    )
+    rows: dict[str, list[float]] = {}
+    output = contextlib.nullcontext() if args.verbose else open(os.devnull, "w")
+    with server, output as sink, contextlib.redirect_stdout(sink or sys.stdout):
+        for _ in range(args.trials):
+            for name, value in trial(server, args).items():
+                rows.setdefault(name, []).append(value)
+
+    print(f"{args.trials} trials, second utterance {args.overlap}s after the first")
+    print(f"{'':<30} {'p50 ms':>9} {'max ms':>9}")
+    missed = 0
+    for name, values in rows.items():
+        if name == "next turn heard":
+            print(f"{name:<30} {sum(values):>5.0f}/{len(values)}")
+            missed = len(values) - int(sum(values))
+            continue
+        missing = sum(v < 0 for v in values if "error" not in name)
+        values = [v * 1000 for v in values if v >= 0 or "error" in name]
+        note = f"  ({missing} missing)" if missing else ""
+        if not values:
+            print(f"{name:<30} {'-':>9} {'-':>9}{note}")
+            continue
+        print(
+            f"{name:<30} {percentile(values, 50):>9.1f} "
+            f"{max(values):>9.1f}{note}"
+        )
+    if missed:
+        sys.exit(f"the next turn missed the barge-in utterance in {missed} trials")
+
+
+if __name__ == "__main__":
+    main()
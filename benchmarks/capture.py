@@ -0,0 +1,151 @@
+# benchmarks/capture.py
+"""Audio kept while the consumer is busy: blocking reads vs callback capture.
+
+A fake live microphone plays scripted tone-word utterances on the wall clock.
+The consumer reads it through `Recorder.run` but stalls every few seconds, as
+the voice loop does while the LLM, terminal and TTS work. Blocking reads lose
+what overflows the device buffer meanwhile; callback capture keeps it in the
+ring. The words heard in everything the consumer got are checked against the
+script.
+
+A second run reads the same ring with three consumers on their own threads
+(the stalling one, a VAD and a recording) to check they all see every sample,
+and how many of the chunks handed out were views rather than copies.
+
+Run with `python -m benchmarks.capture [--stall 2.0] [--period 3.0]`.
+"""
+import argparse
+import difflib
+import threading
+import time
+
+import numpy as np
+
+from src.buffers import UtteranceBuffer
+from src.devices import AudioDeviceManager, FakeAudioBackend
+from src.recorder import CHUNK, RATE, Recorder
+from src.vad import SpectralVAD
+
+from .standin import VOCAB, hear_words, speak_words
+
+UTTERANCE_WORDS = 4
+PAUSE_SECONDS = 1.0
+
+
+def build_source(utterances: int) -> tuple[bytes, list[str]]:
+    silence = np.zeros(int(PAUSE_SECONDS * RATE), dtype=np.int16)
+    parts: list[np.ndarray] = [silence]
+    words: list[str] = []
+    for i in range(utterances):
+        said = [
+            VOCAB[(i * UTTERANCE_WORDS + j) % len(VOCAB)]
+            for j in range(UTTERANCE_WORDS)
+        ]
+        parts += [speak_words(said, RATE), silence]
+        words += said
+    return np.concatenate(parts).tobytes(), words
+
+
+def consume(
+    recorder: Recorder, seconds: float, stall: float, period: float
+) -> UtteranceBuffer:
+    """Everything `recorder.run` yields for `seconds`, stalling as told"""
+    received = UtteranceBuffer(rate=RATE, seconds=seconds + 5)
+    start = last_stall = time.perf_counter()
+    for chunk in recorder.run():
+        received.append(np.frombuffer(chunk, dtype=np.int16))
+        now = time.perf_counter()
+        if now - start >= seconds:
+            break
+        if now - last_stall >= period:
+            time.sleep(stall)
+            last_stall = time.perf_counter()
+    return received
+
+
+def heard(received: UtteranceBuffer, words: list[str]) -> int:
+    """Script words found, in order, in what the consumer received"""
+    found = hear_words(received.view(), RATE)
+    matcher = difflib.SequenceMatcher(a=words, b=found, autojunk=False)
+    return sum(block.size for block in matcher.get_matching_blocks())
+
+
+def fan_out(recorder: Recorder, seconds: float, stall: float, period: float):
+    """Three consumers of one ring, each with a cursor of its own"""
+    recorder.start()
+    results: dict[str, tuple[int, int, int]] = {}
+
+    def reader(name: str, handle, pause: float):
+        cursor = recorder.cursor()
+        start = last_stall = time.perf_counter()
+        chunks = views = 0
+        while time.perf_counter() - start < seconds:
+            if cursor.available() < CHUNK:
+                time.sleep(CHUNK / RATE / 4)
+                continue
+            chunk = cursor.read(CHUNK)
+            chunks += 1
+            views += np.shares_memory(chunk, recorder.ring._data)
+            handle(chunk)
+            if pause and time.perf_counter() - last_stall >= period:
+                time.sleep(pause)
+                last_stall = time.perf_counter()
+        results[name] = (cursor.position, chunks, views)
+
+    recording = UtteranceBuffer(rate=RATE, seconds=seconds + 5)
+    vad = SpectralVAD(rate=RATE)
+    threads = [
+        threading.Thread(target=reader, args=("transcriber", lambda c: None, stall)),
+        threading.Thread(target=reader, args=("vad", vad.process, 0.0)),
+        threading.Thread(target=reader, args=("recording", recording.append, 0.0)),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--utterances", type=int, default=6)
+    parser.add_argument("--stall", type=float, default=2.0)
+    parser.add_argument("--period", type=float, default=3.0)
+    args = parser.parse_args()
+
+    source, words = build_source(args.utterances)
+    seconds = len(source) / 2 / RATE + 1.0
+    print(
+        f"{len(words)} words over {seconds:.1f}s, stalling {args.stall}s "
+        f"every {args.period}s"
+    )
+    print(f"{'mode':<10} {'words heard':>12} {'overflows':>10} {'cpu s':>7}")
+    for mode in ("blocking", "callback"):
+        backend = FakeAudioBackend(source, live=True)
+        devices = AudioDeviceManager(backend)
+        recorder = Recorder(devices=devices, callback=mode == "callback")
+        cpu = time.process_time()
+        received = consume(recorder, seconds, args.stall, args.period)
+        cpu = time.process_time() - cpu
+        devices.close()
+        print(
+            f"{mode:<10} {heard(received, words):>6}/{len(words):<5} "
+            f"{backend.overflows:>10} {cpu:>7.2f}"
+        )
+
+    backend = FakeAudioBackend(source, live=True)
+    devices = AudioDeviceManager(backend)
+    recorder = Recorder(devices=devices, callback=True)
+    results = fan_out(recorder, seconds, args.stall, args.period)
+    devices.close()
+    print("\none ring, three cursors")
+    for name, (position, chunks, views) in results.items():
+        print(
+            f"  {name:<12} up to sample {position:>8}  {chunks} chunks, "
+            f"{views / max(1, chunks):.1%} views into the ring"
+        )
+    print(f"  ring: {recorder.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# benchmarks/clients.py
+"""Connection setup, reuse, retries and stalls of the API clients.
+
+Runs turns of the three API calls the voice loop makes (a transcription, a
+streamed completion and streamed speech) against a local stand-in server
+that charges `--connect-latency` for every new connection and closes
+connections idle for `--server-idle` seconds. Turns are `--idle` seconds
+apart, longer than that, as when the user pauses between requests.
+
+"default" builds the clients as the app used to: one `OpenAI` client per
+stage with its own pool and no warm-up. "pooled" goes through a
+`ClientPool`, warms every stage up front and keeps the connections alive
+with pings. "pooled, no pings" warms up but lets connections go idle.
+
+Then a server failing `--fail-rate` of requests with a 503 checks the
+jittered retries, and a completion that never sends anything checks that
+the LLM's read timeout ends it.
+
+Run with `python -m benchmarks.clients [--turns 6] [--idle 2.0]`.
+"""
+import argparse
+import time
+import typing as tp
+
+from src.clients import ClientPool, LazyClient
+from src.encoding import encode_wav
+from src.tracing import percentile
+
+from .standin import StandInServer, speak_words
+
+STAGES = ("stt", "llm", "tts")
+RATE = 16000
+
+
+def turn(clients: dict[str, LazyClient], audio: bytes) -> dict[str, float]:
+    """Milliseconds to the first byte of each stage's response"""
+    times: dict[str, float] = {}
+    start = time.perf_counter()
+    clients["stt"].audio.transcriptions.create(
+        file=("audio.wav", audio, "audio/wav"), model="whisper-large-v3"
+    )
+    times["stt"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    stream = clients["llm"].chat.completions.create(
+        messages=[{"role": "user", "content": "hola"}],
+        model="stand-in",
+        stream=True,
+    )
+    for _ in stream:
+        times.setdefault("llm", (time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with clients["tts"].audio.speech.with_streaming_response.create(
+        input="Listo, ya está.", model="tts-1", voice="alloy", response_format="pcm"
+    ) as response:
+        for _ in response.iter_bytes(4096):
+            times.setdefault("tts", (time.perf_counter() - start) * 1000)
+    return times
+
+
+def build(
+    mode: str, server: StandInServer, ping_interval: float
+) -> tuple[dict[str, LazyClient], tp.Optional[ClientPool]]:
+    if mode == "default":
+        options = {"base_url": server.base_url, "api_key": "x"}
+        return {stage: LazyClient(**options) for stage in STAGES}, None
+    pool = ClientPool(ping_interval=ping_interval if mode == "pooled" else 1e9)
+    clients = {
+        stage: LazyClient(pool, stage, base_url=server.base_url, api_key="x")
+        for stage in STAGES
+    }
+    for client in clients.values():
+        client.warm()  # the app does this while the mic warms up
+    return clients, pool
+
+
+def connections(args: argparse.Namespace, audio: bytes):
+    print(
+        f"{args.turns} turns {args.idle}s apart; new connections cost "
+        f"{args.connect_latency * 1000:.0f} ms, server drops them after "
+        f"{args.server_idle}s idle"
+    )
+    print(f"{'':<18}" + "".join(f"{stage + ' p50/p95 ms':>20}" for stage in STAGES))
+    for mode in ("default", "pooled, no pings", "pooled"):
+        server = StandInServer(
+            stt_latency=0.05,
+            llm_latency=0.05,
+            tts_latency=0.05,
+            connect_latency=args.connect_latency,
+            idle_timeout=args.server_idle,
+        )
+        with server:
+            clients, pool = build(mode, server, args.server_idle / 2)
+            times: dict[str, list[float]] = {stage: [] for stage in STAGES}
+            for i in range(args.turns):
+                if i:
+                    time.sleep(args.idle)
+                for stage, ms in turn(clients, audio).items():
+                    times[stage].append(ms)
+            if pool is not None:
+                pool.close()
+        print(
+            f"{mode:<18}"
+            + "".join(
+                f"{percentile(times[s], 50):>11.1f} /{percentile(times[s], 95):>7.1f}"
+                for s in STAGES
+            )
+            + f"   {server.connections} connections"
+        )
+        if pool is not None and args.verbose:
+            print(f"  {pool.stats()}")
+        if mode == "pooled":
+            for stage, row in pool.stats().items():
+                print(
+                    f"  {stage}: reuse {row['reuse_rate']:.0%} over "
+                    f"{row['requests']} requests, {row['pings']} pings"
+                )
+
+
+def retries(args: argparse.Namespace, audio: bytes):
+    print(f"\n{args.turns * 3} requests, {args.fail_rate:.0%} answered with 503")
+    for mode in ("default", "pooled"):
+        server = StandInServer(fail_rate=args.fail_rate, seed=args.seed)
+        with server:
+            clients, pool = build(mode, server, 30.0)
+            start = time.perf_counter()
+            ok = 0
+            for _ in range(args.turns):
+                try:
+                    turn(clients, audio)
+                    ok += 1
+                except Exception:
+                    pass
+            elapsed = time.perf_counter() - start
+            if pool is not None:
+                pool.close()
+        retried = sum(row["retries"] for row in pool.stats().values()) if pool else "-"
+        print(
+            f"  {mode:<8} {ok}/{args.turns} turns ok in {elapsed:.2f}s, "
+            f"{server.failures} failures served, retries {retried}"
+        )
+
+
+def stall(args: argparse.Namespace):
+    server = StandInServer(llm_latency=60.0)
+    with server:
+        pool = ClientPool(timeouts={"llm": (1.0, args.read_timeout)})
+        llm = LazyClient(pool, "llm", base_url=server.base_url, api_key="x")
+        llm.get()
+        start = time.perf_counter()
+        try:
+            for _ in llm.chat.completions.create(
+                messages=[{"role": "user", "content": "hola"}],
+                model="stand-in",
+                stream=True,
+            ):
+                pass
+            outcome = "finished"
+        except Exception as e:
+            outcome = type(e).__name__
+        elapsed = time.perf_counter() - start
+        pool.close()
+    print(
+        f"\nstalled completion, read timeout {args.read_timeout}s: {outcome} "
+        f"after {elapsed:.2f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--idle", type=float, default=2.0)
+    parser.add_argument("--connect-latency", type=float, default=0.1)
+    parser.add_argument("--server-idle", type=float, default=1.0)
+    parser.add_argument("--fail-rate", type=float, default=0.2)
+    parser.add_argument("--read-timeout", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    audio = encode_wav(speak_words(["abre", "la", "carpeta"], RATE), RATE)
+    connections(args, audio)
+    retries(args, audio)
+    stall(args)
+
+
+if __name__ == "__main__":
+    main()
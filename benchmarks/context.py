@@ -0,0 +1,119 @@
+# benchmarks/context.py
+"""Mutation throughput and latency for SystemContext persistence.
+
+Compares the journaled background writer with rewriting the whole JSON file
+on every mutation, then kills a writer process with SIGKILL and checks that
+every flushed mutation is recovered.
+
+Run with `python -m benchmarks.context [--mutations 2000]`.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import signal
+import sys
+import tempfile
+import time
+import typing as tp
+from pathlib import Path
+
+import numpy as np
+
+from src.context import SystemContext, apply_record
+
+
+class RewritingContext(SystemContext):
+    """The previous behaviour: dump the whole file on the calling thread"""
+
+    def _record(self, op: str, path: list[tp.Any], value: tp.Any, **extra: tp.Any):
+        with self.lock:
+            record = {"op": op, "path": path, "value": value, **extra}
+            apply_record(self._context, record)
+            with open(self.context_file, "w") as f:
+                json.dump(self._context, f, indent=2, default=str)
+
+
+def mutate(context: SystemContext, i: int):
+    if i % 4 == 3:
+        context.set_user_preference(f"pref-{i % 10}", i)
+    else:
+        context.add_command_to_history(f"ls -la /tmp/{i}", "x" * 400, i % 7 != 0)
+
+
+def run(
+    factory: tp.Callable[[Path], SystemContext], mutations: int
+) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        context = factory(Path(tmp) / "context.json")
+        latencies = np.empty(mutations)
+        start = time.perf_counter()
+        for i in range(mutations):
+            t = time.perf_counter()
+            mutate(context, i)
+            latencies[i] = time.perf_counter() - t
+        elapsed = time.perf_counter() - start
+        context.close()
+        durable = time.perf_counter() - start
+    return {
+        "per_second": mutations / elapsed,
+        "p50_us": float(np.percentile(latencies, 50)) * 1e6,
+        "p99_us": float(np.percentile(latencies, 99)) * 1e6,
+        "durable_s": durable,
+    }
+
+
+def _crashing_writer(path: str, mutations: int):
+    context = SystemContext(Path(path), compact_every=mutations // 3)
+    for i in range(mutations):
+        mutate(context, i)
+    context.flush()
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def state(context: SystemContext) -> tuple[list[str], dict[str, tp.Any]]:
+    """Everything the benchmark mutates, without timestamps"""
+    commands = [entry["command"] for entry in context._context["recent_commands"]]
+    return commands, context._context["user_preferences"]
+
+
+def crash_recovery(mutations: int) -> bool:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "context.json"
+        process = mp.get_context("spawn").Process(
+            target=_crashing_writer, args=(str(path), mutations)
+        )
+        process.start()
+        process.join()
+        recovered = SystemContext(path)
+        expected = RewritingContext(Path(tmp) / "expected.json")
+        for i in range(mutations):
+            mutate(expected, i)
+        ok = state(recovered) == state(expected)
+        recovered.close()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mutations", type=int, default=2000)
+    args = parser.parse_args()
+
+    for name, factory in (
+        ("rewrite file", RewritingContext),
+        ("journal", SystemContext),
+    ):
+        result = run(factory, args.mutations)
+        print(
+            f"{name:<14} {result['per_second']:10.0f} mutations/s  "
+            f"p50 {result['p50_us']:8.1f} us  p99 {result['p99_us']:8.1f} us  "
+            f"all durable after {result['durable_s']:.2f}s"
+        )
+    recovered = crash_recovery(args.mutations)
+    print(f"recovery after SIGKILL: {'ok' if recovered else 'LOST MUTATIONS'}")
+    if not recovered:
+        sys.exit("mutations were lost after SIGKILL")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/conversation.py
+"""Tokens sent per request over a long session, with and without a budget.
+
+Replays a synthetic session of requests, command outputs and replies, and
+reports request size plus how much of each request repeats the previous
+request's prefix byte for byte (what provider prompt caches can reuse).
+
+Run with `python -m benchmarks.conversation [--turns 200]`.
+"""
+import argparse
+import json
+import random
+
+import numpy as np
+
+from src.conversation import ConversationWindow, message_tokens
+
+SYSTEM_PROMPT = "You are llmOS, the control layer between language and macOS. " * 20
+
+
+def cached_prefix(previous: list[str], current: list[str]) -> int:
+    """Number of leading messages identical to the previous request"""
+    count = 0
+    for a, b in zip(previous, current):
+        if a != b:
+            break
+        count += 1
+    return count
+
+
+def replay(window: ConversationWindow, turns: int, budgeted: bool) -> dict[str, float]:
+    rng = random.Random(0)
+    sizes: list[int] = []
+    cached: list[float] = []
+    previous: list[str] = []
+    for turn in range(turns):
+        window.add({"role": "user", "content": f"request {turn}: " + "palabra " * 20})
+        messages = window.prepare() if budgeted else window.messages
+        sizes.append(sum(message_tokens(m) for m in messages))
+        current = [json.dumps(m, sort_keys=True) for m in messages]
+        hits = cached_prefix(previous, current)
+        cached.append(
+            sum(message_tokens(m) for m in messages[:hits]) / max(1, sizes[-1])
+        )
+        previous = current
+        for step in range(rng.choice((0, 1, 1, 2, 3))):
+            output = "line of output\n" * rng.choice((1, 5, 40, 400))
+            window.add_output(f"command {turn}.{step}", output)
+        window.add({"role": "assistant", "content": "respuesta corta " * 8})
+    return {
+        "p50": float(np.percentile(sizes, 50)),
+        "max": float(max(sizes)),
+        "total": float(sum(sizes)),
+        "cached": float(np.mean(cached[1:])) if len(cached) > 1 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--budget", type=int, default=6000)
+    args = parser.parse_args()
+
+    for name, budgeted, window in (
+        (
+            "unbounded",
+            False,
+            ConversationWindow(SYSTEM_PROMPT, max_output_tokens=10**9),
+        ),
+        ("budgeted", True, ConversationWindow(SYSTEM_PROMPT, budget=args.budget)),
+    ):
+        result = replay(window, args.turns, budgeted)
+        print(
+            f"{name:<10} tokens/request p50 {result['p50']:8.0f}  "
+            f"max {result['max']:8.0f}  total {result['total']:11.0f}  "
+            f"cacheable prefix {result['cached']:.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
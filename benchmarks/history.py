@@ -0,0 +1,109 @@
+# benchmarks/history.py
+"""Insert throughput and relevance-search latency for the command history.
+
+Fills a fresh history with synthetic shell commands, then times searches for
+spoken-style requests with and without filters.
+
+Run with `python -m benchmarks.history [--entries 200000]`.
+"""
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from src.history import CommandHistory
+
+PROGRAMS = (
+    "git status",
+    "git log --oneline",
+    "git push origin",
+    "ls -la",
+    "cd",
+    "npm install",
+    "npm test",
+    "pytest -q",
+    "pip install",
+    "docker compose up",
+    "docker ps",
+    "grep -rn",
+    "cat",
+    "make build",
+    "curl -s",
+    "kubectl get pods",
+)
+WORDS = (
+    "proyectos api frontend backend utils config tests docs scripts build "
+    "dist logs data models server client cache auth payments reports"
+).split()
+QUERIES = (
+    "ejecuta las pruebas del backend",
+    "muestra el estado de git en proyectos",
+    "instala las dependencias del frontend",
+    "levanta docker para payments",
+    "busca errores en los logs del server",
+    "cuantos pods hay en kubectl",
+)
+
+
+# Command output vocabulary with a Zipf-like word distribution
+OUTPUT_WORDS = WORDS + [f"tok{i}" for i in range(5000)]
+OUTPUT_WEIGHTS = [1.0 / (rank + 1) for rank in range(len(OUTPUT_WORDS))]
+
+
+def synthetic_command(rng: random.Random) -> tuple[str, str, bool]:
+    program = rng.choice(PROGRAMS)
+    target = "/".join(rng.sample(WORDS, rng.randint(1, 3)))
+    output = rng.choices(OUTPUT_WORDS, OUTPUT_WEIGHTS, k=rng.randint(5, 120))
+    return f"{program} {target}", " ".join(output), rng.random() > 0.15
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=200_000)
+    parser.add_argument("--searches", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        history = CommandHistory(Path(tmp) / "history.db")
+        start = datetime.now() - timedelta(days=365)
+        step = timedelta(days=365) / args.entries
+        t = time.perf_counter()
+        for i in range(args.entries):
+            history.add(*synthetic_command(rng), timestamp=start + step * i)
+        queued = time.perf_counter() - t
+        history.flush()
+        committed = time.perf_counter() - t
+        print(
+            f"inserted {len(history)} entries: {args.entries / committed:,.0f}/s "
+            f"committed ({queued / args.entries * 1e6:.1f} us per add while it writes)"
+        )
+
+        week_ago = datetime.now() - timedelta(days=7)
+        for name, filters in (
+            ("relevance", {}),
+            ("relevance, failed only", {"success": False}),
+            ("relevance, last 7 days", {"since": week_ago}),
+            ("most recent", {"query": None}),
+        ):
+            latencies = np.empty(args.searches)
+            hits = 0
+            for i in range(args.searches):
+                options = {"query": QUERIES[i % len(QUERIES)], **filters}
+                t = time.perf_counter()
+                hits += len(history.search(**options))
+                latencies[i] = time.perf_counter() - t
+            print(
+                f"  {name:<24} p50 {np.percentile(latencies, 50) * 1e6:7.0f} us  "
+                f"p99 {np.percentile(latencies, 99) * 1e6:7.0f} us  "
+                f"{hits / args.searches:.1f} results"
+            )
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
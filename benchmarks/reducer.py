@@ -0,0 +1,162 @@
+# benchmarks/reducer.py
+"""Tokens fed back to the LLM per command output: head/tail clipping vs reducer.
+
+The outputs are synthetic but shaped like the real thing (progress bars, `ls
+-l`, `find`, `git status`, `git log`, a failing test run, a chatty log), plus
+the output of a few real commands on this machine. Each row also checks that
+the facts the LLM needs (failing test names, file counts, ...) survive.
+
+Run with `python -m benchmarks.reducer [--budget 600]`.
+"""
+import argparse
+import subprocess
+import sys
+
+from src.reducer import OutputReducer, clip_output, estimate_tokens
+
+OK = "✅ Command executed successfully:\n"
+
+
+def npm_install() -> str:
+    lines = []
+    for package in range(40):
+        for percent in range(0, 101, 5):
+            bar = "#" * (percent // 5) + "." * (20 - percent // 5)
+            lines.append(f"\r[{bar}] {percent}% fetch pkg-{package}")
+        # npm clears the bar before printing a message
+        lines.append(f"\r\x1b[Knpm WARN deprecated pkg-{package}@1.0.{package}\n")
+    return OK + "".join(lines) + "\nadded 1432 packages in 38s\n"
+
+
+def pip_download() -> str:
+    lines = []
+    for step in range(200):
+        done = step / 20
+        lines.append(
+            f"   ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ {done:.1f}/10.0 MB "
+            f"{1.5 + step / 100:.1f} MB/s eta 0:00:{200 - step:02d}"
+        )
+    return (
+        OK + "Collecting torch\n" + "\n".join(lines) + "\n"
+        "Successfully installed torch-2.3.0\n"
+    )
+
+
+def ls_long() -> str:
+    rows = [
+        f"-rw-r--r--  1 user  staff  {1000 + i * 37:>6} Jan  3 10:{i % 60:02d} "
+        f"module_{i}.{'py' if i % 3 else 'json'}"
+        for i in range(400)
+    ]
+    rows += [
+        f"drwxr-xr-x  4 user  staff    128 Jan  3 10:00 dir_{i}" for i in range(12)
+    ]
+    return OK + "total 8192\n" + "\n".join(rows)
+
+
+def find_files() -> str:
+    paths = [f"./node_modules/pkg{i % 30}/lib/file{i}.js" for i in range(1500)]
+    paths += [f"./src/components/Widget{i}.tsx" for i in range(60)]
+    return OK + "\n".join(paths)
+
+
+def git_status() -> str:
+    staged = "\n".join(f"\tmodified:   src/app/module{i}.py" for i in range(25))
+    modified = "\n".join(f"\tmodified:   tests/test_module{i}.py" for i in range(40))
+    untracked = "\n".join(f"\tbuild/artifact_{i}.o" for i in range(300))
+    return (
+        OK + "On branch feature/login\n"
+        "Your branch is ahead of 'origin/feature/login' by 3 commits.\n\n"
+        "Changes to be committed:\n"
+        '  (use "git restore --staged <file>..." to unstage)\n'
+        f"{staged}\n\n"
+        "Changes not staged for commit:\n"
+        '  (use "git add <file>..." to update what will be committed)\n'
+        f"{modified}\n\n"
+        "Untracked files:\n"
+        '  (use "git add <file>..." to include in what will be committed)\n'
+        f"{untracked}\n"
+    )
+
+
+def git_log() -> str:
+    commits = []
+    for i in range(150):
+        commits.append(
+            f"commit {i:040x}\nAuthor: Dev {i % 7} <dev{i % 7}@example.com>\n"
+            f"Date:   Mon Jan {1 + i % 28} 10:00:00 2024 +0000\n\n"
+            f"    Change number {i} to the login flow\n\n"
+            f"    Longer explanation of change {i}, wrapped over\n"
+            f"    a couple of lines as people tend to write them.\n"
+        )
+    return OK + "\n".join(commits)
+
+
+def pytest_run() -> str:
+    rule = "=" * 30
+    lines = [f"{rule} test session starts {rule}"]
+    lines += [f"tests/test_mod{i}.py {'.' * 40}  [{i}%]" for i in range(100)]
+    lines += [
+        f"{rule} FAILURES {rule}",
+        f"{'_' * 30} test_login_redirect {'_' * 30}",
+        "    def test_login_redirect():",
+        ">       assert response.status_code == 302",
+        "E       assert 200 == 302",
+        "tests/test_auth.py:42: AssertionError",
+        f"{rule} short test summary info {rule}",
+        "FAILED tests/test_auth.py::test_login_redirect - assert 200 == 302",
+        f"{rule} 1 failed, 3999 passed in 81.20s {rule}",
+    ]
+    return "❌ Command failed:\n" + "\n".join(lines)
+
+
+def chatty_log() -> str:
+    lines = [f"[worker-3] heartbeat ok seq={i} latency={i % 9}ms" for i in range(2000)]
+    lines.insert(1200, "[worker-3] ERROR lost connection to db-primary")
+    return OK + "\n".join(lines)
+
+
+SAMPLES = [
+    ("npm install", npm_install, ["added 1432 packages"]),
+    ("pip install torch", pip_download, ["Successfully installed torch"]),
+    ("ls -l", ls_long, ["412 entries", "12 directories"]),
+    ("find . -name '*.js*'", find_files, ["1560 paths"]),
+    ("git status", git_status, ["feature/login", "staged: 25", "untracked: 300"]),
+    ("git log", git_log, ["150 commits", "Change number 0 "]),
+    ("pytest", pytest_run, ["test_login_redirect", "1 failed, 3999 passed"]),
+    ("tail -n 2000 worker.log", chatty_log, ["lost connection"]),
+]
+
+REAL = ["ls -l /usr/bin", "find /usr/lib -name '*.py'", "git log -n 200"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget", type=int, default=600)
+    args = parser.parse_args()
+
+    reducer = OutputReducer(args.budget)
+    print(f"{'command':<26} {'raw':>7} {'clipped':>8} {'reduced':>8}  facts kept")
+    outputs = [(name, make(), facts) for name, make, facts in SAMPLES]
+    for command in REAL:
+        result = subprocess.run(command, shell=True, capture_output=True, text=True)
+        outputs.append((command, OK + result.stdout, []))
+    lost = 0
+    for command, output, facts in outputs:
+        clipped = clip_output(output, args.budget)
+        reduced = reducer.reduce(command, output)
+        kept = [fact in reduced for fact in facts]
+        clipped_kept = sum(fact in clipped for fact in facts)
+        lost += len(facts) - sum(kept)
+        print(
+            f"{command[:26]:<26} {estimate_tokens(output):>7} "
+            f"{estimate_tokens(clipped):>8} {estimate_tokens(reduced):>8}  "
+            f"{sum(kept)}/{len(facts)} (clipping {clipped_kept}/{len(facts)})"
+        )
+    print(f"reducer: {reducer.stats()}")
+    if lost:
+        sys.exit(f"{lost} facts lost in reduction")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# benchmarks/resultcache.py
+"""Replays an assistant-like command session with and without the result cache.
+
+The session runs in a scratch git repository: inspection commands repeat over
+a few turns, with edits in between, some made by the session's own commands
+and some made behind its back. Every command also runs without the cache, and
+any cached output that differs from the fresh one is reported as stale.
+Then commands that write or walk whole trees in easily missed ways (bundled
+short options, `--opt=value`, `git branch name`) are checked to be left out
+of the cache; the script exits with an error if any is not.
+
+Run with `python -m benchmarks.resultcache [--turns 30]`.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.resultcache import classify
+from src.terminal import Terminal
+
+INSPECT = [
+    "pwd",
+    "ls -la",
+    "git status",
+    "cat package.json",
+    "git log --oneline | head -5",
+    "df -h",
+    "ls src",
+    "wc -l src/app.py",
+]
+# (command, whether its result may be cached)
+CLASSIFY = [
+    ("ls -la", True),
+    ("sort -u package.json", True),
+    ("git branch", True),
+    ("git branch -a", True),
+    ("git diff --stat", True),
+    ("sort -uo out.txt package.json", False),
+    ("sort --output=out.txt package.json", False),
+    ("git diff --output=out.txt", False),
+    ("git log --output=out.txt", False),
+    ("git branch newfeature", False),
+    ("git branch -Df oldfeature", False),
+    ("grep -rn TODO .", False),
+    ("ls -R", False),
+    ("ls -laR src", False),
+    ("ls --recursive", False),
+]
+
+
+def scratch_repo() -> str:
+    root = tempfile.mkdtemp()
+    os.makedirs(os.path.join(root, "src"))
+    with open(os.path.join(root, "package.json"), "w") as f:
+        f.write('{"name": "demo", "version": "1.0.0"}\n')
+    with open(os.path.join(root, "src", "app.py"), "w") as f:
+        f.write("print('hello')\n" * 50)
+    for command in (
+        "git init -q",
+        "git -c user.name=a -c user.email=a@b add -A",
+        "git -c user.name=a -c user.email=a@b commit -qm init",
+    ):
+        subprocess.run(command, shell=True, cwd=root, check=True)
+    return root
+
+
+def session(turns: int, root: str) -> list[tuple[str, str]]:
+    """(kind, command) pairs; "outside" edits bypass the terminal"""
+    steps: list[tuple[str, str]] = []
+    for turn in range(turns):
+        steps += [("run", command) for command in INSPECT[turn % 3 :][:4]]
+        if turn % 4 == 1:
+            steps.append(("run", f"echo '// turn {turn}' >> src/app.py"))
+        elif turn % 4 == 3:
+            steps.append(("outside", f"touch {root}/src/new_{turn}.py"))
+        steps += [("run", command) for command in INSPECT[(turn + 2) % 8 :][:3]]
+    return steps
+
+
+def check_classify(root: str) -> int:
+    """Print each classification check; returns how many failed"""
+    failed = 0
+    for command, cacheable in CLASSIFY:
+        ok = (classify(command, root) is not None) == cacheable
+        failed += not ok
+        kind = "cached" if cacheable else "not cached"
+        print(f"  {'ok  ' if ok else 'FAIL'} {command:<38} {kind}")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=30)
+    args = parser.parse_args()
+
+    root = scratch_repo()
+    cached = Terminal(cache=True)
+    fresh = Terminal()
+    cached.current_dir = fresh.current_dir = root
+
+    cached_seconds = fresh_seconds = 0.0
+    stale: list[str] = []
+    steps = session(args.turns, root)
+    for kind, command in steps:
+        if kind == "outside":
+            subprocess.run(command, shell=True, check=True)
+            continue
+        start = time.perf_counter()
+        result = cached.execute_command(command)
+        cached_seconds += time.perf_counter() - start
+        if not command.startswith("echo"):
+            start = time.perf_counter()
+            expected = fresh.execute_command(command)
+            fresh_seconds += time.perf_counter() - start
+            if result["output"] != expected["output"] and command != "df -h":
+                stale.append(command)
+        else:
+            # Edits run once, in the shared directory, and cost both the same
+            fresh_seconds += time.perf_counter() - start
+
+    assert cached.cache is not None
+    stats = cached.cache.stats()
+    print(f"{len(steps)} steps in a scratch git repository")
+    print(f"without cache {fresh_seconds:6.2f}s   with cache {cached_seconds:6.2f}s")
+    print(f"cache: {stats}")
+    print(f"stale results: {len(stale)} {sorted(set(stale))}")
+
+    print("classification:")
+    failed = check_classify(root)
+    if stale or failed:
+        sys.exit(f"{len(stale)} stale results, {failed} misclassified commands")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/segmenter.py
+"""Segmentation cost per streamed token.
+
+Also checks that where the stream is split does not change the sentences:
+every text is fed in two deltas, cut at each position in turn, and compared
+with feeding it whole. That covers boundaries that straddle two deltas, such
+as a blank line whose newlines arrive separately.
+
+Run with `python -m benchmarks.segmenter [--repeat N]`.
+"""
+import argparse
+import sys
+import time
+import typing as tp
+
+from src.segmenter import SentenceSegmenter
+
+from . import load_token_streams
+
+SPLIT_TEXTS = [
+    "Lista de cosas importantes\n\nSegunda parte del texto",
+    "Primero abre la carpeta. Después, lista los archivos?! Listo.",
+    'El Dr. Pérez dijo "ya está." Y se fue a casa temprano…',
+]
+
+
+def segment(deltas: list[str], language: str) -> list[str]:
+    segmenter = SentenceSegmenter(language=language)
+    sentences = [s for delta in deltas for s in segmenter.feed(delta)]
+    tail = segmenter.flush()
+    return sentences + [tail] if tail else sentences
+
+
+def check_splits(streams: list[dict[str, tp.Any]]) -> tuple[int, int]:
+    """Two-delta splits whose sentences differ from feeding the text whole"""
+    texts = [(text, "es") for text in SPLIT_TEXTS] + [
+        ("".join(stream["deltas"]), stream["language"]) for stream in streams
+    ]
+    wrong = total = 0
+    for text, language in texts:
+        whole = segment([text], language)
+        for cut in range(1, len(text)):
+            total += 1
+            wrong += segment([text[:cut], text[cut:]], language) != whole
+    return wrong, total
+
+
+def bench_incremental(streams: list[dict[str, tp.Any]], repeat: int) -> tuple[float, int]:
+    tokens = 0
+    start = time.perf_counter_ns()
+    for _ in range(repeat):
+        for stream in streams:
+            segmenter = SentenceSegmenter(language=stream["language"])
+            for delta in stream["deltas"]:
+                segmenter.feed(delta)
+                tokens += 1
+            segmenter.flush()
+    return (time.perf_counter_ns() - start) / max(tokens, 1), tokens
+
+
+def bench_reparse(streams: list[dict[str, tp.Any]], repeat: int) -> tuple[float, int]:
+    """The previous behaviour: re-run spaCy over the whole buffer on every delta"""
+    from src.utils import chunk_sentences
+
+    tokens = 0
+    start = time.perf_counter_ns()
+    for _ in range(repeat):
+        for stream in streams:
+            buffer = ""
+            for delta in stream["deltas"]:
+                buffer += delta
+                for _chunk in chunk_sentences(buffer):
+                    buffer = ""
+                tokens += 1
+    return (time.perf_counter_ns() - start) / max(tokens, 1), tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    streams = load_token_streams()
+    wrong, total = check_splits(streams)
+    print(f"split deltas: {total - wrong}/{total} match the text fed whole")
+    if wrong:
+        sys.exit(f"{wrong} splits changed the sentences")
+
+    per_token, tokens = bench_incremental(streams, args.repeat)
+    print(f"incremental: {per_token / 1000:8.2f} µs/token ({tokens} tokens)")
+
+    try:
+        per_token, tokens = bench_reparse(streams, max(args.repeat // 20, 1))
+        print(f"spacy reparse: {per_token / 1000:8.2f} µs/token ({tokens} tokens)")
+    except (ImportError, OSError) as e:
+        print(f"spacy reparse: skipped ({e})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/shell.py
+"""Commands per second with a fresh shell per command vs one persistent shell.
+
+Also checks that state set by one command (`export`, `alias`, `cd`, functions)
+is visible to the next in the persistent session, and not with fresh shells.
+
+Run with `python -m benchmarks.shell [--commands 300]`.
+"""
+import argparse
+import time
+
+from src.terminal import Terminal
+
+STATE = [
+    ("export BENCH_VAR=kept", "echo $BENCH_VAR", "kept"),
+    ("alias bench_alias='echo kept'", "bench_alias", "kept"),
+    ("bench_fn() { echo kept; }", "bench_fn", "kept"),
+    ("cd /tmp", "pwd", "/tmp"),
+]
+
+
+def rate(terminal: Terminal, command: str, count: int) -> float:
+    terminal.execute_command(command)  # start the session outside the timing
+    start = time.perf_counter()
+    for _ in range(count):
+        result = terminal.execute_command(command)
+        assert result["success"], result
+    return count / (time.perf_counter() - start)
+
+
+def state_kept(terminal: Terminal) -> str:
+    kept = []
+    for setup, check, expected in STATE:
+        terminal.execute_command(setup)
+        result = terminal.execute_command(check)
+        kept.append("yes" if result["output"] == expected else "no")
+    return " ".join(kept)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--commands", type=int, default=300)
+    args = parser.parse_args()
+
+    for name, persistent in (("fresh shell", False), ("persistent", True)):
+        terminal = Terminal(persistent=persistent)
+        rates = "  ".join(
+            f"{command!r} {rate(terminal, command, args.commands):6.0f}/s"
+            for command in ("true", "echo hello", "ls")
+        )
+        print(f"{name:<12} {rates}")
+        print(f"{'':<12} state kept (export alias function cd): {state_kept(terminal)}")
+        terminal.close()
+
+
+if __name__ == "__main__":
+    main()
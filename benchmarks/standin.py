@@ -0,0 +1,492 @@
+# benchmarks/standin.py
+"""Local OpenAI-compatible stand-in server for benchmarks.
+
+Speech is simulated with tones: every word of `VOCAB` is a sine at its own
+frequency, so the transcription endpoint can "hear" which words were said and
+partial or overlapping windows can be checked against the script.
+
+Chat completions stream scripted replies, given as lists of deltas, so tool
+calls can be fragmented exactly as a provider might send them. Speech is
+streamed back as raw PCM, a quiet tone as long as the text would take to say.
+"""
+import collections
+import io
+import json
+import multiprocessing
+import random
+import threading
+import time
+import typing as tp
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from src.typedefs import JSON
+
+VOCAB = (
+    "abre la carpeta de proyectos y muestra archivos que cambiaron hoy luego "
+    "instala las dependencias ejecuta pruebas dime cuantas fallaron antes "
+    "subir los cambios al repositorio remoto"
+).split()
+
+WORD_SECONDS = 0.35
+GAP_SECONDS = 0.08
+FRAME_SECONDS = 0.02
+SPEECH_RATE = 24000  # matches `src.speaker.PCM_RATE`
+SPEECH_CHUNK = 4096
+
+
+def word_frequency(index: int) -> float:
+    return 300.0 + 100.0 * index
+
+
+def speak_words(words: tp.Sequence[str], rate: int) -> np.ndarray:
+    """Tone-encoded int16 audio for `words` (which must be in VOCAB)"""
+    n = int(WORD_SECONDS * rate)
+    t = np.arange(n) / rate
+    fade = np.minimum(1.0, np.minimum(t, t[::-1]) / 0.01)
+    gap = np.zeros(int(GAP_SECONDS * rate))
+    parts: list[np.ndarray] = []
+    for word in words:
+        tone = 0.3 * np.sin(2 * np.pi * word_frequency(VOCAB.index(word)) * t)
+        parts += [tone * fade, gap]
+    return (np.concatenate(parts) * 32767).astype(np.int16)
+
+
+def hear_words(samples: np.ndarray, rate: int) -> list[str]:
+    """Decode tone-encoded audio back into words"""
+    frame = int(FRAME_SECONDS * rate)
+    n_frames = len(samples) // frame
+    if not n_frames:
+        return []
+    frames = samples[: n_frames * frame].reshape(n_frames, frame) / 32768.0
+    spectrum = np.abs(np.fft.rfft(frames, axis=1))
+    freqs = np.fft.rfftfreq(frame, 1.0 / rate)
+    peaks = freqs[np.argmax(spectrum, axis=1)]
+    loud = np.sqrt(np.mean(np.square(frames), axis=1)) > 0.02
+    indices = np.where(loud, np.round((peaks - 300.0) / 100.0), -1).astype(int)
+
+    words: list[str] = []
+    run_index, run_length = -1, 0
+    for index in (*indices, -1):
+        if index == run_index:
+            run_length += 1
+            continue
+        if 0 <= run_index < len(VOCAB) and run_length * FRAME_SECONDS >= 0.1:
+            words.append(VOCAB[run_index])
+        run_index, run_length = index, 1
+    return words
+
+
+def text_deltas(text: str, size: int = 8) -> list[JSON]:
+    return [{"content": text[i : i + size]} for i in range(0, len(text), size)]
+
+
+def tool_call_deltas(
+    calls: tp.Sequence[tuple[str, JSON]],
+    fragment: tp.Optional[int] = 4,
+    interleave: bool = False,
+    with_index: bool = True,
+) -> list[JSON]:
+    """Deltas streaming `calls` (name, arguments) with fragmented arguments.
+
+    `fragment=None` sends each call whole in one delta; `interleave` sends the
+    calls' fragments round-robin; `with_index=False` omits the index field.
+    """
+    streams: list[list[JSON]] = []
+    for i, (name, arguments) in enumerate(calls):
+        text = json.dumps(arguments)
+        if fragment is None:
+            pieces = [text]
+        else:
+            pieces = [text[j : j + fragment] for j in range(0, len(text), fragment)]
+        first: JSON = {
+            "id": f"call_{i}",
+            "type": "function",
+            "function": {"name": name, "arguments": pieces[0]},
+        }
+        rest: list[JSON] = [{"function": {"arguments": piece}} for piece in pieces[1:]]
+        stream = [first, *rest]
+        if with_index:
+            for entry in stream:
+                entry["index"] = i
+        streams.append([{"tool_calls": [entry]} for entry in stream])
+    if not interleave:
+        return [delta for stream in streams for delta in stream]
+    deltas: list[JSON] = []
+    for step in range(max(len(stream) for stream in streams)):
+        deltas += [stream[step] for stream in streams if step < len(stream)]
+    return deltas
+
+
+def _multipart_file(body: bytes, content_type: str) -> bytes:
+    boundary = content_type.split("boundary=")[1].strip('"').encode()
+    for part in body.split(b"--" + boundary):
+        head, _, payload = part.partition(b"\r\n\r\n")
+        if b'name="file"' in head:
+            return payload[:-2] if payload.endswith(b"\r\n") else payload
+    return b""
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Serves transcriptions, chat completions and speech with set latencies.
+
+    Transcription latency is `stt_latency + stt_per_second * audio seconds`;
+    audio with no tone words in it is heard as `fallback_text`. Chat
+    completions stream the next of `chat_replies` (or a short default reply),
+    the first delta after `llm_latency` and then one every `chunk_delay`
+    seconds; every request body is kept in `chat_requests`, and streams the
+    client hung up on are noted in `aborted`. Speech starts
+    after `tts_latency`, lasts `tts_per_char` seconds per character and is
+    streamed `tts_speed` times faster than real time. Every latency gets
+    uniform jitter of +/- `jitter` seconds.
+
+    For the HTTP layer itself: each new connection waits `connect_latency`
+    before it is served (standing in for DNS, TCP and TLS setup to a remote
+    host), connections idle for `idle_timeout` seconds are closed, and
+    `fail_rate` of the POST requests get a 503.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        port: int = 0,
+        stt_latency: float = 0.25,
+        stt_per_second: float = 0.03,
+        jitter: float = 0.0,
+        seed: int = 0,
+        chunk_delay: float = 0.0,
+        llm_latency: float = 0.0,
+        tts_latency: float = 0.0,
+        tts_per_char: float = 0.06,
+        tts_speed: float = 4.0,
+        fallback_text: str = "",
+        connect_latency: float = 0.0,
+        idle_timeout: tp.Optional[float] = None,
+        fail_rate: float = 0.0,
+    ):
+        super().__init__(("127.0.0.1", port), StandInHandler)
+        self.stt_latency = stt_latency
+        self.stt_per_second = stt_per_second
+        self.chunk_delay = chunk_delay
+        self.llm_latency = llm_latency
+        self.tts_latency = tts_latency
+        self.tts_per_char = tts_per_char
+        self.tts_speed = tts_speed
+        self.fallback_text = fallback_text
+        self.connect_latency = connect_latency
+        self.idle_timeout = idle_timeout
+        self.fail_rate = fail_rate
+        self.failures = 0
+        self.chat_replies: "collections.deque[list[JSON]]" = collections.deque()
+        self.chat_requests: list[JSON] = []
+        self.stream_ends: list[float] = []
+        self.aborted: list[tuple[str, float]] = []  # streams the client dropped
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests: dict[str, int] = {}
+        self.connections = 0
+        self._thread: tp.Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def delay(self, base: float):
+        with self.lock:
+            jitter = self.random.uniform(-self.jitter, self.jitter)
+        time.sleep(max(0.0, base + jitter))
+
+    def fails(self) -> bool:
+        with self.lock:
+            failed = self.random.random() < self.fail_rate
+            self.failures += failed
+        return failed
+
+    def count(self, path: str):
+        with self.lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def transcribe(self, audio: bytes) -> str:
+        if audio[:4] == b"fLaC":
+            samples, rate = decode_flac(audio)
+        else:
+            with wave.open(io.BytesIO(audio), "rb") as wav:
+                rate = wav.getframerate()
+                frames = wav.readframes(wav.getnframes())
+            samples = np.frombuffer(frames, dtype=np.int16)
+        self.delay(self.stt_latency + self.stt_per_second * len(samples) / rate)
+        return " ".join(hear_words(samples, rate)) or self.fallback_text
+
+    def speech(self, text: str) -> bytes:
+        """Int16 PCM at `SPEECH_RATE`, as long as `text` would take to say"""
+        t = np.arange(int(self.tts_per_char * len(text) * SPEECH_RATE)) / SPEECH_RATE
+        return (0.1 * np.sin(2 * np.pi * 220.0 * t) * 32767).astype(np.int16).tobytes()
+
+    def chat_reply(self, request: JSON) -> list[JSON]:
+        with self.lock:
+            self.chat_requests.append(request)
+            if self.chat_replies:
+                return self.chat_replies.popleft()
+        return text_deltas("Listo.")
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc: tp.Any):
+        self.stop()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+    server: StandInServer
+
+    def setup(self):
+        self.timeout = self.server.idle_timeout
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+        time.sleep(self.server.connect_latency)
+
+    def log_message(self, format: str, *args: tp.Any):
+        pass
+
+    def send_json(self, payload: tp.Any, status: int = 200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_event_stream(self, events: tp.Iterable[str]):
+        """Server-sent events over chunked transfer encoding (keeps keep-alive)"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for event in events:
+            data = f"data: {event}\n\n".encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def stream_chat(self, request: JSON):
+        deltas = self.server.chat_reply(request)
+
+        def chunk(delta: JSON, finish_reason: tp.Optional[str] = None) -> str:
+            choice = {"index": 0, "delta": delta, "finish_reason": finish_reason}
+            return json.dumps(
+                {
+                    "id": "chatcmpl-standin",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": request.get("model", "stand-in"),
+                    "choices": [choice],
+                }
+            )
+
+        def usage() -> str:
+            # Roughly four characters per token
+            prompt = len(json.dumps(request.get("messages", []))) // 4
+            completion = len(json.dumps(deltas)) // 4
+            return json.dumps(
+                {
+                    "id": "chatcmpl-standin",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": request.get("model", "stand-in"),
+                    "choices": [],
+                    "usage": {
+                        "prompt_tokens": prompt,
+                        "completion_tokens": completion,
+                        "total_tokens": prompt + completion,
+                    },
+                }
+            )
+
+        def events() -> tp.Generator[str, None, None]:
+            self.server.delay(self.server.llm_latency)
+            for delta in deltas:
+                time.sleep(self.server.chunk_delay)
+                yield chunk({"role": "assistant", **delta})
+            tools = any("tool_calls" in delta for delta in deltas)
+            yield chunk({}, "tool_calls" if tools else "stop")
+            if (request.get("stream_options") or {}).get("include_usage"):
+                yield usage()
+            with self.server.lock:
+                self.server.stream_ends.append(time.perf_counter())
+            yield "[DONE]"
+
+        self.send_event_stream(events())
+
+    def stream_speech(self, request: JSON):
+        audio = self.server.speech(request.get("input", ""))
+        self.server.delay(self.server.tts_latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/pcm")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        pace = SPEECH_CHUNK / 2 / SPEECH_RATE / self.server.tts_speed
+        for i in range(0, len(audio), SPEECH_CHUNK):
+            data = audio[i : i + SPEECH_CHUNK]
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+            time.sleep(pace)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_HEAD(self):
+        self.server.count("HEAD")
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        path = self.path.split("?")[0]
+        self.server.count(path)
+        if self.server.fails():
+            self.send_json({"error": {"message": "Service unavailable"}}, 503)
+            return
+        if path.endswith("/audio/transcriptions"):
+            audio = _multipart_file(body, self.headers["Content-Type"])
+            self.send_json({"text": self.server.transcribe(audio)})
+        elif path.endswith(("/chat/completions", "/audio/speech")):
+            try:
+                if path.endswith("/audio/speech"):
+                    self.stream_speech(json.loads(body))
+                else:
+                    self.stream_chat(json.loads(body))
+            except (BrokenPipeError, ConnectionResetError):
+                with self.server.lock:
+                    self.server.aborted.append((path, time.perf_counter()))
+                self.close_connection = True
+        else:
+            self.send_json({"error": {"message": f"Unknown path {path}"}}, 404)
+
+
+class StandInProcess:
+    """A `StandInServer` in a process of its own.
+
+    Keeps the server's CPU time and memory out of measurements of the code
+    under test. `replies` seed its `chat_replies`; request counts are in
+    `requests` once stopped.
+    """
+
+    def __init__(self, replies: tp.Sequence[list[JSON]] = (), **options: tp.Any):
+        self.replies = list(replies)
+        self.options = options
+        self.requests: dict[str, int] = {}
+        self.base_url = ""
+
+    def start(self) -> "StandInProcess":
+        context = multiprocessing.get_context("spawn")
+        self.conn, child = context.Pipe()
+        self.process = context.Process(
+            target=_serve, args=(child, self.replies, self.options), daemon=True
+        )
+        self.process.start()
+        self.base_url = self.conn.recv()
+        return self
+
+    def stop(self):
+        self.conn.send("stop")
+        self.requests = self.conn.recv()
+        self.process.join(timeout=5)
+
+    def __enter__(self) -> "StandInProcess":
+        return self.start()
+
+    def __exit__(self, *exc: tp.Any):
+        self.stop()
+
+
+def _serve(conn: tp.Any, replies: list[list[JSON]], options: JSON):
+    with StandInServer(**options) as server:
+        server.chat_replies.extend(replies)
+        conn.send(server.base_url)
+        conn.recv()
+        conn.send(dict(server.requests))
+
+
+def decode_flac(data: bytes) -> tuple[np.ndarray, int]:
+    """Decode the FLAC subset written by `src.encoding.encode_flac`"""
+    from src.encoding import crc16
+
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+    ones = np.flatnonzero(bits)
+    pos = 0
+
+    def read(n: int) -> int:
+        nonlocal pos
+        value = 0
+        for bit in bits[pos : pos + n]:
+            value = (value << 1) | int(bit)
+        pos += n
+        return value
+
+    def signed(n: int) -> int:
+        value = read(n)
+        return value - (1 << n) if value >> (n - 1) else value
+
+    assert data[:4] == b"fLaC", "not a FLAC stream"
+    pos = 32 + 32  # marker and STREAMINFO block header
+    pos += 16 * 2 + 24 * 2
+    rate = read(20)
+    pos += 3 + 5
+    total = read(36)
+    pos += 128
+
+    out: list[np.ndarray] = []
+    while pos < len(bits):
+        frame_start = pos // 8
+        assert read(16) == 0xFFF8, "lost frame sync"
+        pos += 16
+        lead = read(8)  # UTF-8 style frame number: skip continuation bytes
+        pos += 8 * (0 if lead < 0x80 else 2 if lead >= 0xE0 else 1)
+        block_size = read(16) + 1
+        pos += 8  # CRC-8
+
+        kind = read(8) >> 1
+        if kind == 0:
+            block = np.full(block_size, signed(16), dtype=np.int64)
+        elif kind == 1:
+            block = np.array([signed(16) for _ in range(block_size)], dtype=np.int64)
+        else:
+            order = kind & 0b111
+            warm = [signed(16) for _ in range(order)]
+            pos += 6
+            k = read(4)
+            residual = np.empty(block_size - order, dtype=np.int64)
+            for i in range(len(residual)):
+                stop = int(ones[np.searchsorted(ones, pos)])
+                quotient = stop - pos
+                pos = stop + 1
+                folded = (quotient << k) | read(k) if k else quotient
+                residual[i] = folded >> 1 if not folded & 1 else -((folded + 1) >> 1)
+            block = np.empty(block_size, dtype=np.int64)
+            block[:order] = warm
+            coefficients = ((), (1,), (2, -1), (3, -3, 1), (4, -6, 4, -1))[order]
+            for i in range(order, block_size):
+                block[i] = residual[i - order] + sum(
+                    c * block[i - lag] for lag, c in enumerate(coefficients, 1)
+                )
+        pos = (pos + 7) // 8 * 8
+        assert crc16(data[frame_start : pos // 8]) == read(16), "frame CRC mismatch"
+        out.append(block)
+    samples = np.concatenate(out).astype(np.int16) if out else np.zeros(0, np.int16)
+    assert len(samples) == total
+    return samples, rate
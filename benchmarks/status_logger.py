@@ -0,0 +1,82 @@
+# benchmarks/status_logger.py
+"""Time the voice-loop thread spends logging a turn, per log mode.
+
+Each turn logs what a real one does: panels, a spinner, a command whose
+output streams in many small blocks, its result and the reply. "inline"
+draws every event on the calling thread, as StatusLogger used to; "rich"
+queues them for the renderer thread; "jsonl" writes JSON lines off-thread;
+"off" drops them. Drawing goes to a terminal-like console on /dev/null.
+
+Run with `python -m benchmarks.status_logger [--turns 20] [--blocks 2000]`.
+"""
+import argparse
+import os
+import time
+
+from rich.console import Console
+
+from src.logger import JsonLinesSink, NullSink, RichRenderer
+from src.typedefs import JSON
+
+
+def turn(blocks: int) -> list[tuple[str, JSON]]:
+    events: list[tuple[str, JSON]] = [
+        ("listening", {}),
+        ("transcription_complete", {"text": "lista los archivos", "elapsed": 0.4}),
+        ("status", {"message": "🤖 Generating response...", "style": "magenta"}),
+        ("executing_command", {"command": "find / -name '*.py'"}),
+    ]
+    events += [
+        ("command_output", {"text": f"/usr/lib/python3/module_{i}.py"})
+        for i in range(blocks)
+    ]
+    events += [
+        ("command_result", {"result": "✅ Command executed successfully"}),
+        ("status", {"message": None, "style": "magenta"}),
+        ("text_complete", {"elapsed": 1.2}),
+        ("assistant_response", {"text": "Encontré muchos archivos de Python."}),
+        ("playing_audio", {"elapsed": 1.5}),
+        ("audio_complete", {}),
+    ]
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--blocks", type=int, default=2000)
+    args = parser.parse_args()
+
+    devnull = open(os.devnull, "w")
+    events = turn(args.blocks)
+    print(f"{len(events)} events per turn, {args.turns} turns")
+    print(f"{'mode':<8} {'loop thread':>14} {'until drawn':>14}  stats")
+    for mode in ("inline", "rich", "jsonl", "off"):
+        terminal = Console(file=devnull, force_terminal=True, width=120)
+        if mode in ("inline", "rich"):
+            sink = RichRenderer(terminal)
+        elif mode == "jsonl":
+            sink = JsonLinesSink(devnull)
+        else:
+            sink = NullSink()
+
+        start = time.perf_counter()
+        for _ in range(args.turns):
+            for kind, fields in events:
+                if mode == "inline":
+                    sink.handle([(time.time(), kind, fields)])
+                else:
+                    sink.emit(kind, fields)
+        caller = time.perf_counter() - start
+        sink.flush()
+        drawn = time.perf_counter() - start
+        sink.close()
+        stats = "-" if mode == "inline" else sink.stats()
+        print(
+            f"{mode:<8} {caller / args.turns * 1000:>11.2f} ms "
+            f"{drawn / args.turns * 1000:>11.2f} ms  {stats}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/streaming_stt.py
+"""End-of-speech to final-text latency: whole-utterance vs streaming STT.
+
+Scripted utterances are replayed in real time through a fake input device
+and transcribed by the local stand-in server.
+
+Run with `python -m benchmarks.streaming_stt [--stt-latency S]`.
+"""
+import argparse
+import sys
+import time
+import typing as tp
+
+import numpy as np
+from openai import OpenAI
+
+from src.devices import AudioDeviceManager, FakeAudioBackend
+from src.recorder import CHUNK, Recorder
+from src.transcriber import RATE, StreamingTranscriber, Transcriber
+
+from .standin import VOCAB, StandInServer, speak_words
+
+SCRIPT = (VOCAB[:8], VOCAB[8:] + VOCAB[:6])
+PAUSE_SECONDS = 2.5
+
+
+def build_source() -> tuple[bytes, list[int]]:
+    """Audio for the whole script and the sample where each utterance ends"""
+    silence = np.zeros(int(PAUSE_SECONDS * RATE), dtype=np.int16)
+    parts: list[np.ndarray] = [silence[: RATE // 2]]
+    ends: list[int] = []
+    for words in SCRIPT:
+        parts.append(speak_words(words, RATE))
+        ends.append(sum(len(p) for p in parts))
+        parts.append(silence)
+    return np.concatenate(parts).tobytes(), ends
+
+
+def measure(transcriber: Transcriber, client: OpenAI) -> list[tuple[str, float]]:
+    source, ends = build_source()
+    devices = AudioDeviceManager(FakeAudioBackend(source, realtime=True))
+    spoken_at: list[float] = []
+
+    def stream() -> tp.Generator[bytes, None, None]:
+        position = 0
+        for chunk in Recorder(devices=devices).run():
+            position += CHUNK
+            while len(spoken_at) < len(ends) and position >= ends[len(spoken_at)]:
+                spoken_at.append(time.perf_counter())
+            yield chunk
+            if position >= len(source) // 2:
+                return
+
+    results: list[tuple[str, float]] = []
+    for text in transcriber.run(stream=stream(), client=client):
+        results.append((text, time.perf_counter() - spoken_at[len(results)]))
+        if len(results) == len(SCRIPT):
+            break
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stt-latency", type=float, default=0.25)
+    parser.add_argument("--stt-per-second", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with StandInServer(
+        stt_latency=args.stt_latency, stt_per_second=args.stt_per_second
+    ) as server:
+        client = OpenAI(base_url=server.base_url, api_key="stand-in")
+        mismatches = 0
+        for name, transcriber in (
+            ("whole utterance", Transcriber()),
+            ("streaming", StreamingTranscriber()),
+        ):
+            print(f"== {name} (silence timeout {transcriber.silence_timeout}s)")
+            for (text, latency), words in zip(measure(transcriber, client), SCRIPT):
+                matched = text.split() == list(words)
+                mismatches += not matched
+                status = "ok" if matched else f"MISMATCH: {text}"
+                print(
+                    f"  {len(words):3d} words  end of speech -> final text "
+                    f"{latency:.3f}s (after endpoint "
+                    f"{latency - transcriber.silence_timeout:.3f}s)  {status}"
+                )
+            transcriber.close()
+    if mismatches:
+        sys.exit(f"{mismatches} transcripts did not match what was said")
+
+
+if __name__ == "__main__":
+    main()
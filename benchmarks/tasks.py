@@ -0,0 +1,96 @@
+# benchmarks/tasks.py
+"""Wall-clock vs serial time for system_task steps on the worker pool.
+
+Each step is a real shell command that sleeps, so the gain from running
+independent steps concurrently is visible. Every scenario also checks that no
+step started before the steps it depends on finished.
+
+Run with `python -m benchmarks.tasks [--step-seconds 0.3]`.
+"""
+import argparse
+import time
+
+from src.tasks import TaskRunner, TaskStep, plan_steps
+from src.terminal import Terminal
+from src.typedefs import JSON
+
+
+def scenarios(seconds: float) -> list[tuple[str, list[JSON]]]:
+    def step(name: str, **options: object) -> JSON:
+        return {"command": f"sleep {seconds} && echo {name}", **options}
+
+    return [
+        ("serial (no hints)", [step(f"pkg{i}") for i in range(4)]),
+        ("4 parallel installs", [step(f"pkg{i}", parallel=True) for i in range(4)]),
+        (
+            "clone 3 repos, then build",
+            [
+                step("clone-a", parallel=True),
+                step("clone-b", parallel=True),
+                step("clone-c", parallel=True),
+                step("build", depends_on=[1, 2, 3]),
+            ],
+        ),
+        (
+            "cd is a barrier",
+            [
+                step("a", parallel=True),
+                step("b", parallel=True),
+                {"command": "cd /tmp"},
+                step("c", parallel=True),
+                step("d", parallel=True),
+            ],
+        ),
+        (
+            "failure stops the task",
+            [
+                step("a", parallel=True),
+                {"command": "false", "parallel": True},
+                step("c", depends_on=[1]),
+                step("d", depends_on=[3]),
+            ],
+        ),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--step-seconds", type=float, default=0.3)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    terminal = Terminal()
+    for name, commands in scenarios(args.step_seconds):
+        started: dict[int, float] = {}
+        ended: dict[int, float] = {}
+
+        def on_start(step: TaskStep):
+            started[step.number] = time.perf_counter()
+
+        def on_finish(step: TaskStep):
+            ended[step.number] = time.perf_counter()
+
+        runner = TaskRunner(
+            lambda command: terminal.run(content=command),
+            max_workers=args.workers,
+            on_start=on_start,
+            on_finish=on_finish,
+        )
+        steps = runner.run(plan_steps(commands))
+        ordered = all(
+            ended[dep] <= started[step.number]
+            for step in steps
+            if step.number in started
+            for dep in step.depends_on
+        )
+        serial = runner.serial_seconds(steps)
+        statuses = " ".join(step.status for step in steps)
+        print(
+            f"{name:<26} wall {runner.wall_seconds:5.2f}s  serial {serial:5.2f}s  "
+            f"{serial / runner.wall_seconds:4.1f}x  "
+            f"{'ordered' if ordered else 'ORDER VIOLATED'}  [{statuses}]"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/terminal.py
+"""Streaming command output vs capturing it all with `subprocess.run`.
+
+Reports:
+- the time until a slow command's first line reaches the caller;
+- the peak memory of a process that runs a command printing a lot of output;
+- how long `cancel` takes to stop a command that would otherwise keep going.
+
+Run with `python -m benchmarks.terminal [--megabytes 200]`.
+"""
+import argparse
+import subprocess
+import sys
+import threading
+import time
+
+from src.terminal import Terminal
+
+SLOW = "for i in 1 2 3 4 5; do echo line $i; sleep 0.2; done"
+
+
+def flood(megabytes: int) -> str:
+    return f"yes 'some build log line' | head -c {megabytes * 1024 * 1024}"
+
+
+def legacy(command: str) -> str:
+    """What `Terminal.execute_command` did before streaming"""
+    result = subprocess.run(
+        command, shell=True, capture_output=True, text=True, timeout=60
+    )
+    return result.stdout
+
+
+def first_line_seconds(streaming: bool) -> float:
+    start = time.perf_counter()
+    if not streaming:
+        legacy(SLOW)
+        return time.perf_counter() - start
+    for _ in Terminal().stream_command(SLOW):
+        return time.perf_counter() - start
+    return float("nan")
+
+
+def peak_rss_mb(mode: str, megabytes: int) -> float:
+    """Peak RSS of a fresh interpreter running the flood command"""
+    code = (
+        "import resource, sys\n"
+        "from benchmarks.terminal import flood, legacy\n"
+        "from src.terminal import Terminal\n"
+        f"command = flood({megabytes})\n"
+        f"if {mode == 'stream'}:\n"
+        "    Terminal().execute_command(command)\n"
+        "else:\n"
+        "    legacy(command)\n"
+        "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return int(output.split()[-1]) / 1024
+
+
+def cancel_seconds(delay: float) -> float:
+    stream = Terminal().stream_command("sleep 30")
+    threading.Timer(delay, stream.cancel).start()
+    start = time.perf_counter()
+    for _ in stream:
+        pass
+    return time.perf_counter() - start - delay
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--megabytes", type=int, default=200)
+    args = parser.parse_args()
+
+    print(
+        f"first line of a 1 s command: run {first_line_seconds(False):.2f}s, "
+        f"stream {first_line_seconds(True):.2f}s"
+    )
+    print(
+        f"peak RSS with {args.megabytes} MB of output: "
+        f"run {peak_rss_mb('legacy', args.megabytes):.0f} MB, "
+        f"stream {peak_rss_mb('stream', args.megabytes):.0f} MB"
+    )
+    result = Terminal().execute_command(flood(args.megabytes))
+    print(f"streamed result keeps {len(result['output'])} characters of output")
+    print(f"cancel stops `sleep 30` within {cancel_seconds(0.3) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
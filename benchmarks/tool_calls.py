@@ -0,0 +1,151 @@
+# benchmarks/tool_calls.py
+"""Replays fragmented tool-call streams from the stand-in server.
+
+For each scenario the chatbot must run every call exactly once, send the
+results back as `tool` messages answering the right call ids, and start
+running a call before the model has finished streaming when later fragments
+follow it. The per-delta parsing the chatbot used before is shown for
+comparison.
+
+Run with `python -m benchmarks.tool_calls [--chunk-delay 0.02]`.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import typing as tp
+
+from src.typedefs import JSON
+
+from .standin import StandInServer, text_deltas, tool_call_deltas
+
+ECHO = "system_action"
+TASK = "system_task"
+
+
+def action(word: str) -> tuple[str, JSON]:
+    return ECHO, {"command": f"echo {word}", "explanation": "benchmark"}
+
+
+SCENARIOS: list[tuple[str, list[tuple[str, JSON]], JSON]] = [
+    ("one call, 1-char fragments", [action("uno")], {"fragment": 1}),
+    (
+        "two calls, interleaved",
+        [action("uno"), action("dos")],
+        {"fragment": 3, "interleave": True},
+    ),
+    (
+        "three calls in sequence",
+        [action("uno"), action("dos"), action("tres")],
+        {"fragment": 5},
+    ),
+    ("whole call, no index", [action("uno")], {"fragment": None, "with_index": False}),
+    (
+        "multi-step task",
+        [
+            (
+                TASK,
+                {
+                    "task_name": "demo",
+                    "commands": [
+                        {"command": "echo uno", "description": "one"},
+                        {"command": "echo dos", "description": "two"},
+                    ],
+                },
+            ),
+            action("tres"),
+        ],
+        {"fragment": 6},
+    ),
+]
+
+
+def legacy_executed(deltas: list[JSON]) -> int:
+    """Calls the old per-delta `json.loads` would have run"""
+    executed = 0
+    for delta in deltas:
+        for call in delta.get("tool_calls", []):
+            function = call.get("function", {})
+            if function.get("name") and function.get("arguments"):
+                try:
+                    json.loads(function["arguments"])
+                    executed += 1
+                except json.JSONDecodeError:
+                    pass
+    return executed
+
+
+def run_scenario(
+    server: StandInServer,
+    client: tp.Any,
+    calls: list[tuple[str, JSON]],
+    options: JSON,
+) -> tuple[str, float]:
+    from src.chatbot import ChatBot
+
+    started: list[tuple[float, JSON]] = []
+
+    class RecordingChatBot(ChatBot):
+        def _execute(self, call: tp.Any) -> tuple[str, str]:
+            started.append((time.perf_counter(), call.parsed))
+            return super()._execute(call)
+
+    deltas = tool_call_deltas(calls, **options)
+    server.chat_replies.extend([deltas, text_deltas("Hecho.")])
+    server.chat_requests.clear()
+    server.stream_ends.clear()
+
+    chatbot = RecordingChatBot()
+    reply = " ".join(chatbot.run(content="haz la prueba", client=client))
+
+    problems: list[str] = []
+    if [parsed for _, parsed in started] != [arguments for _, arguments in calls]:
+        problems.append(f"ran {[parsed for _, parsed in started]}")
+    if len(server.chat_requests) != 2:
+        problems.append(f"{len(server.chat_requests)} chat requests")
+    else:
+        sent = server.chat_requests[1]["messages"]
+        ids = [c["id"] for m in sent if m.get("tool_calls") for c in m["tool_calls"]]
+        answered = [m["tool_call_id"] for m in sent if m["role"] == "tool"]
+        if not ids or ids != answered:
+            problems.append(f"tool calls {ids} answered by {answered}")
+    if reply.strip() != "Hecho.":
+        problems.append(f"reply {reply!r}")
+
+    lead = server.stream_ends[0] - started[0][0] if started else 0.0
+    status = "ok" if not problems else "FAIL: " + "; ".join(problems)
+    before = f"{legacy_executed(deltas)}/{len(calls)}"
+    return f"{status:<6} (per-delta parsing ran {before})", lead
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunk-delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    from openai import OpenAI
+
+    from src.logger import console
+
+    console.quiet = True
+    # Keep the context and history the chatbot writes out of the real home
+    os.environ["HOME"] = tempfile.mkdtemp()
+
+    with StandInServer(chunk_delay=args.chunk_delay) as server:
+        client = OpenAI(base_url=server.base_url, api_key="stand-in")
+        failed = 0
+        for name, calls, options in SCENARIOS:
+            status, lead = run_scenario(server, client, calls, options)
+            failed += not status.startswith("ok")
+            print(
+                f"{name:<28} {status}  first call started "
+                f"{lead * 1000:6.1f} ms before the stream ended"
+            )
+    if failed:
+        sys.exit(f"{failed} of {len(SCENARIOS)} scenarios failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/tracing.py
+"""Cost of recording spans, and a sample trace of simulated voice turns.
+
+Times `span`, `mark` and `mark_once` against an empty loop. Then it plays a
+few turns with sleeps standing in for STT, the LLM, tool calls, TTS and
+playback on the threads that run them for real, prints the per-stage p50/p95
+table shown at shutdown and exports the JSONL and Chrome trace files.
+
+Run with `python -m benchmarks.tracing [--spans 200000] [--turns 20]`.
+Open the `.json` file in chrome://tracing or https://ui.perfetto.dev.
+"""
+import argparse
+import json
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from src.tracing import Tracer
+
+
+def overhead(count: int) -> list[tuple[str, float]]:
+    """Nanoseconds per call, net of the loop itself"""
+    tracer = Tracer(max_spans=count)
+    start = time.perf_counter_ns()
+    for _ in range(count):
+        pass
+    empty = time.perf_counter_ns() - start
+
+    rows = []
+    start = time.perf_counter_ns()
+    for _ in range(count):
+        with tracer.span("stage"):
+            pass
+    rows.append(("span", time.perf_counter_ns() - start))
+    start = time.perf_counter_ns()
+    for _ in range(count):
+        tracer.mark("point")
+    rows.append(("mark", time.perf_counter_ns() - start))
+    start = time.perf_counter_ns()
+    for _ in range(count):
+        tracer.mark_once("point")
+    rows.append(("mark_once (repeat)", time.perf_counter_ns() - start))
+    return [(name, (elapsed - empty) / count) for name, elapsed in rows]
+
+
+def turn(tracer: Tracer, rng: random.Random):
+    """One simulated turn, shaped like the real pipeline"""
+    tracer.new_turn()
+    tracer.mark("speech.end", seconds=rng.uniform(1, 4))
+    with tracer.span("stt.encode"):
+        time.sleep(0.002)
+    with tracer.span("stt.request", bytes=48000):
+        time.sleep(rng.uniform(0.15, 0.4))
+    tracer.mark("stt.done")
+
+    def tool():
+        with tracer.span("tool.system_action"):
+            time.sleep(rng.uniform(0.01, 0.08))
+
+    def speak(sentences: int):
+        for _ in range(sentences):
+            start = time.perf_counter_ns()
+            time.sleep(rng.uniform(0.05, 0.12))
+            tracer.mark_once("tts.first_byte", source="api")
+            tracer.record("tts.request", start, time.perf_counter_ns(), chars=60)
+        tracer.mark_once("playback.start")
+        with tracer.span("playback"):
+            time.sleep(0.05)
+        tracer.mark("playback.end")
+
+    with tracer.span("llm.request"):
+        time.sleep(rng.uniform(0.2, 0.5))
+        tracer.mark_once("llm.first_token")
+        tools = threading.Thread(target=tool, name="tools")
+        tools.start()
+        speaker = threading.Thread(target=speak, args=(3,), name="tts")
+        speaker.start()
+        time.sleep(0.05)
+    tools.join()
+    speaker.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--spans", type=int, default=200_000)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args()
+
+    for name, ns in overhead(args.spans):
+        print(f"{name:<20} {ns:8.0f} ns per call")
+
+    tracer = Tracer()
+    rng = random.Random(0)
+    for _ in range(args.turns):
+        turn(tracer, rng)
+
+    print(f"\n{'stage':<32} {'count':>5} {'p50 ms':>9} {'p95 ms':>9}")
+    for stage, count, p50, p95 in tracer.summary():
+        print(f"{stage:<32} {count:>5} {p50:>9.1f} {p95:>9.1f}")
+
+    out = args.out or Path(tempfile.mkdtemp())
+    jsonl, chrome = tracer.export(out)
+    events = json.loads(chrome.read_text())["traceEvents"]
+    lines = len(jsonl.read_text().splitlines())
+    print(f"\n{jsonl} ({lines} spans)\n{chrome} ({len(events)} trace events)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/upload.py
+"""Bytes per utterance and encode time for the STT upload formats.
+
+Run with `python -m benchmarks.upload [--seconds 8]`.
+"""
+import argparse
+import io
+import time
+import typing as tp
+
+import numpy as np
+
+from src.transcriber import RATE, Transcriber
+
+from .vad import synthetic_clip
+
+
+def legacy_wav(samples: np.ndarray) -> bytes:
+    """The previous path: a 44.1 kHz WAV exported through pydub"""
+    from pydub import AudioSegment  # type: ignore
+
+    segment = AudioSegment(
+        samples.tobytes(), frame_rate=RATE, sample_width=2, channels=1
+    )
+    buffer = io.BytesIO()
+    segment.export(buffer, format="wav")  # type: ignore
+    buffer.seek(0)
+    return buffer.read()
+
+
+def timed(encode: tp.Callable[[], bytes], repeat: int) -> tuple[int, float]:
+    size = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        size = len(encode())
+    return size, (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=8.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for snr in (30.0, 10.0):
+        audio, _ = synthetic_clip(0, snr, pauses=(0.4,) * int(args.seconds))
+        audio = audio[: int(args.seconds * RATE)]
+        print(f"== {len(audio) / RATE:.1f}s utterance at {snr:.0f} dB SNR")
+        variants: list[tuple[str, tp.Callable[[], bytes]]] = [
+            ("44.1 kHz WAV (pydub)", lambda: legacy_wav(audio))
+        ]
+        for upload_format in ("wav", "flac"):
+            transcriber = Transcriber(upload_format=upload_format)
+            variants.append(
+                (
+                    f"16 kHz {upload_format.upper()}",
+                    lambda t=transcriber: t.encode(audio, RATE)[1],
+                )
+            )
+        baseline = None
+        for name, encode in variants:
+            try:
+                size, encode_ms = timed(encode, args.repeat)
+            except ImportError as e:
+                print(f"  {name:<22} skipped ({e})")
+                continue
+            baseline = baseline or size
+            print(
+                f"  {name:<22} {size:9d} bytes  {baseline / size:5.1f}x smaller  "
+                f"encode {encode_ms:7.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
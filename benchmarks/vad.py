@@ -0,0 +1,153 @@
+# benchmarks/vad.py
+"""Offline accuracy and detection latency for the voice activity detectors.
+
+Synthetic clips (harmonic "voiced" syllables, noise fricatives and pauses over
+white noise and mains hum at several SNRs) are generated on the fly. Recorded
+clips can be added with `--wav-dir`: every `name.wav` (16-bit mono) needs a
+`name.json` next to it holding `{"speech": [[start_s, end_s], ...]}`.
+
+Run with `python -m benchmarks.vad [--wav-dir DIR] [--write-synthetic DIR]`.
+"""
+import argparse
+import json
+import wave
+from pathlib import Path
+
+import numpy as np
+
+from src.transcriber import RATE
+from src.vad import EnergyVAD, SpectralVAD, VoiceActivityDetector
+
+CHUNK = 2048
+
+
+def _voiced(rng: np.random.Generator, seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * RATE)) / RATE
+    f0 = rng.uniform(100, 220) * (1 + 0.05 * np.sin(2 * np.pi * 3 * t))
+    phase = 2 * np.pi * np.cumsum(f0) / RATE
+    signal = sum(np.sin(k * phase) / k for k in range(1, 12))
+    envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t) ** 2
+    return signal * envelope
+
+
+def _fricative(rng: np.random.Generator, seconds: float) -> np.ndarray:
+    noise = rng.standard_normal(int(seconds * RATE))
+    return np.diff(noise, prepend=0.0) * 0.5  # crude high-pass
+
+
+def synthetic_clip(
+    seed: int, snr_db: float, pauses: tuple[float, ...] = (0.4, 0.7)
+) -> tuple[np.ndarray, list[tuple[float, float]]]:
+    """Leading silence, speech runs split by `pauses`, then trailing silence"""
+    rng = np.random.default_rng(seed)
+    parts: list[np.ndarray] = [np.zeros(int(1.0 * RATE))]
+    speech: list[tuple[float, float]] = []
+    cursor = 1.0
+    for pause in (*pauses, None):
+        run = np.concatenate(
+            [_voiced(rng, rng.uniform(0.3, 0.8)), _fricative(rng, 0.12)]
+        )
+        run = run / np.max(np.abs(run)) * 0.3
+        speech.append((cursor, cursor + len(run) / RATE))
+        cursor += len(run) / RATE
+        parts.append(run)
+        if pause is not None:
+            parts.append(np.zeros(int(pause * RATE)))
+            cursor += pause
+    parts.append(np.zeros(int(2.0 * RATE)))
+    clean = np.concatenate(parts)
+
+    t = np.arange(len(clean)) / RATE
+    speech_power = np.mean(np.square(np.concatenate(parts[1:-1:2])))
+    noise_rms = np.sqrt(speech_power / 10 ** (snr_db / 10))
+    noise = rng.standard_normal(len(clean)) * noise_rms
+    noise += 0.3 * noise_rms * np.sin(2 * np.pi * 50 * t)
+    audio = np.clip(clean + noise, -1, 1)
+    return (audio * 32767).astype(np.int16), speech
+
+
+def load_recorded(wav_dir: Path) -> list[tuple[str, np.ndarray, list]]:
+    clips = []
+    for path in sorted(wav_dir.glob("*.wav")):
+        with wave.open(str(path), "rb") as wav:
+            if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+                print(f"skipping {path.name}: expected 16-bit mono")
+                continue
+            if wav.getframerate() != RATE:
+                print(f"skipping {path.name}: expected {RATE} Hz")
+                continue
+            audio = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        labels = json.loads(path.with_suffix(".json").read_text())["speech"]
+        clips.append((path.name, audio, [tuple(span) for span in labels]))
+    return clips
+
+
+def write_wav(path: Path, audio: np.ndarray, speech: list):
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes(audio.tobytes())
+    path.with_suffix(".json").write_text(json.dumps({"speech": speech}))
+
+
+def evaluate(vad: VoiceActivityDetector, audio: np.ndarray, speech: list) -> dict:
+    flags = np.concatenate(
+        [vad.process(audio[i : i + CHUNK]) for i in range(0, len(audio), CHUNK)]
+    )
+    frame_s = vad.frame_length / RATE
+    centers = (np.arange(len(flags)) + 0.5) * frame_s
+    truth = np.zeros(len(flags), dtype=bool)
+    for start, end in speech:
+        truth |= (centers >= start) & (centers < end)
+
+    detected = np.flatnonzero(flags)
+    onset = end_of_speech = float("nan")
+    longest_gap = 0.0
+    if len(detected):
+        onset = detected[0] * frame_s - speech[0][0]
+        end_of_speech = (detected[-1] + 1) * frame_s - speech[-1][1]
+        longest_gap = float(np.max(np.diff(detected), initial=1) - 1) * frame_s
+    return {
+        "accuracy": float(np.mean(flags == truth)),
+        "recall": float(np.mean(flags[truth])) if truth.any() else 1.0,
+        "false_alarm": float(np.mean(flags[~truth])) if (~truth).any() else 0.0,
+        "onset_s": onset,
+        "end_s": end_of_speech,
+        "longest_pause_s": longest_gap,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--wav-dir", type=Path)
+    parser.add_argument("--write-synthetic", type=Path)
+    parser.add_argument("--silence-timeout", type=float, default=1.2)
+    args = parser.parse_args()
+
+    clips = []
+    for seed, snr in enumerate((30.0, 20.0, 10.0, 5.0)):
+        audio, speech = synthetic_clip(seed, snr)
+        name = f"synthetic_{snr:.0f}dB"
+        clips.append((name, audio, speech))
+        if args.write_synthetic:
+            args.write_synthetic.mkdir(parents=True, exist_ok=True)
+            write_wav(args.write_synthetic / f"{name}.wav", audio, speech)
+    if args.wav_dir:
+        clips += load_recorded(args.wav_dir)
+
+    for name, make_vad in (("EnergyVAD", EnergyVAD), ("SpectralVAD", SpectralVAD)):
+        print(f"== {name}")
+        for clip, audio, speech in clips:
+            r = evaluate(make_vad(rate=RATE), audio, speech)
+            split = " SPLIT" if r["longest_pause_s"] >= args.silence_timeout else ""
+            print(
+                f"  {clip:<22} acc {r['accuracy']:.3f}  recall {r['recall']:.3f}  "
+                f"false alarm {r['false_alarm']:.3f}  onset {r['onset_s']:+.3f}s  "
+                f"end {r['end_s']:+.3f}s  "
+                f"endpoint after {r['end_s'] + args.silence_timeout:.2f}s{split}"
+            )
+
+
+if __name__ == "__main__":
+    main()
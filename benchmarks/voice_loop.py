@@ -0,0 +1,307 @@
+# benchmarks/voice_loop.py
+"""End-to-end latency of the voice loop, offline.
+
+Replays a WAV file through a fake microphone into the same recorder,
+transcriber, chatbot, speaker and `src.respond` the app uses, against a
+stand-in STT/LLM/TTS server running in its own process, with the latency and
+jitter of each service set on the command line. By default the WAV holds a
+scripted conversation in the stand-in's tone words, and some turns make the
+model call tools, which really run.
+
+Per-stage latencies come from the tracer. End-to-end latencies run from the
+sample where the user stopped speaking in the WAV to the start and the end of
+the reply's playback. Also reported are the CPU time and peak RSS of this
+process (the server's are not counted). `--json` writes the results with the
+commit they were measured at, and `--compare` prints the changes from such a
+file, to spot regressions across commits.
+
+Run with `python -m benchmarks.voice_loop [--turns 6] [--json out.json]`.
+"""
+import argparse
+import contextlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import typing as tp
+import wave
+from pathlib import Path
+
+import numpy as np
+
+from src import respond
+from src.chatbot import ChatBot
+from src.clients import LazyClient
+from src.devices import AudioDeviceManager, FakeAudioBackend
+from src.encoding import resample
+from src.logger import StatusLogger, configure_logging
+from src.recorder import CHUNK, Recorder
+from src.speaker import Speaker
+from src.tracing import percentile, tracer
+from src.transcriber import RATE, StreamingTranscriber, Transcriber
+from src.typedefs import JSON
+
+from .standin import StandInProcess, speak_words, text_deltas, tool_call_deltas
+
+PAUSE_SECONDS = 2.5
+QUIET_SECONDS = 0.5  # silence that ends an utterance when finding them in a WAV
+
+# (words said, replies to the chat requests the turn makes)
+SCRIPT: list[tuple[str, list[list[JSON]]]] = [
+    (
+        "abre la carpeta de proyectos",
+        [text_deltas("Claro. Abro la carpeta de proyectos ahora mismo.")],
+    ),
+    (
+        "muestra archivos que cambiaron hoy",
+        [
+            text_deltas("Voy a revisar los archivos.")
+            + tool_call_deltas(
+                [("system_action", {"command": "ls -la", "explanation": "Archivos"})]
+            ),
+            text_deltas("Hay varios archivos nuevos. El más reciente es de hoy."),
+        ],
+    ),
+    (
+        "ejecuta pruebas dime cuantas fallaron",
+        [
+            tool_call_deltas(
+                [("system_action", {"command": "pwd", "explanation": "Carpeta"})]
+            ),
+            text_deltas("Ninguna prueba falló. Todo está en orden. ¿Algo más?"),
+        ],
+    ),
+]
+
+
+def write_script(path: Path, turns: int):
+    """A WAV of `turns` scripted utterances with pauses between them"""
+    silence = np.zeros(int(PAUSE_SECONDS * RATE), dtype=np.int16)
+    parts = [silence[: RATE // 2]]
+    for turn in range(turns):
+        parts += [speak_words(SCRIPT[turn % len(SCRIPT)][0].split(), RATE), silence]
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes(np.concatenate(parts).tobytes())
+
+
+def read_wav(path: Path) -> np.ndarray:
+    """Mono int16 samples at the recorder's rate"""
+    with wave.open(str(path), "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit WAV files are supported")
+        channels, rate = wav.getnchannels(), wav.getframerate()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return resample(samples, rate, RATE)
+
+
+def utterance_ends(samples: np.ndarray, threshold: float = 0.02) -> list[int]:
+    """Sample positions where speech is followed by `QUIET_SECONDS` of quiet"""
+    frame = RATE // 50
+    frames = samples[: len(samples) // frame * frame].reshape(-1, frame) / 32768.0
+    loud = np.sqrt(np.mean(np.square(frames), axis=1)) > threshold
+    quiet_frames = int(QUIET_SECONDS * 50)
+    ends: list[int] = []
+    last_loud, quiet = -1, 0
+    for i, is_loud in enumerate(loud):
+        if is_loud:
+            last_loud, quiet = i, 0
+        elif last_loud >= 0:
+            quiet += 1
+            if quiet == quiet_frames:
+                ends.append((last_loud + 1) * frame)
+                last_loud = -1
+    if last_loud >= 0:
+        ends.append((last_loud + 1) * frame)
+    return ends
+
+
+def replay(
+    devices: AudioDeviceManager, length: int, ends: list[int], stopped: list[int]
+) -> tp.Generator[bytes, None, None]:
+    """Microphone chunks, noting when each utterance's last sample is read"""
+    position = 0
+    for chunk in Recorder(devices=devices).run():
+        position += CHUNK
+        while len(stopped) < len(ends) and position >= ends[len(stopped)]:
+            stopped.append(time.perf_counter_ns())
+        yield chunk
+        if position >= length + 3 * RATE:
+            return
+
+
+def end_to_end(stopped: list[int]) -> dict[str, list[float]]:
+    """Milliseconds from the user stopping to playback start and end, per turn"""
+    first: dict[tuple[int, str], int] = {}
+    for span in list(tracer.spans):
+        first.setdefault((span.turn, span.name), span.start_ns)
+    times: dict[str, list[float]] = {"user stop → playback.start": []}
+    times["user stop → playback.end"] = []
+    for (turn, name), speech_end in first.items():
+        if name != "speech.end":
+            continue
+        before = [ns for ns in stopped if ns <= speech_end]
+        if not before:
+            continue
+        for milestone in ("playback.start", "playback.end"):
+            if (turn, milestone) in first:
+                elapsed = (first[turn, milestone] - before[-1]) / 1e6
+                times[f"user stop → {milestone}"].append(elapsed)
+    return times
+
+
+def stats(times: list[float]) -> JSON:
+    return {
+        "count": len(times),
+        "p50": round(percentile(times, 50), 2),
+        "p95": round(percentile(times, 95), 2),
+        "p99": round(percentile(times, 99), 2),
+    }
+
+
+def commit() -> str:
+    try:
+        head = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        return "unknown"
+    return f"{head}-dirty" if head and dirty else head or "unknown"
+
+
+def compare(results: JSON, baseline: JSON):
+    print(f"\nchange from {baseline['commit']} (positive is slower)")
+    for name, now in results["stages"].items():
+        before = baseline["stages"].get(name)
+        if before is None:
+            continue
+        print(
+            f"  {name:<32} p50 {now['p50'] - before['p50']:+9.1f} ms   "
+            f"p95 {now['p95'] - before['p95']:+9.1f} ms"
+        )
+    for key in ("cpu_seconds", "peak_rss_mb"):
+        print(f"  {key:<32} {results[key] - baseline[key]:+9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--wav", type=Path, help="Replay this WAV instead")
+    parser.add_argument("--stream-stt", action="store_true")
+    parser.add_argument("--sequential", action="store_true")
+    parser.add_argument("--stt-latency", type=float, default=0.25)
+    parser.add_argument("--stt-per-second", type=float, default=0.03)
+    parser.add_argument("--llm-latency", type=float, default=0.4)
+    parser.add_argument("--chunk-delay", type=float, default=0.01)
+    parser.add_argument("--tts-latency", type=float, default=0.2)
+    parser.add_argument("--tts-per-char", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="Write the results here")
+    parser.add_argument("--compare", type=Path, help="Results to compare against")
+    parser.add_argument("--verbose", action="store_true", help="Show the app's UI")
+    args = parser.parse_args()
+
+    path = args.wav
+    if path is None:
+        path = Path(tempfile.mkdtemp()) / "script.wav"
+        write_script(path, args.turns)
+    samples = read_wav(path)
+    ends = utterance_ends(samples)
+    turns = min(args.turns, len(ends))
+    # Tool turns make two chat requests; replies are served in request order
+    replies = [
+        reply for turn in range(turns) for reply in SCRIPT[turn % len(SCRIPT)][1]
+    ]
+
+    server = StandInProcess(
+        replies,
+        stt_latency=args.stt_latency,
+        stt_per_second=args.stt_per_second,
+        llm_latency=args.llm_latency,
+        chunk_delay=args.chunk_delay,
+        tts_latency=args.tts_latency,
+        tts_per_char=args.tts_per_char,
+        jitter=args.jitter,
+        seed=args.seed,
+        fallback_text="abre la carpeta de proyectos",
+    )
+    with server:
+        clients = [
+            LazyClient(base_url=server.base_url, api_key="stand-in") for _ in range(3)
+        ]
+        stt, llm, tts = clients
+        backend = FakeAudioBackend(samples.tobytes(), realtime=True)
+        devices = AudioDeviceManager(backend)
+        transcriber = StreamingTranscriber() if args.stream_stt else Transcriber()
+        chatbot = ChatBot()
+        speaker = Speaker(devices=devices)
+        configure_logging("rich" if args.verbose else "off")
+        logger = StatusLogger()
+        for client in clients:
+            client.get()  # the app builds these while the mic warms up
+
+        stopped: list[int] = []
+        done = 0
+        # Keep anything a dependency prints out of the report
+        output = contextlib.nullcontext() if args.verbose else open(os.devnull, "w")
+        wall, cpu = time.perf_counter(), time.process_time()
+        with output as sink, contextlib.redirect_stdout(sink or sys.stdout):
+            stream = replay(devices, len(samples), ends, stopped)
+            for text in transcriber.run(stream=stream, client=stt):
+                logger.transcription_complete(text)
+                respond(text, chatbot, speaker, llm, tts, logger, args.sequential)
+                backend.written.clear()
+                done += 1
+                if done == turns:
+                    break
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        transcriber.close()
+        logger.flush()
+
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    stages = {**tracer.stage_times(), **end_to_end(stopped)}
+    results: JSON = {
+        "commit": commit(),
+        "config": json.loads(json.dumps(vars(args), default=str)),
+        "turns": done,
+        "wall_seconds": round(wall, 3),
+        "cpu_seconds": round(cpu, 3),
+        "peak_rss_mb": round(peak_mb, 1),
+        "requests": server.requests,
+        "stages": {name: stats(times) for name, times in sorted(stages.items())},
+    }
+
+    print(f"{done} turns in {results['wall_seconds']}s at {results['commit']}")
+    print(f"\n{'stage':<36} {'count':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, row in results["stages"].items():
+        print(
+            f"{name:<36} {row['count']:>5} {row['p50']:>9.1f} "
+            f"{row['p95']:>9.1f} {row['p99']:>9.1f}"
+        )
+    print(
+        f"\nCPU {results['cpu_seconds']}s ({cpu / max(1, done) * 1000:.0f} ms per "
+        f"turn), peak RSS {results['peak_rss_mb']} MB, requests {server.requests}"
+    )
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+    if args.compare:
+        compare(results, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,227 @@
 # src/__init__.py
-import os
+import argparse
+import contextlib
+import time
+import typing as tp
+from pathlib import Path
 
-from openai import OpenAI
+from .startup import profile, warm_up
 
-from .chatbot import ChatBot
-from .logger import StatusLogger
-from .recorder import Recorder
-from .speaker import Speaker
-from .transcriber import Transcriber
+with profile.measure("import", "src.logger"):
+    from .logger import StatusLogger, configure_logging, get_sink
+with profile.measure("import", "src.recorder"):
+    from .recorder import Recorder
+with profile.measure("import", "src.transcriber"):
+    from .transcriber import StreamingTranscriber, Transcriber
+with profile.measure("import", "src.chatbot"):
+    from .chatbot import ChatBot, iterm
+with profile.measure("import", "src.speaker"):
+    from .speaker import Speaker
 
+from .bargein import BargeIn
+from .clients import LazyClient, build_clients, get_client_pool
+from .context import get_system_context
+from .devices import get_device_manager
+from .pipeline import SpeechPipeline
+from .speechcache import SpeechCache
+from .tracing import tracer
 
-def main():
-    stt = OpenAI(
-        base_url="https://api.groq.com/openai/v1", api_key=os.environ["GROQ_API_KEY"]
+
+def parse_args(argv: tp.Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="llmos", description="llmOS - Voice Operating System"
+    )
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="Report the import and init cost of each component, then exit",
+    )
+    parser.add_argument(
+        "--sequential",
+        action="store_true",
+        help="Speak the whole response after generation instead of per sentence",
+    )
+    parser.add_argument(
+        "--stream-stt",
+        action="store_true",
+        help="Transcribe windows of the utterance while the user is still speaking",
+    )
+    parser.add_argument(
+        "--callback-capture",
+        action="store_true",
+        help="Capture audio continuously into a ring buffer, even mid-reply",
+    )
+    parser.add_argument(
+        "--barge-in",
+        action="store_true",
+        help="Stop the reply when the user talks over it (implies --callback-capture)",
+    )
+    parser.add_argument(
+        "--persistent-shell",
+        action="store_true",
+        help="Run commands in one long-lived shell that keeps exports and aliases",
+    )
+    parser.add_argument(
+        "--cache-commands",
+        action="store_true",
+        help="Reuse results of read-only commands until what they read changes",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        metavar="DIR",
+        help="Write per-turn latency spans as JSONL and a Chrome trace at exit",
+    )
+    parser.add_argument(
+        "--log",
+        choices=("rich", "jsonl", "off"),
+        default="rich",
+        help="Draw the terminal UI, write JSON lines, or log nothing",
+    )
+    parser.add_argument(
+        "--log-file",
+        metavar="FILE",
+        help="Append --log jsonl events to this file instead of stdout",
+    )
+    parser.add_argument(
+        "--tts-warmup",
+        type=Path,
+        metavar="FILE",
+        help="Phrases (one per line) to synthesize into the TTS cache at startup",
+    )
+    return parser.parse_args(argv)
+
+
+def respond(
+    text: str,
+    chatbot: ChatBot,
+    speaker: Speaker,
+    llm: LazyClient,
+    tts: LazyClient,
+    logger: StatusLogger,
+    sequential: bool = False,
+    barge_in: tp.Optional[BargeIn] = None,
+):
+    """Answer one transcribed utterance out loud.
+
+    With `barge_in`, the user speaking over the reply stops playback and
+    cancels generation and synthesis; the loop then hears what they said.
+    """
+    chatbot.cancelled.clear()
+    speaker.interrupted.clear()
+    watch = (
+        barge_in.watch(speaker.interrupt, chatbot.cancel, logger.barge_in)
+        if barge_in is not None
+        else contextlib.nullcontext()
     )
-    llm = OpenAI()
-    tts = OpenAI(base_url="https://api.oscarbahamonde.cloud/v1")
+    with watch:
+        if sequential:
+            _respond_sequential(text, chatbot, speaker, llm, tts, logger)
+            return
+
+        # Each sentence is synthesized and played as soon as it is
+        # complete, overlapping with generation of the next ones
+        full_response = ""
+        with SpeechPipeline(
+            speaker, tts, on_first_audio=logger.playing_audio
+        ) as pipeline:
+            with logger.generating_text():
+                for content in chatbot.run(content=text, client=llm):
+                    full_response += content + " "
+                    pipeline.put(content)
+            logger.text_complete(full_response)
+    if full_response.strip() and not speaker.interrupted.is_set():
+        logger.audio_complete()
+
+
+def _respond_sequential(
+    text: str,
+    chatbot: ChatBot,
+    speaker: Speaker,
+    llm: LazyClient,
+    tts: LazyClient,
+    logger: StatusLogger,
+):
+    # LLM generation
+    full_response = ""
+    with logger.generating_text():
+        for content in chatbot.run(content=text, client=llm):
+            full_response += content + " "
+
+    logger.text_complete(full_response)
+
+    if full_response.strip():
+        # TTS generation and playback
+        started = 0
+        with logger.generating_speech():
+            for i, audio_data in enumerate(
+                speaker.run(content=full_response.strip(), client=tts)
+            ):
+                if i == 0:
+                    started = time.perf_counter_ns()
+                    tracer.mark_once("playback.start")
+                    logger.playing_audio()
+                speaker.play_audio(audio_data=audio_data)
+        if started:
+            tracer.record("playback", started, time.perf_counter_ns())
+            tracer.mark("playback.end")
+        if not speaker.interrupted.is_set():
+            logger.audio_complete()
+
+
+def main(argv: tp.Optional[list[str]] = None):
+    args = parse_args(argv)
+    stt, llm, tts = build_clients()
 
+    configure_logging(args.log, args.log_file)
     logger = StatusLogger()
     logger.system_startup()
 
-    recorder = Recorder()
-    transcriber = Transcriber()
-    chatbot = ChatBot()
-    speaker = Speaker()
+    devices = get_device_manager()
+    with profile.measure("init", "Recorder"):
+        recorder = Recorder(
+            devices=devices, callback=args.callback_capture or args.barge_in
+        )
+        barge_in = BargeIn(recorder) if args.barge_in else None
+    with profile.measure("init", "Transcriber"):
+        transcriber = StreamingTranscriber() if args.stream_stt else Transcriber()
+    with profile.measure("init", "ChatBot"):
+        chatbot = ChatBot(
+            persistent_shell=args.persistent_shell,
+            cache_commands=args.cache_commands,
+        )
+    with profile.measure("init", "Speaker"):
+        speech_cache = SpeechCache()
+        speaker = Speaker(devices=devices, cache=speech_cache)
+
+    def warm_speech_cache():
+        if args.tts_warmup:
+            for phrase in args.tts_warmup.read_text().splitlines():
+                if phrase.strip():
+                    speaker.prefetch(content=phrase, client=tts)
+
+    # Heavy modules, clients and state load while the mic is already live
+    warm = warm_up(
+        [
+            ("SystemContext", get_system_context),
+            ("STT client", stt.warm),
+            ("LLM client", llm.warm),
+            ("TTS client", tts.warm),
+            ("Audio output", speaker.output_stream),
+            ("TTS warm-up", warm_speech_cache),
+        ]
+    )
+
+    if args.startup_profile:
+        stream = recorder.run()
+        with profile.measure("init", "Mic stream"):
+            next(stream)
+        ready = profile.since_start()
+        stream.close()
+        warm.join()
+        logger.startup_profile(profile.rows, ready)
+        get_sink().close()
+        return
 
     while True:
         try:
@@ -34,32 +232,40 @@ def main():
                 if not chunk.strip():
                     continue
 
-                # Transcription step
-                with logger.transcribing():
-                    pass  # spinner just for effect before printing transcription
-
                 logger.transcription_complete(chunk)
 
-                # LLM generation
-                full_response = ""
-                with logger.generating_text():
-                    for content in chatbot.run(content=chunk, client=llm):
-                        full_response += content + " "
-
-                logger.text_complete(full_response)
-
-                if full_response.strip():
-                    # TTS generation and playback
-                    with logger.generating_speech():
-                        for audio_data in speaker.run(
-                            content=full_response.strip(), client=tts
-                        ):
-                            speaker.play_audio(audio_data=audio_data)
-                            logger.playing_audio()
-                    logger.audio_complete()
+                respond(
+                    chunk,
+                    chatbot,
+                    speaker,
+                    llm,
+                    tts,
+                    logger,
+                    args.sequential,
+                    barge_in,
+                )
 
         except KeyboardInterrupt:
             logger.info("Shutting down llmOS...")
+            logger.info(f"Audio devices: {devices.stats()}")
+            if recorder.callback:
+                logger.info(f"Audio capture: {recorder.stats()}")
+            if barge_in is not None:
+                logger.info(f"Barge-in: {barge_in.stats()}")
+            logger.info(f"TTS cache: {speech_cache.stats()}")
+            logger.info(f"HTTP connections: {get_client_pool().stats()}")
+            logger.info(f"LLM context: {chatbot.window.stats()}")
+            if iterm.cache is not None:
+                logger.info(f"Command cache: {iterm.cache.stats()}")
+            logger.trace_summary(tracer.summary())
+            if args.trace:
+                paths = tracer.export(args.trace)
+                logger.info(f"Trace written to {', '.join(map(str, paths))}")
+            logger.info(f"Logging: {logger.stats()}")
+            get_sink().close()
+            get_client_pool().close()
+            transcriber.close()
+            devices.close()
             break
         except Exception as e:
             logger.error(f"System error: {str(e)}")
@@ -0,0 +1,119 @@
+# src/bargein.py
+import contextlib
+import threading
+import time
+import typing as tp
+
+from .buffers import RingCursor
+from .recorder import RATE, Recorder
+from .tracing import tracer
+from .vad import SpectralVAD, VoiceActivityDetector
+
+
+class BargeIn:
+    """Watches the microphone while a reply plays and cuts it off on speech.
+
+    A thread reads the ring through a cursor of its own and runs a VAD over
+    it. `min_speech` seconds of speech, with gaps up to `max_gap`, count as
+    the user taking the turn: every callback given to `watch` runs once, on
+    that thread. When the reply ends, the recorder's reader skips what was
+    captured meanwhile, keeping only the barge-in utterance (from `preroll`
+    seconds before its onset) for the transcriber.
+
+    Needs callback capture. Without echo cancellation the VAD can hear the
+    reply from loud speakers; its margin is set above the transcriber's, and
+    headphones avoid the problem.
+    """
+
+    def __init__(
+        self,
+        recorder: Recorder,
+        vad: tp.Optional[VoiceActivityDetector] = None,
+        min_speech: float = 0.25,
+        max_gap: float = 0.1,
+        preroll: float = 0.3,
+        poll: float = 0.01,
+    ):
+        self.recorder = recorder
+        self.vad = vad or SpectralVAD(rate=RATE, margin_db=8.0)
+        self.min_speech = int(min_speech * RATE)
+        self.max_gap = int(max_gap * RATE)
+        self.preroll = int(preroll * RATE)
+        self.poll = poll
+        self.triggered = threading.Event()
+        self.triggered_ns = 0
+        self.onset: tp.Optional[int] = None  # sequence number where speech began
+        self.count = 0
+        self.watches = 0
+
+    @contextlib.contextmanager
+    def watch(self, *callbacks: tp.Callable[[], None]) -> tp.Iterator["BargeIn"]:
+        """Listen for barge-in until the block exits"""
+        if not self.recorder.callback:
+            raise RuntimeError("barge-in needs callback capture")
+        if not hasattr(self.recorder, "state"):
+            self.recorder.start()
+        self.triggered.clear()
+        self.onset = None
+        # Fresh noise floor, and no samples carried over from the last reply
+        self.vad.reset()
+        self.watches += 1
+        cursor = self.recorder.ring.cursor()
+        done = threading.Event()
+        thread = threading.Thread(
+            target=self._listen,
+            args=(cursor, done, callbacks),
+            name="barge-in",
+            daemon=True,
+        )
+        thread.start()
+        try:
+            yield self
+        finally:
+            done.set()
+            thread.join()
+            # Reply-time audio is echo or silence, unless the user cut in
+            if self.triggered.is_set() and self.onset is not None:
+                self.recorder.skip_to(self.onset - self.preroll)
+            else:
+                self.recorder.skip_to(cursor.position)
+
+    def _listen(
+        self,
+        cursor: RingCursor,
+        done: threading.Event,
+        callbacks: tuple[tp.Callable[[], None], ...],
+    ):
+        frame = self.vad.frame_length
+        speech = gap = 0
+        while not done.is_set():
+            available = cursor.available()
+            if available < frame:
+                time.sleep(self.poll)
+                continue
+            # Frame i of this batch starts i frames after the carried samples
+            start = cursor.position - self.vad.carried
+            for i, is_speech in enumerate(self.vad.process(cursor.read(available))):
+                if is_speech:
+                    if self.onset is None:
+                        self.onset = start + i * frame
+                    speech += frame
+                    gap = 0
+                elif self.onset is not None:
+                    gap += frame
+                    if gap > self.max_gap:
+                        self.onset, speech, gap = None, 0, 0
+            if speech >= self.min_speech:
+                self._trigger(callbacks)
+                return
+
+    def _trigger(self, callbacks: tuple[tp.Callable[[], None], ...]):
+        self.triggered_ns = time.perf_counter_ns()
+        self.count += 1
+        tracer.mark("barge_in", onset=self.onset)
+        self.triggered.set()
+        for callback in callbacks:
+            callback()
+
+    def stats(self) -> dict[str, int]:
+        return {"replies": self.watches, "interrupted": self.count}
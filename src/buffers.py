@@ -0,0 +1,131 @@
+# src/buffers.py
+import typing as tp
+
+import numpy as np
+
+
+class UtteranceBuffer:
+    """Preallocated, growable int16 buffer that accumulates captured frames.
+
+    Appending copies each chunk once into spare capacity (doubling when full),
+    and clearing only rewinds the write position, so the same allocation is
+    reused turn after turn.
+    """
+
+    def __init__(self, rate: int = 44100, seconds: float = 30.0):
+        self.rate = rate
+        self._data = np.zeros(int(rate * seconds), dtype=np.int16)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data)
+
+    @property
+    def duration(self) -> float:
+        """Seconds of audio currently held"""
+        return self._size / self.rate
+
+    def append(self, samples: np.ndarray):
+        """Copy `samples` after the data already held, growing if needed"""
+        end = self._size + len(samples)
+        if end > len(self._data):
+            grown = np.empty(max(end, 2 * len(self._data)), dtype=np.int16)
+            grown[: self._size] = self._data[: self._size]
+            self._data = grown
+        self._data[self._size : end] = samples
+        self._size = end
+
+    def view(self) -> np.ndarray:
+        """Read-only view of the held samples, valid until the next append"""
+        view = self._data[: self._size]
+        view.flags.writeable = False
+        return view
+
+    def clear(self):
+        self._size = 0
+
+
+class CaptureRing:
+    """Fixed-size ring of captured int16 samples, filled by a single writer.
+
+    The writer never waits on readers: it copies each block into the ring and
+    then publishes the new `written` count, which doubles as the sequence
+    number of the next sample. Each consumer reads through a `RingCursor` of
+    its own; one that falls more than `capacity` samples behind has lost the
+    oldest audio, which its cursor counts and skips.
+    """
+
+    def __init__(self, rate: int = 44100, seconds: float = 30.0):
+        self.rate = rate
+        self._data = np.zeros(int(rate * seconds), dtype=np.int16)
+        self.written = 0
+        self.blocks = 0
+        self.overflows = 0  # blocks the device reported it had to drop before
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data)
+
+    def write(self, samples: np.ndarray):
+        """Copy `samples` in after the newest ones; called by the writer only"""
+        n = len(samples)
+        if n > self.capacity:
+            samples = samples[-self.capacity :]
+        start = (self.written + n - len(samples)) % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self._data[start : start + first] = samples[:first]
+        self._data[: len(samples) - first] = samples[first:]
+        self.blocks += 1
+        self.written += n  # publish only once the samples are in place
+
+    def cursor(self, position: tp.Optional[int] = None) -> "RingCursor":
+        """A reader starting at sequence number `position`, by default now"""
+        return RingCursor(self, self.written if position is None else position)
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "seconds": round(self.written / self.rate, 1),
+            "blocks": self.blocks,
+            "overflows": self.overflows,
+        }
+
+
+class RingCursor:
+    """One consumer's position in a `CaptureRing`"""
+
+    def __init__(self, ring: CaptureRing, position: int):
+        self.ring = ring
+        self.position = position
+        self.lost = 0  # samples overwritten before this reader got to them
+
+    def available(self) -> int:
+        return self.ring.written - self.position
+
+    def read(self, samples: int) -> np.ndarray:
+        """Up to `samples` samples from the cursor on.
+
+        The result is a view into the ring unless it wraps around the ring's
+        end, and stays valid until the writer laps it, `capacity` samples on.
+        """
+        ring = self.ring
+        behind = ring.written - self.position
+        if behind > ring.capacity:
+            # Keep a block's worth of margin from the writer, which is still going
+            skip = behind - ring.capacity + min(samples, ring.capacity // 8)
+            self.lost += skip
+            self.position += skip
+            behind -= skip
+        n = min(samples, behind)
+        start = self.position % ring.capacity
+        if start + n <= ring.capacity:
+            out = ring._data[start : start + n]
+        else:
+            out = np.concatenate(
+                (ring._data[start:], ring._data[: start + n - ring.capacity])
+            )
+        self.position += n
+        return out
@@ -1,20 +1,29 @@
 # src/chatbot.py
-import json
+import threading
 import typing as tp
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
 
 import typing_extensions as tpe
-from openai.types.chat.chat_completion_message_param import \
-    ChatCompletionMessageParam
-from openai.types.chat.chat_completion_tool_param import \
-    ChatCompletionToolParam
 from src.typedefs import JSON, ChatbotKwargs, Component
 
-from .context import system_context
+from .context import get_system_context
+from .conversation import ConversationWindow
 from .logger import StatusLogger
+from .reducer import FRAMING
+from .segmenter import SentenceSegmenter
+from .tasks import TaskRunner, TaskStep, plan_steps
 from .terminal import Terminal
-from .utils import chunk_sentences
+from .toolcalls import ToolCall, ToolCallAccumulator
+from .tracing import tracer
 
-TOOLS: list[ChatCompletionToolParam] = [
+if tp.TYPE_CHECKING:
+    from openai import OpenAI
+    from openai.types.chat.chat_completion_message_param import \
+        ChatCompletionMessageParam
+    from openai.types.chat.chat_completion_tool_param import \
+        ChatCompletionToolParam
+
+TOOLS: "list[ChatCompletionToolParam]" = [
     {
         "type": "function",
         "function": {
@@ -82,10 +91,29 @@ TOOLS: list[ChatCompletionToolParam] = [
                                     "type": "boolean",
                                     "description": "If true, continues even if this step fails.",
                                 },
+                                "depends_on": {
+                                    "type": "array",
+                                    "items": {"type": "integer"},
+                                    "description": (
+                                        "1-based numbers of earlier steps that "
+                                        "must finish first. Omit to wait for the "
+                                        "previous step."
+                                    ),
+                                },
+                                "parallel": {
+                                    "type": "boolean",
+                                    "description": (
+                                        "If true and depends_on is omitted, run "
+                                        "without waiting for earlier steps."
+                                    ),
+                                },
                             },
                             "required": ["command", "description"],
                         },
-                        "description": "Commands to execute, in order.",
+                        "description": (
+                            "Commands to execute, in order unless depends_on or "
+                            "parallel let independent steps run concurrently."
+                        ),
                     },
                 },
                 "required": ["task_name", "commands"],
@@ -94,124 +122,233 @@ TOOLS: list[ChatCompletionToolParam] = [
     },
 ]
 
+MAX_TOOL_ROUNDS = 5
+
 iterm = Terminal()
 logger = StatusLogger()
 
 
+def _is_status(text: str) -> bool:
+    """Whether `text` is one of `Terminal.format_result`'s status lines"""
+    return text.lstrip("\n").startswith(FRAMING)
+
+
 class ChatBot(Component[ChatbotKwargs]):
-    messages: list[ChatCompletionMessageParam]
-
-    def __init__(self):
-        self.messages = [
-            {
-                "role": "system",
-                "content": (
-                    "You are **llmOS**, the control layer between natural language and macOS.\n\n"
-                    "🎯 PURPOSE:\n"
-                    "• Turn user intent into immediate system actions\n"
-                    "• Respond in plain, concise language\n"
-                    "• Prioritize doing over explaining\n"
-                    "• Automate complex tasks when appropriate\n\n"
-                    "🧩 CAPABILITIES:\n"
-                    "• File and folder management\n"
-                    "• Terminal command execution\n"
-                    "• App launching and control\n"
-                    "• Git and package management\n"
-                    "• Script and automation workflows\n"
-                    "• System insights: CPU, memory, network, etc.\n\n"
-                    "🗣️ BEHAVIOR:\n"
-                    "• Speak less, do more\n"
-                    "• Skip unnecessary steps\n"
-                    "• Chain related actions automatically\n"
-                    "• Fill in details intelligently when obvious\n"
-                    "• React fast, like a real-time shell with intuition\n\n"
-                    "🧠 CONTEXT:\n"
-                    "• Track current working directory and recent commands\n"
-                    "• Remember ongoing workflows\n"
-                    "• Detect intent from phrasing and act on it\n\n"
-                    "Your job is not to simulate a shell — you *are* the OS interface."
-                ),
-            }
-        ]
+    def __init__(
+        self,
+        language: str = "es",
+        token_budget: int = 6000,
+        persistent_shell: bool = False,
+        cache_commands: bool = False,
+    ):
+        self.language = language
+        iterm.use_session(persistent_shell)
+        iterm.use_cache(cache_commands)
+        self.window = ConversationWindow(
+            system_prompt=(
+                "You are **llmOS**, the control layer between natural language and macOS.\n\n"
+                "🎯 PURPOSE:\n"
+                "• Turn user intent into immediate system actions\n"
+                "• Respond in plain, concise language\n"
+                "• Prioritize doing over explaining\n"
+                "• Automate complex tasks when appropriate\n\n"
+                "🧩 CAPABILITIES:\n"
+                "• File and folder management\n"
+                "• Terminal command execution\n"
+                "• App launching and control\n"
+                "• Git and package management\n"
+                "• Script and automation workflows\n"
+                "• System insights: CPU, memory, network, etc.\n\n"
+                "🗣️ BEHAVIOR:\n"
+                "• Speak less, do more\n"
+                "• Skip unnecessary steps\n"
+                "• Chain related actions automatically\n"
+                "• Fill in details intelligently when obvious\n"
+                "• React fast, like a real-time shell with intuition\n\n"
+                "🧠 CONTEXT:\n"
+                "• Track current working directory and recent commands\n"
+                "• Remember ongoing workflows\n"
+                "• Detect intent from phrasing and act on it\n\n"
+                "Your job is not to simulate a shell — you *are* the OS interface."
+            ),
+            budget=token_budget,
+        )
+        # One worker: commands run in the order the model issued them
+        self.tools = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tool")
+        self.cancelled = threading.Event()
+        self._response: tp.Any = None
+        self._queued: "list[Future[tuple[str, str]]]" = []
+
+    def cancel(self):
+        """Stop the reply being generated, from any thread.
+
+        The in-flight completion is closed, so the server stops generating.
+        What was said so far stays in the conversation; the command a running
+        tool call is waiting on is stopped and whatever it reported is kept,
+        while calls queued behind it are cancelled and never run.
+        """
+        self.cancelled.set()
+        response = self._response
+        if response is not None:
+            response.close()
+        for future in list(self._queued):
+            future.cancel()
+        iterm.cancel()
+
+    @property
+    def messages(self) -> "list[ChatCompletionMessageParam]":
+        return self.window.messages
 
     def run(self, **kwargs: tpe.Unpack[ChatbotKwargs]) -> tp.Generator[str, None, None]:
         # Add context to user message
         client = kwargs["client"]
         content = kwargs["content"]
-        context_summary = system_context.get_context_summary()
+        context_summary = get_system_context().get_context_summary(content)
         enhanced_content = (
             f"{content}\n\n[SYSTEM CONTEXT]\n{context_summary}"
             if context_summary.strip() != "No active context"
             else content
         )
 
-        self.messages.append({"role": "user", "content": enhanced_content})
-        logger.generating_text()
+        self.window.add({"role": "user", "content": enhanced_content})
 
-        response = client.chat.completions.create(
-            messages=self.messages,
-            model="gemini-2.5-flash",
-            tools=TOOLS,
-            tool_choice="auto",
-            stream=True,
-            temperature=0.2,
-        )
+        # Keep going while the model calls tools, so it can act on their results
+        for _ in range(MAX_TOOL_ROUNDS):
+            had_tool_calls = yield from self._complete(client)
+            if not had_tool_calls or self.cancelled.is_set():
+                break
+
+    def _complete(self, client: "OpenAI") -> tp.Generator[str, None, bool]:
+        """Stream one completion, running tool calls as soon as they parse"""
+        logger.generating_text()
 
-        buffer = ""
-        full_response = ""
-        for chunk in response:
-            delta = chunk.choices[0].delta
-
-            # Handle streamed content
-            if delta.content:
-                buffer += delta.content
-                full_response += delta.content
-                for text_chunk in chunk_sentences(buffer):
-                    yield text_chunk
-                    buffer = ""
-
-            # Handle tool calls
-            if delta.tool_calls:
-                for tool_call in delta.tool_calls:
-                    if tool_call.function and tool_call.function.name:
-                        try:
-                            if tool_call.function.arguments:
-                                args = json.loads(tool_call.function.arguments)
-
-                                if tool_call.function.name == "system_action":
-                                    self._handle_single_command(args)
-                                elif tool_call.function.name == "system_task":
-                                    self._handle_multi_step_task(args)
-
-                        except Exception as e:
-                            error_msg = f"Tool execution error: {str(e)}"
-                            logger.error(error_msg)
-                            self.messages.append(
-                                {"role": "system", "content": error_msg}
-                            )
-                            yield error_msg
-
-        # Final leftover buffer
-        if buffer.strip():
-            yield buffer.strip()
-            full_response += buffer.strip()
-
-        # Save the assistant's full message
-        if full_response.strip():
-            self.messages.append(
-                {"role": "assistant", "content": full_response.strip()}
+        with tracer.span("llm.request") as span:
+            response = client.chat.completions.create(
+                messages=self.window.prepare(),
+                model="gemini-2.5-flash",
+                tools=TOOLS,
+                tool_choice="auto",
+                stream=True,
+                stream_options={"include_usage": True},
+                temperature=0.2,
             )
-            logger.text_complete(full_response.strip())
-            logger.assistant_response(full_response.strip())
 
-    def _handle_single_command(self, args: JSON):
+            segmenter = SentenceSegmenter(language=self.language)
+            accumulator = ToolCallAccumulator()
+            results: "dict[int, Future[tuple[str, str]]]" = {}
+            self._queued = []
+            full_response = ""
+            for chunk in self._chunks(response):
+                if chunk.usage is not None:
+                    self.window.record_usage(chunk.usage.prompt_tokens)
+                    span["prompt_tokens"] = chunk.usage.prompt_tokens
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content or delta.tool_calls:
+                    tracer.mark_once("llm.first_token")
+
+                # Handle streamed content, yielding only completed sentences
+                if delta.content:
+                    full_response += delta.content
+                    for sentence in segmenter.feed(delta.content):
+                        yield sentence
+
+                # Tool calls arrive in fragments; each one is dispatched the
+                # moment its arguments are complete, while the model streams on
+                if delta.tool_calls:
+                    for call in accumulator.feed(delta.tool_calls):
+                        results[call.index] = self._submit(call)
+
+        cancelled = self.cancelled.is_set()
+        if cancelled:
+            # Queued calls never start and are left out of the conversation
+            results = {i: f for i, f in results.items() if not f.cancel()}
+        else:
+            for call in accumulator.finish():
+                results[call.index] = self._submit(call)
+
+            # Final unfinished sentence
+            tail = segmenter.flush()
+            if tail:
+                yield tail
+
+        # Save the assistant's full message, then one tool message per call
+        text = full_response.strip()
+        if cancelled and text:
+            text += " …"  # the user cut in; they did not hear the rest
+        calls = [call for call in accumulator.ordered() if call.index in results]
+        assistant: JSON = {"role": "assistant", "content": text or None}
+        if calls:
+            for call in calls:
+                call.id = call.id or f"call_{call.index}"
+            assistant["tool_calls"] = [call.message() for call in calls]
+        if text or calls:
+            self.window.add(assistant)  # type: ignore
+        if text:
+            logger.text_complete(text)
+            logger.assistant_response(text)
+
+        for call in calls:
+            try:
+                label, output = results[call.index].result()
+            except CancelledError:
+                # Cut in while earlier calls ran; the message still needs a reply
+                label, output = call.name, "Cancelled: the user interrupted"
+            self.window.add_output(label, output, tool_call_id=call.id)
+            if output.startswith("Tool execution error") and not cancelled:
+                yield output
+        return bool(calls)
+
+    def _chunks(self, response: tp.Any) -> tp.Iterator[tp.Any]:
+        """Chunks of a streamed completion, ending quietly once cancelled"""
+        self._response = response
+        try:
+            for chunk in response:
+                if self.cancelled.is_set():
+                    return
+                yield chunk
+        except Exception:
+            # Closing the stream from another thread fails the read under it
+            if not self.cancelled.is_set():
+                raise
+        finally:
+            self._response = None
+            if self.cancelled.is_set():
+                response.close()  # cancelled before the first chunk arrived
+
+    def _submit(self, call: ToolCall) -> "Future[tuple[str, str]]":
+        future = self.tools.submit(self._execute, call)
+        self._queued.append(future)
+        return future
+
+    def _execute(self, call: ToolCall) -> tuple[str, str]:
+        """Run a tool call; returns a label for it and its output"""
+        with tracer.span(f"tool.{call.name or 'unknown'}"):
+            return self._run_tool(call)
+
+    def _run_tool(self, call: ToolCall) -> tuple[str, str]:
+        try:
+            if call.parsed is None:
+                raise ValueError(f"incomplete arguments for {call.name or 'tool'}")
+            if call.name == "system_action":
+                return self._handle_single_command(call.parsed)
+            if call.name == "system_task":
+                return self._handle_multi_step_task(call.parsed)
+            raise ValueError(f"unknown tool {call.name!r}")
+        except Exception as e:
+            error_msg = f"Tool execution error: {str(e)}"
+            logger.error(error_msg)
+            return call.name, error_msg
+
+    def _handle_single_command(self, args: JSON) -> tuple[str, str]:
         command = args.get("command") or ""
         command = command.strip()
         explanation = args.get("explanation", "")
         requires_confirmation = args.get("requires_confirmation", False)
 
         if not command:
-            return
+            return "", "❌ No command given"
 
         if requires_confirmation:
             logger.info(f"⚠️  This command requires confirmation: {explanation}")
@@ -220,50 +357,79 @@ class ChatBot(Component[ChatbotKwargs]):
         logger.executing_command(command)
         logger.info(explanation)
 
-        success = True
-        result_text = ""
-
-        for result in iterm.run(content=command):
-            self.messages.append({"role": "system", "content": result})
+        stream = iterm.stream_command(command)
+        for text in stream:
+            logger.command_output(text)
+        if stream.result.get("cached") and iterm.cache is not None:
+            stats = iterm.cache.stats()
+            logger.info(
+                f"⚡ Reused a cached result (hit ratio {stats['hit_ratio']:.0%}, "
+                f"{stats['seconds_saved']:.2f}s saved so far)"
+            )
+        for result in iterm.format_result(stream.result, streamed=True):
             logger.command_result(result)
-            result_text += result + "\n"
-            if "❌" in result:
-                success = False
+
+        success = bool(stream.result["success"])
+        result_text = "\n".join(iterm.format_result(stream.result)) + "\n"
 
         # Add to context history
-        system_context.add_command_to_history(command, result_text, success)
+        get_system_context().add_command_to_history(command, result_text, success)
+        return command, result_text
 
-    def _handle_multi_step_task(self, args: JSON):
+    def _handle_multi_step_task(self, args: JSON) -> tuple[str, str]:
         task_name = args.get("task_name", "Multi-step task")
-        commands = args.get("commands", [])
+        steps = plan_steps(args.get("commands", []))
 
         logger.info(f"🔄 Starting task: {task_name}")
 
-        for i, cmd_info in enumerate(commands, 1):
-            command = cmd_info.get("command", "")
-            description = cmd_info.get("description", "")
-            continue_on_error = cmd_info.get("continue_on_error", False)
-
-            if not command:
-                continue
+        def on_start(step: TaskStep):
+            if step.command:
+                logger.info(f"Step {step.number}/{len(steps)}: {step.description}")
+                logger.executing_command(step.command)
 
-            logger.info(f"Step {i}/{len(commands)}: {description}")
-            logger.executing_command(command)
+        def on_output(step: TaskStep, text: str):
+            # Output is shown as it arrives; status lines once the step ends
+            if not _is_status(text):
+                logger.command_output(text)
 
-            try:
-                for result in iterm.run(content=command):
-                    self.messages.append({"role": "system", "content": result})
+        def on_finish(step: TaskStep):
+            for result in step.results:
+                if _is_status(result):
                     logger.command_result(result)
+            if step.failed and not step.continue_on_error:
+                logger.error(f"Task stopped due to error in step {step.number}")
+
+        def execute(command: str) -> tp.Iterator[str]:
+            if self.cancelled.is_set():
+                yield "❌ Command failed:\nCancelled: the user interrupted"
+                return
+            yield from iterm.run(content=command)
+
+        runner = TaskRunner(
+            execute,
+            on_start=on_start,
+            on_finish=on_finish,
+            on_output=on_output,
+        )
+        runner.run(steps)
 
-                    # Check for errors if continue_on_error is False
-                    if not continue_on_error and "error" in result.lower():
-                        logger.error(f"Task stopped due to error in step {i}")
-                        return
-
-            except Exception as e:
-                error_msg = f"Error in step {i}: {str(e)}"
-                logger.error(error_msg)
-                if not continue_on_error:
-                    return
-
-        logger.info(f"✅ Task completed: {task_name}")
+        # Each step's output gets its own share of the output budget
+        ran = [step for step in steps if step.command]
+        outputs = self.window.reducer.reduce_sections(
+            [(step.command, "\n".join(step.results)) for step in ran]
+        )
+        report = ""
+        for step, output in zip(ran, outputs):
+            report += f"$ {step.command}\n"
+            if step.status == "skipped":
+                report += "⏭️ Skipped\n"
+            if output:
+                report += output + "\n"
+
+        serial = runner.serial_seconds(steps)
+        timing = f"{runner.wall_seconds:.1f}s ({serial:.1f}s if run one by one)"
+        if any(step.failed and not step.continue_on_error for step in steps):
+            logger.info(f"❌ Task stopped: {task_name} after {timing}")
+        else:
+            logger.info(f"✅ Task completed: {task_name} in {timing}")
+        return task_name, report
@@ -0,0 +1,227 @@
+# src/clients.py
+import importlib.util
+import os
+import random
+import threading
+import time
+import typing as tp
+
+from .typedefs import JSON
+
+if tp.TYPE_CHECKING:
+    import httpx
+    from openai import OpenAI
+
+    from .transport import StageTransport
+
+# (connect, read) seconds per stage. The read timeout bounds the wait for the
+# next bytes of a response, so a stalled stream fails instead of hanging
+TIMEOUTS: dict[str, tuple[float, float]] = {
+    "stt": (3.0, 15.0),
+    "llm": (3.0, 20.0),
+    "tts": (3.0, 10.0),
+}
+RETRIES: dict[str, int] = {"stt": 2, "llm": 2, "tts": 2}
+
+
+class ClientPool:
+    """One pool of keep-alive connections behind the STT, LLM and TTS clients.
+
+    Every stage gets an `httpx.Client` with its own timeouts and retries, all
+    over one shared transport, so a host's connections are reused across
+    stages and turns, and HTTP/2 is negotiated when the `h2` package is
+    installed. `warm` opens a stage's connection before its first request;
+    after that a background thread pings any host idle for `ping_interval`
+    seconds, before servers close idle connections (often after 60s).
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        keepalive_expiry: float = 300.0,
+        ping_interval: float = 20.0,
+        retry_base: float = 0.2,
+        retry_cap: float = 2.0,
+        timeouts: tp.Optional[dict[str, tuple[float, float]]] = None,
+        retries: tp.Optional[dict[str, int]] = None,
+        http2: tp.Optional[bool] = None,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.ping_interval = ping_interval
+        self.retry_base = retry_base
+        self.retry_cap = retry_cap
+        self.timeouts = {**TIMEOUTS, **(timeouts or {})}
+        self.retries = {**RETRIES, **(retries or {})}
+        if http2 is None:
+            http2 = importlib.util.find_spec("h2") is not None
+        self.http2 = http2
+        self.origins: dict[str, str] = {}  # stage -> URL pinged to keep it warm
+        self.stages: dict[str, "StageTransport"] = {}
+        self._transport: tp.Optional["httpx.HTTPTransport"] = None
+        self._clients: dict[str, "httpx.Client"] = {}
+        self._pinger: tp.Optional[threading.Thread] = None
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def transport(self) -> "httpx.HTTPTransport":
+        if self._transport is None:
+            with self._lock:
+                if self._transport is None:
+                    import httpx
+
+                    self._transport = httpx.HTTPTransport(
+                        http2=self.http2,
+                        limits=httpx.Limits(
+                            max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_keepalive,
+                            keepalive_expiry=self.keepalive_expiry,
+                        ),
+                    )
+        return self._transport
+
+    def timeout(self, stage: str) -> "httpx.Timeout":
+        import httpx
+
+        connect, read = self.timeouts[stage]
+        return httpx.Timeout(connect=connect, read=read, write=read, pool=connect)
+
+    def http(self, stage: str) -> "httpx.Client":
+        """The HTTP client for `stage`, built on first use"""
+        with self._lock:
+            client = self._clients.get(stage)
+            if client is None:
+                import httpx
+
+                from .transport import StageTransport
+
+                transport = StageTransport(self, stage, self.retries[stage])
+                self.stages[stage] = transport
+                client = httpx.Client(transport=transport, timeout=self.timeout(stage))
+                self._clients[stage] = client
+        return client
+
+    def options(self, stage: str) -> dict[str, tp.Any]:
+        """`OpenAI` arguments that route a stage's requests through the pool"""
+        # Retries happen in the transport, with jitter and before any output
+        return {
+            "http_client": self.http(stage),
+            "timeout": self.timeout(stage),
+            "max_retries": 0,
+        }
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: anywhere up to the exponential delay for `attempt`"""
+        return random.uniform(0, min(self.retry_cap, self.retry_base * 2**attempt))
+
+    def warm(self, stage: str, url: str):
+        """Open a connection for `stage` now and keep it open from then on"""
+        self.origins[stage] = url
+        self._ping(stage)
+        with self._lock:
+            if self._pinger is None:
+                self._pinger = threading.Thread(
+                    target=self._keep_alive, name="http-keepalive", daemon=True
+                )
+                self._pinger.start()
+
+    def _ping(self, stage: str):
+        import httpx
+
+        try:
+            # Any answer will do, even an error status: the connection stays
+            self.http(stage).head(self.origins[stage], extensions={"ping": True})
+        except httpx.HTTPError:
+            pass
+
+    def _keep_alive(self):
+        while not self._closed.wait(self.ping_interval / 2):
+            now = time.monotonic()
+            for stage in list(self.origins):
+                if now - self.stages[stage].last_used >= self.ping_interval:
+                    self._ping(stage)
+
+    def stats(self) -> JSON:
+        return {stage: transport.stats() for stage, transport in self.stages.items()}
+
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            if self._transport is not None:
+                self._transport.close()
+
+
+_pool: tp.Optional[ClientPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_client_pool() -> ClientPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ClientPool()
+    return _pool
+
+
+class LazyClient:
+    """Builds its `OpenAI` client on first attribute access.
+
+    With a `pool`, its requests go through the pool's connections with the
+    timeouts and retries set for `stage`.
+    """
+
+    def __init__(
+        self,
+        pool: tp.Optional[ClientPool] = None,
+        stage: str = "",
+        **options: tp.Any,
+    ):
+        self.pool = pool
+        self.stage = stage
+        self._options = options
+        self._client: tp.Optional["OpenAI"] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> "OpenAI":
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from openai import OpenAI
+
+                    options = self._options
+                    if self.pool is not None:
+                        options = {**self.pool.options(self.stage), **options}
+                    self._client = OpenAI(**options)
+        return self._client
+
+    def warm(self) -> "OpenAI":
+        """Build the client and open its connection before the first request"""
+        client = self.get()
+        if self.pool is not None:
+            self.pool.warm(self.stage, str(client.base_url))
+        return client
+
+    def __getattr__(self, name: str) -> tp.Any:
+        return getattr(self.get(), name)
+
+
+def build_clients(
+    pool: tp.Optional[ClientPool] = None,
+) -> tuple[LazyClient, LazyClient, LazyClient]:
+    """The STT, LLM and TTS clients used by the voice loop"""
+    pool = pool or get_client_pool()
+    stt = LazyClient(
+        pool,
+        "stt",
+        base_url="https://api.groq.com/openai/v1",
+        api_key=os.environ["GROQ_API_KEY"],
+    )
+    llm = LazyClient(pool, "llm")
+    tts = LazyClient(pool, "tts", base_url="https://api.oscarbahamonde.cloud/v1")
+    return stt, llm, tts
@@ -1,20 +1,63 @@
 # src/context.py
+import atexit
 import json
+import os
+import queue
 import threading
+import time
 import typing as tp
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+from .history import CommandHistory
+from .logger import StatusLogger
 from .typedefs import JSON
 
+logger = StatusLogger()
+
+
+_STOP = object()
+_COMPACT = object()
+
+
+def apply_record(context: JSON, record: JSON):
+    """Apply one journal record to the context in place"""
+    *parents, key = record["path"]
+    target = context
+    for parent in parents:
+        target = target[parent]
+    if record["op"] == "set":
+        target[key] = record["value"]
+    elif record["op"] == "update":
+        target[key].update(record["value"])
+    elif record["op"] == "append":
+        target[key].append(record["value"])
+        if record.get("limit"):
+            del target[key][: -record["limit"]]
+    else:
+        raise ValueError(f"Unknown journal operation {record['op']!r}")
 
-class SystemContext:
-    """Manages system context and state across sessions"""
 
-    def __init__(self):
-        self.context_file = Path.home() / ".llmos_context.json"
-        self.lock = threading.Lock()
+class SystemContext:
+    """Manages system context and state across sessions.
+
+    Mutations are applied in memory and appended to a journal by a background
+    writer, which batches them, fsyncs each batch and periodically compacts the
+    journal into a full snapshot. Callers never wait on disk I/O.
+    """
+
+    def __init__(
+        self,
+        context_file: Optional[Path] = None,
+        flush_interval: float = 0.05,
+        compact_every: int = 500,
+    ):
+        self.context_file = context_file or Path.home() / ".llmos_context.json"
+        self.journal_file = self.context_file.with_suffix(".journal")
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+        self.lock = threading.RLock()
         self._context: dict[str, tp.Any] = {
             "current_project": None,
             "active_tasks": [],
@@ -25,36 +68,169 @@ class SystemContext:
             "system_info": {},
             "session_start": datetime.now().isoformat(),
         }
+        self._seq = 0
+        self._uncompacted = 0
+        self._queue: "queue.SimpleQueue[tp.Any]" = queue.SimpleQueue()
+        self._journal: Optional[tp.TextIO] = None
         self.load_context()
+        self.history = CommandHistory(self.context_file.with_suffix(".history.db"))
+        if self._context["recent_commands"] and not len(self.history):
+            # Seed the long-term history from the short in-context list
+            for entry in self._context["recent_commands"]:
+                timestamp = datetime.fromisoformat(entry["timestamp"])
+                self.history.add(
+                    entry["command"], entry["result"], entry["success"], timestamp
+                )
+        self._writer = threading.Thread(
+            target=self._write_loop, name="context-writer", daemon=True
+        )
+        self._writer.start()
+        atexit.register(self.close)
 
     def load_context(self):
-        """Load context from persistent storage"""
+        """Load the snapshot from persistent storage and replay the journal"""
         try:
             if self.context_file.exists():
                 with open(self.context_file, "r") as f:
                     saved_context = json.load(f)
-                    self._context.update(saved_context)
+                self._seq = saved_context.pop("_journal_seq", 0)
+                self._context.update(saved_context)
         except Exception as e:
-            print(f"Warning: Could not load context: {e}")
+            logger.warning(f"Could not load context: {e}")
+        try:
+            if self.journal_file.exists():
+                with open(self.journal_file, "r", newline="") as f:
+                    lines = f.readlines()
+            else:
+                lines = []
+        except OSError as e:
+            logger.warning(f"Could not read context journal: {e}")
+            return
+        valid = 0
+        for line in lines:
+            try:
+                if not line.endswith("\n"):
+                    raise ValueError("incomplete record")
+                record = json.loads(line)
+            except ValueError:
+                # Torn write at the tail from a crash: drop it so new records
+                # do not get appended to a broken line
+                self._truncate_journal(valid)
+                break
+            valid += len(line.encode())
+            if record["seq"] <= self._seq:
+                continue  # already part of the snapshot
+            try:
+                apply_record(self._context, record)
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                logger.warning(f"Skipping context journal record: {e}")
+            self._seq = record["seq"]
+            self._uncompacted += 1
+
+    def _truncate_journal(self, size: int):
+        try:
+            with open(self.journal_file, "r+b") as f:
+                f.truncate(size)
+        except OSError as e:
+            logger.warning(f"Could not repair context journal: {e}")
+
+    def _record(self, op: str, path: list[tp.Any], value: tp.Any, **extra: tp.Any):
+        """Apply a mutation and queue it for the journal"""
+        with self.lock:
+            record: JSON = {
+                "seq": self._seq + 1,
+                "op": op,
+                "path": path,
+                "value": value,
+                **extra,
+            }
+            apply_record(self._context, record)
+            self._seq += 1
+            self._queue.put(json.dumps(record, default=str))
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            time.sleep(self.flush_interval)  # debounce bursts into one write
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = [item for item in batch if isinstance(item, str)]
+            try:
+                if lines:
+                    self._append(lines)
+                if _COMPACT in batch or self._uncompacted >= self.compact_every:
+                    self._compact()
+            except Exception as e:
+                logger.warning(f"Could not save context: {e}")
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if _STOP in batch:
+                if self._journal is not None:
+                    self._journal.close()
+                return
+
+    def _append(self, lines: list[str]):
+        if self._journal is None:
+            self._journal = open(self.journal_file, "a")
+        self._journal.write("\n".join(lines) + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._uncompacted += len(lines)
+
+    def _compact(self):
+        """Write a full snapshot and start an empty journal"""
+        with self.lock:
+            snapshot = json.dumps(
+                {**self._context, "_journal_seq": self._seq}, indent=2, default=str
+            )
+        temp = self.context_file.with_name(f"{self.context_file.name}.tmp")
+        with open(temp, "w") as f:
+            f.write(snapshot)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.context_file)
+        # Records still queued have seq numbers after the snapshot's, and
+        # replay skips anything the snapshot already covers, so truncating
+        # here is safe even if we crash right after the rename
+        if self._journal is None:
+            self._journal = open(self.journal_file, "a")
+        self._journal.truncate(0)
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._uncompacted = 0
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every mutation so far is durable on disk"""
+        if not self._writer.is_alive():
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
 
     def save_context(self):
-        """Save context to persistent storage"""
-        try:
-            with self.lock:
-                with open(self.context_file, "w") as f:
-                    json.dump(self._context, f, indent=2, default=str)
-        except Exception as e:
-            print(f"Warning: Could not save context: {e}")
+        """Write a full snapshot of the context to persistent storage"""
+        self._queue.put(_COMPACT)
+        self.flush()
+
+    def close(self):
+        """Flush pending mutations and stop the background writer"""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        self.history.close()
 
     def set_current_project(self, project_path: str, project_type: str = "unknown"):
         """Set the current working project"""
-        with self.lock:
-            self._context["current_project"] = {
-                "path": project_path,
-                "type": project_type,
-                "last_accessed": datetime.now().isoformat(),
-            }
-            self.save_context()
+        project: JSON = {
+            "path": project_path,
+            "type": project_type,
+            "last_accessed": datetime.now().isoformat(),
+        }
+        self._record("set", ["current_project"], project)
 
     def get_current_project(self) -> Optional[Dict[str, Any]]:
         """Get current project information"""
@@ -70,17 +246,18 @@ class SystemContext:
                 "created": datetime.now().isoformat(),
                 "status": "pending",
             }
-            self._context["active_tasks"].append(task_obj)
-            self.save_context()
+            self._record("append", ["active_tasks"], task_obj)
 
     def complete_task(self, task_id: int):
         """Mark a task as completed"""
+        completed: JSON = {
+            "status": "completed",
+            "completed": datetime.now().isoformat(),
+        }
         with self.lock:
-            for task in self._context["active_tasks"]:
+            for index, task in enumerate(self._context["active_tasks"]):
                 if task["id"] == task_id:
-                    task["status"] = "completed"
-                    task["completed"] = datetime.now().isoformat()
-            self.save_context()
+                    self._record("update", ["active_tasks", index], completed)
 
     def get_active_tasks(self) -> list[JSON]:
         """Get list of active tasks"""
@@ -92,29 +269,20 @@ class SystemContext:
 
     def add_command_to_history(self, command: str, result: str, success: bool):
         """Add command to recent history"""
-        with self.lock:
-            history_entry: JSON = {
-                "command": command,
-                "result": result[:500],  # Truncate long results
-                "success": success,
-                "timestamp": datetime.now().isoformat(),
-            }
-
-            self._context["recent_commands"].append(history_entry)
-
-            # Keep only last 50 commands
-            if len(self._context["recent_commands"]) > 50:
-                self._context["recent_commands"] = self._context["recent_commands"][
-                    -50:
-                ]
+        history_entry: JSON = {
+            "command": command,
+            "result": result[:500],  # Truncate long results
+            "success": success,
+            "timestamp": datetime.now().isoformat(),
+        }
 
-            self.save_context()
+        # Keep only last 50 commands in context; the full history is indexed
+        self._record("append", ["recent_commands"], history_entry, limit=50)
+        self.history.add(command, result, success)
 
     def set_user_preference(self, key: str, value: Any):
         """Set a user preference"""
-        with self.lock:
-            self._context["user_preferences"][key] = value
-            self.save_context()
+        self._record("set", ["user_preferences", key], value)
 
     def get_user_preference(self, key: str, default: Any = None) -> Any:
         """Get a user preference"""
@@ -122,13 +290,15 @@ class SystemContext:
 
     def update_system_info(self, info: Dict[str, Any]):
         """Update system information"""
-        with self.lock:
-            self._context["system_info"].update(info)
-            self._context["system_info"]["last_updated"] = datetime.now().isoformat()
-            self.save_context()
+        info = {**info, "last_updated": datetime.now().isoformat()}
+        self._record("update", ["system_info"], info)
+
+    def get_context_summary(self, query: Optional[str] = None) -> str:
+        """Get a summary of current context for the AI.
 
-    def get_context_summary(self) -> str:
-        """Get a summary of current context for the AI"""
+        With a `query` (usually the user's request), past commands most relevant
+        to it are included as well as the most recent ones.
+        """
         project = self.get_current_project()
         tasks = self.get_active_tasks()
 
@@ -149,6 +319,19 @@ class SystemContext:
                 status = "✅" if cmd["success"] else "❌"
                 summary.append(f"  {status} {cmd['command']}")
 
+        if query:
+            shown = {cmd["command"] for cmd in recent_commands}
+            related: list[JSON] = []
+            for cmd in self.history.search(query, limit=10):
+                if cmd["command"] not in shown and len(related) < 3:
+                    shown.add(cmd["command"])
+                    related.append(cmd)
+            if related:
+                summary.append("Related past commands:")
+                for cmd in related:
+                    status = "✅" if cmd["success"] else "❌"
+                    summary.append(f"  {status} {cmd['command']}")
+
         return "\n".join(summary) if summary else "No active context"
 
     def get_working_directory_for_project(self, project_name: str) -> Optional[str]:
@@ -157,9 +340,7 @@ class SystemContext:
 
     def set_working_directory_for_project(self, project_name: str, directory: str):
         """Set the working directory for a specific project"""
-        with self.lock:
-            self._context["working_directories"][project_name] = directory
-            self.save_context()
+        self._record("set", ["working_directories", project_name], directory)
 
     def cleanup_old_data(self):
         """Clean up old data to prevent context file from growing too large"""
@@ -167,7 +348,7 @@ class SystemContext:
             # Remove completed tasks older than 7 days
             week_ago = datetime.now().timestamp() - (7 * 24 * 60 * 60)
 
-            self._context["active_tasks"] = [
+            active_tasks = [
                 task
                 for task in self._context["active_tasks"]
                 if task["status"] == "pending"
@@ -179,14 +360,32 @@ class SystemContext:
 
             # Keep only last 30 days of command history
             month_ago = datetime.now().timestamp() - (30 * 24 * 60 * 60)
-            self._context["recent_commands"] = [
+            recent_commands = [
                 cmd
                 for cmd in self._context["recent_commands"]
                 if datetime.fromisoformat(cmd["timestamp"]).timestamp() > month_ago
             ]
 
-            self.save_context()
+            self._record("set", ["active_tasks"], active_tasks)
+            self._record("set", ["recent_commands"], recent_commands)
+
+
+# Global context instance, built on first use so importing is free
+_system_context: Optional[SystemContext] = None
+_system_context_lock = threading.Lock()
+
+
+def get_system_context() -> SystemContext:
+    """Get the global context, loading it from disk on first call"""
+    global _system_context
+    if _system_context is None:
+        with _system_context_lock:
+            if _system_context is None:
+                _system_context = SystemContext()
+    return _system_context
 
 
-# Global context instance
-system_context = SystemContext()
+def __getattr__(name: str) -> tp.Any:
+    if name == "system_context":
+        return get_system_context()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,155 @@
+# src/conversation.py
+import json
+import typing as tp
+
+from .reducer import OutputReducer, estimate_tokens
+from .typedefs import JSON
+
+if tp.TYPE_CHECKING:
+    from openai.types.chat.chat_completion_message_param import \
+        ChatCompletionMessageParam
+
+MESSAGE_OVERHEAD = 4  # role and separators the API adds around each message
+SUMMARY_HEADER = "Summary of the earlier conversation:"
+CONTEXT_MARKER = "\n\n[SYSTEM CONTEXT]"
+
+
+def message_tokens(message: "ChatCompletionMessageParam") -> int:
+    text = str(message.get("content") or "")
+    if message.get("tool_calls"):
+        text += json.dumps(message.get("tool_calls"))
+    return MESSAGE_OVERHEAD + estimate_tokens(text)
+
+
+def _first_line(text: str, limit: int = 160) -> str:
+    line = text.strip().split("\n", 1)[0]
+    return line if len(line) <= limit else line[: limit - 1] + "…"
+
+
+def summarize_turn(turn: "list[ChatCompletionMessageParam]") -> list[str]:
+    """One short line per user request, command and reply of an evicted turn"""
+    lines: list[str] = []
+    for message in turn:
+        content = str(message.get("content") or "")
+        if message["role"] == "user":
+            lines.append(f"User: {_first_line(content.split(CONTEXT_MARKER)[0])}")
+        elif message["role"] == "assistant" and content.strip():
+            lines.append(f"Assistant: {_first_line(content)}")
+        elif content.startswith("$ "):
+            status = "failed" if "❌" in content else "ok"
+            lines.append(f"Ran `{_first_line(content)[2:]}` ({status})")
+    return lines
+
+
+class ConversationWindow:
+    """Messages sent to the LLM, kept within a per-request token budget.
+
+    The system prompt is pinned. When the window outgrows `budget`, the oldest
+    turns are evicted in one go down to `target * budget` and folded into a
+    running summary right after the system prompt. Compacting rarely, instead
+    of trimming a little on every request, keeps the message prefix
+    byte-identical between compactions so provider prompt caches keep hitting.
+    """
+
+    def __init__(
+        self,
+        system_prompt: str,
+        budget: int = 6000,
+        target: float = 0.6,
+        max_output_tokens: int = 600,
+        summary_tokens: int = 400,
+    ):
+        self.system: "ChatCompletionMessageParam" = {
+            "role": "system",
+            "content": system_prompt,
+        }
+        self.budget = budget
+        self.target = target
+        self.max_output_tokens = max_output_tokens
+        self.summary_tokens = summary_tokens
+        self.reducer = OutputReducer(max_output_tokens)
+        self.summary: list[str] = []
+        self._summary_message: "tp.Optional[ChatCompletionMessageParam]" = None
+        # Each turn starts with a user message
+        self.turns: "list[list[ChatCompletionMessageParam]]" = []
+        self.requests: list[JSON] = []
+        self.compactions = 0
+
+    @property
+    def messages(self) -> "list[ChatCompletionMessageParam]":
+        prefix = [self.system]
+        if self._summary_message is not None:
+            prefix.append(self._summary_message)
+        return prefix + [message for turn in self.turns for message in turn]
+
+    def tokens(self) -> int:
+        return sum(message_tokens(message) for message in self.messages)
+
+    def add(self, message: "ChatCompletionMessageParam"):
+        if message["role"] == "user" or not self.turns:
+            self.turns.append([])
+        self.turns[-1].append(message)
+
+    def add_output(
+        self, command: str, output: str, tool_call_id: tp.Optional[str] = None
+    ):
+        """Add command output, reduced so one command cannot flood the window.
+
+        With a `tool_call_id` it is the result message for that tool call.
+        """
+        content = f"$ {command}\n{self.reducer.reduce(command, output)}"
+        if tool_call_id is not None:
+            self.add({"role": "tool", "tool_call_id": tool_call_id, "content": content})
+        else:
+            self.add({"role": "system", "content": content})
+
+    def compact(self) -> int:
+        """Evict the oldest turns into the summary; returns how many"""
+        evicted = 0
+        limit = self.target * self.budget
+        while len(self.turns) > 1 and self.tokens() > limit:
+            self.summary += summarize_turn(self.turns.pop(0))
+            evicted += 1
+            # Drop the oldest summary lines beyond their own budget
+            while (
+                sum(estimate_tokens(line) for line in self.summary)
+                > self.summary_tokens
+            ):
+                self.summary.pop(0)
+            self._summary_message = {
+                "role": "system",
+                "content": "\n".join([SUMMARY_HEADER, *self.summary]),
+            }
+        if evicted:
+            self.compactions += 1
+        return evicted
+
+    def prepare(self) -> "list[ChatCompletionMessageParam]":
+        """Messages for the next request, compacting first if over budget"""
+        evicted = self.compact() if self.tokens() > self.budget else 0
+        messages = self.messages
+        self.requests.append(
+            {
+                "tokens": sum(message_tokens(message) for message in messages),
+                "messages": len(messages),
+                "evicted_turns": evicted,
+            }
+        )
+        return messages
+
+    def record_usage(self, prompt_tokens: int):
+        """Store the prompt size the provider reported for the last request"""
+        if self.requests:
+            self.requests[-1]["reported_tokens"] = prompt_tokens
+
+    def stats(self) -> JSON:
+        sent = [request["tokens"] for request in self.requests]
+        return {
+            "requests": len(sent),
+            "tokens_sent": sum(sent),
+            "last_request_tokens": sent[-1] if sent else 0,
+            "max_request_tokens": max(sent, default=0),
+            "compactions": self.compactions,
+            "turns": len(self.turns),
+            "output_tokens_saved": self.reducer.tokens_saved,
+        }
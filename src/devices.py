@@ -0,0 +1,271 @@
+# src/devices.py
+import threading
+import time
+import typing as tp
+
+from .typedefs import JSON
+
+# PortAudio's sample formats and callback flags, the values PyAudio exposes,
+# so the headless backend works without PyAudio installed
+PA_FLOAT32 = 0x01
+PA_INT32 = 0x02
+PA_INT16 = 0x08
+PA_CONTINUE = 0
+PA_INPUT_OVERFLOW = 0x02
+
+SAMPLE_WIDTHS = {PA_INT16: 2, PA_INT32: 4, PA_FLOAT32: 4}
+
+
+class AudioStream(tp.Protocol):
+    def read(self, num_frames: int, exception_on_overflow: bool = True) -> bytes: ...
+    def write(self, frames: bytes) -> None: ...
+    def get_read_available(self) -> int: ...
+    def get_input_latency(self) -> float: ...
+    def get_output_latency(self) -> float: ...
+    def stop_stream(self) -> None: ...
+    def close(self) -> None: ...
+
+
+class AudioBackend(tp.Protocol):
+    def open(self, **kwargs: tp.Any) -> AudioStream: ...
+    def terminate(self) -> None: ...
+
+
+class FakeStream:
+    """In-memory stream: reads replay `source`, writes are collected.
+
+    With a `stream_callback`, a thread delivers the source to it block by
+    block, as PortAudio would. A `live` backend plays the source on the wall
+    clock from the moment the stream opens, whether anyone reads or not; a
+    reader more than `device_buffer` seconds behind loses the oldest audio,
+    as with PortAudio's input overflow.
+    """
+
+    def __init__(self, backend: "FakeAudioBackend", **kwargs: tp.Any):
+        self.backend = backend
+        self.kwargs = kwargs
+        self.frame_size = SAMPLE_WIDTHS[kwargs["format"]] * kwargs["channels"]
+        self.rate: int = kwargs["rate"]
+        self.closed = False
+        self.opened = time.perf_counter()
+        self.frames_read = 0
+        self._callback_thread: tp.Optional[threading.Thread] = None
+        if kwargs.get("stream_callback"):
+            self._callback_thread = threading.Thread(
+                target=self._deliver, name="fake-audio-callback", daemon=True
+            )
+            self._callback_thread.start()
+
+    def read(self, num_frames: int, exception_on_overflow: bool = True) -> bytes:
+        size = num_frames * self.frame_size
+        backend = self.backend
+        if backend.live:
+            self._wait_live(num_frames)
+        with backend.lock:
+            data = backend.source[backend.position : backend.position + size]
+            backend.position += len(data)
+            if len(data) < size and backend.loop and backend.source:
+                backend.position = 0
+            data += bytes(size - len(data))  # silence once the source runs out
+        self.frames_read += num_frames
+        if self.backend.realtime and not backend.live:
+            time.sleep(num_frames / self.rate)
+        return data
+
+    def _wait_live(self, num_frames: int):
+        """Skip what the device buffer could not hold; wait for what is due"""
+        backend = self.backend
+        due = int((time.perf_counter() - self.opened) * self.rate)
+        buffered = int(backend.device_buffer * self.rate)
+        if due - self.frames_read > buffered:
+            skipped = due - self.frames_read - buffered
+            with backend.lock:
+                backend.position += skipped * self.frame_size
+                backend.overflows += 1
+            self.frames_read += skipped
+        if self.frames_read + num_frames > due:
+            time.sleep((self.frames_read + num_frames - due) / self.rate)
+
+    def _deliver(self):
+        callback = self.kwargs["stream_callback"]
+        frames = self.kwargs.get("frames_per_buffer", 1024)
+        while not self.closed:
+            data = self.read(frames)
+            if self.closed:
+                break
+            _, flag = callback(data, frames, {}, 0)
+            if flag != PA_CONTINUE:
+                break
+
+    def is_active(self) -> bool:
+        thread = self._callback_thread
+        return not self.closed and (thread is None or thread.is_alive())
+
+    def write(self, frames: bytes):
+        with self.backend.lock:
+            self.backend.written.append(bytes(frames))
+        if self.backend.realtime:
+            time.sleep(len(frames) / self.frame_size / self.rate)
+
+    def get_read_available(self) -> int:
+        return 0
+
+    def get_input_latency(self) -> float:
+        return self.backend.latency
+
+    def get_output_latency(self) -> float:
+        return self.backend.latency
+
+    def stop_stream(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+        if self._callback_thread is not None:
+            self._callback_thread.join(timeout=1)
+
+
+class FakeAudioBackend:
+    """Headless stand-in for PyAudio used by tests and benchmarks"""
+
+    def __init__(
+        self,
+        source: bytes = b"",
+        loop: bool = False,
+        realtime: bool = False,
+        latency: float = 0.0,
+        live: bool = False,
+        device_buffer: float = 0.1,
+    ):
+        self.source = source
+        self.loop = loop
+        self.realtime = realtime
+        self.latency = latency
+        self.live = live
+        self.device_buffer = device_buffer
+        self.overflows = 0
+        self.position = 0
+        self.written: list[bytes] = []
+        self.lock = threading.Lock()
+
+    def open(self, **kwargs: tp.Any) -> FakeStream:
+        return FakeStream(self, **kwargs)
+
+    def terminate(self):
+        pass
+
+
+class AudioDeviceManager:
+    """Owns one audio session and keeps input and output streams open.
+
+    Streams are keyed by their parameters, so repeated requests for the same
+    format return the already open stream instead of reopening the device.
+    """
+
+    def __init__(self, backend: tp.Optional[AudioBackend] = None):
+        self._backend = backend
+        self._streams: dict[tuple[tp.Any, ...], AudioStream] = {}
+        self.lock = threading.Lock()
+        self.opens = 0
+        self.closes = 0
+        self.open_seconds: list[float] = []
+
+    @property
+    def backend(self) -> AudioBackend:
+        if self._backend is None:
+            import pyaudio
+
+            self._backend = pyaudio.PyAudio()
+        return self._backend
+
+    def _stream(self, **kwargs: tp.Any) -> AudioStream:
+        key = tuple(sorted(kwargs.items()))
+        with self.lock:
+            stream = self._streams.get(key)
+            if stream is None:
+                start = time.perf_counter()
+                stream = self.backend.open(**kwargs)
+                self.open_seconds.append(time.perf_counter() - start)
+                self.opens += 1
+                self._streams[key] = stream
+            return stream
+
+    def input_stream(
+        self,
+        *,
+        format: int,
+        channels: int,
+        rate: int,
+        frames_per_buffer: int,
+        stream_callback: tp.Optional[tp.Callable[..., tp.Any]] = None,
+    ) -> AudioStream:
+        """The input stream; with a `stream_callback`, PortAudio pushes to it"""
+        options: dict[str, tp.Any] = {}
+        if stream_callback is not None:
+            options["stream_callback"] = stream_callback
+        return self._stream(
+            format=format,
+            channels=channels,
+            rate=rate,
+            input=True,
+            frames_per_buffer=frames_per_buffer,
+            **options,
+        )
+
+    def output_stream(
+        self, *, format: int, channels: int, rate: int, frames_per_buffer: int
+    ) -> AudioStream:
+        return self._stream(
+            format=format,
+            channels=channels,
+            rate=rate,
+            output=True,
+            frames_per_buffer=frames_per_buffer,
+        )
+
+    def stats(self) -> JSON:
+        """Open/close counters and latency of the open streams"""
+        latency_ms: dict[str, float] = {}
+        with self.lock:
+            for key, stream in self._streams.items():
+                params = dict(key)
+                if params.get("input"):
+                    name, latency = "input", stream.get_input_latency()
+                else:
+                    name, latency = "output", stream.get_output_latency()
+                latency_ms[f"{name}@{params['rate']}"] = round(latency * 1000, 2)
+        return {
+            "opens": self.opens,
+            "closes": self.closes,
+            "open_ms": [round(s * 1000, 2) for s in self.open_seconds],
+            "latency_ms": latency_ms,
+        }
+
+    def close(self):
+        """Close every stream and end the audio session"""
+        with self.lock:
+            for stream in self._streams.values():
+                try:
+                    stream.stop_stream()
+                    stream.close()
+                finally:
+                    self.closes += 1
+            self._streams.clear()
+            if self._backend is not None:
+                self._backend.terminate()
+                self._backend = None
+
+
+# Shared device manager, created on first use
+_device_manager: tp.Optional[AudioDeviceManager] = None
+_device_manager_lock = threading.Lock()
+
+
+def get_device_manager() -> AudioDeviceManager:
+    """Get the session-wide audio device manager"""
+    global _device_manager
+    if _device_manager is None:
+        with _device_manager_lock:
+            if _device_manager is None:
+                _device_manager = AudioDeviceManager()
+    return _device_manager
@@ -0,0 +1,172 @@
+# src/encoding.py
+import io
+import wave
+
+import numpy as np
+
+FLAC_BLOCK_SIZE = 4096
+MAX_RICE_PARAMETER = 14
+
+# Fixed linear predictors of order 0-4 (FLAC "FIXED" subframes)
+FIXED_COEFFICIENTS = ((), (1,), (2, -1), (3, -3, 1), (4, -6, 4, -1))
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """Band-limited resampling of int16 audio via the real FFT"""
+    if src_rate == dst_rate or not len(samples):
+        return samples
+    n_out = int(round(len(samples) * dst_rate / src_rate))
+    spectrum = np.fft.rfft(samples.astype(np.float32))
+    bins = n_out // 2 + 1
+    if bins <= len(spectrum):
+        # Downsampling: drop everything above the new Nyquist, tapering the
+        # top 5% so the cut does not ring
+        spectrum = spectrum[:bins]
+        taper = max(1, bins // 20)
+        spectrum[-taper:] *= np.linspace(1.0, 0.0, taper)
+    out = np.fft.irfft(spectrum, n_out) * (n_out / len(samples))
+    return np.clip(np.round(out), -32768, 32767).astype(np.int16)
+
+
+def encode_wav(samples: np.ndarray, rate: int) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def _crc_table(poly: int, width: int) -> list[int]:
+    top = 1 << (width - 1)
+    mask = (1 << width) - 1
+    table = []
+    for byte in range(256):
+        crc = byte << (width - 8)
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) if crc & top else (crc << 1)
+        table.append(crc & mask)
+    return table
+
+
+_CRC8 = _crc_table(0x07, 8)
+_CRC16 = _crc_table(0x8005, 16)
+
+
+def crc8(data: bytes) -> int:
+    crc = 0
+    for byte in data:
+        crc = _CRC8[crc ^ byte]
+    return crc
+
+
+def crc16(data: bytes) -> int:
+    crc = 0
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ _CRC16[(crc >> 8) ^ byte]
+    return crc
+
+
+def _bits(values: np.ndarray, width: int) -> np.ndarray:
+    """MSB-first bits of each value, two's complement within `width`"""
+    shifts = np.arange(width - 1, -1, -1, dtype=np.int64)
+    bits = (values.astype(np.int64)[:, None] >> shifts) & 1
+    return bits.astype(np.uint8).ravel()
+
+
+def _rice_bits(residual: np.ndarray, k: int) -> np.ndarray:
+    """Rice-code zigzagged residuals with parameter k, fully vectorized"""
+    folded = np.where(residual >= 0, residual << 1, ((-residual) << 1) - 1)
+    quotient = folded >> k
+    lengths = quotient + 1 + k
+    starts = np.cumsum(lengths) - lengths
+    bits = np.zeros(int(lengths.sum()), dtype=np.uint8)
+    bits[starts + quotient] = 1
+    if k:
+        offsets = (starts + quotient + 1)[:, None] + np.arange(k)
+        bits[offsets.ravel()] = _bits(folded & ((1 << k) - 1), k)
+    return bits
+
+
+def _best_rice_parameter(residual: np.ndarray) -> tuple[int, int]:
+    """Rice parameter with the fewest bits, and that bit count"""
+    folded = np.abs(residual) * 2
+    costs = [
+        int((folded >> k).sum()) + len(residual) * (k + 1)
+        for k in range(MAX_RICE_PARAMETER + 1)
+    ]
+    k = int(np.argmin(costs))
+    return k, costs[k]
+
+
+def _subframe_bits(block: np.ndarray) -> np.ndarray:
+    if np.all(block == block[0]):
+        # Subframe type CONSTANT
+        header = _bits(np.array([0b00000000]), 8)
+        return np.concatenate([header, _bits(block[:1], 16)])
+
+    best: tuple[int, int, int, np.ndarray] | None = None
+    for order, coefficients in enumerate(FIXED_COEFFICIENTS):
+        if order >= len(block):
+            break
+        prediction = np.zeros(len(block) - order, dtype=np.int64)
+        for lag, coefficient in enumerate(coefficients, 1):
+            prediction += coefficient * block[order - lag : len(block) - lag]
+        residual = block[order:] - prediction
+        k, cost = _best_rice_parameter(residual)
+        if best is None or cost + 16 * order < best[1] + 16 * best[0]:
+            best = (order, cost, k, residual)
+
+    assert best is not None
+    order, cost, k, residual = best
+    if cost + 16 * order + 6 >= 16 * len(block):
+        # Incompressible block: subframe type VERBATIM
+        header = _bits(np.array([0b00000010]), 8)
+        return np.concatenate([header, _bits(block, 16)])
+    # Subframe type FIXED of this order, then a Rice-coded residual with
+    # 4-bit parameters (method 00) in a single partition (order 0000)
+    header = _bits(np.array([0b00010000 | order << 1]), 8)
+    residual_header = _bits(np.array([k]), 10)
+    return np.concatenate(
+        [header, _bits(block[:order], 16), residual_header, _rice_bits(residual, k)]
+    )
+
+
+def _utf8_number(value: int) -> bytes:
+    if value < 0x80:
+        return bytes([value])
+    if value < 0x800:
+        return bytes([0xC0 | value >> 6, 0x80 | value & 0x3F])
+    return bytes(
+        [0xE0 | value >> 12, 0x80 | (value >> 6) & 0x3F, 0x80 | value & 0x3F]
+    )
+
+
+def encode_flac(samples: np.ndarray, rate: int) -> bytes:
+    """Lossless FLAC (mono, 16-bit) using fixed predictors and Rice coding"""
+    samples = samples.astype(np.int64)
+    # Sample rate (20 bits), channels - 1 (3), bits per sample - 1 (5), total
+    # samples (36)
+    layout = (rate << 44) | (0 << 41) | (15 << 36) | len(samples)
+    streaminfo = (
+        FLAC_BLOCK_SIZE.to_bytes(2, "big") * 2
+        + bytes(6)  # min/max frame size unknown
+        + layout.to_bytes(8, "big")
+        + bytes(16)  # no MD5
+    )
+    out = bytearray(b"fLaC")
+    out += bytes([0x80]) + len(streaminfo).to_bytes(3, "big") + streaminfo
+
+    for number, start in enumerate(range(0, len(samples), FLAC_BLOCK_SIZE)):
+        block = samples[start : start + FLAC_BLOCK_SIZE]
+        header = (
+            bytes([0xFF, 0xF8, 0b0111_0000, 0b0000_1000])
+            + _utf8_number(number)
+            + (len(block) - 1).to_bytes(2, "big")
+        )
+        header += bytes([crc8(header)])
+        subframe = np.packbits(_subframe_bits(block)).tobytes()
+        frame = header + subframe
+        out += frame + crc16(frame).to_bytes(2, "big")
+    return bytes(out)
@@ -0,0 +1,259 @@
+# src/history.py
+import collections
+import math
+import queue
+import re
+import sqlite3
+import threading
+import time
+import typing as tp
+import unicodedata
+from datetime import datetime
+from pathlib import Path
+
+from .logger import StatusLogger
+from .typedefs import JSON
+
+logger = StatusLogger()
+
+MAX_RESULT_CHARS = 4000
+MAX_QUERY_TERMS = 4  # the most selective terms of a query are enough to rank
+CANDIDATES = 32
+OPTIMIZE_EVERY = 10_000  # merge the full-text index after this many inserts
+COMMAND_WEIGHT = 3.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commands (
+    id INTEGER PRIMARY KEY,
+    command TEXT NOT NULL,
+    result TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    timestamp REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS commands_timestamp ON commands (timestamp);
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    docs INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS commands_fts USING fts5 (
+    command, result, content='commands', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+TOKEN = re.compile(r"[^\W_]+")
+
+_STOP = object()
+
+
+def fold(text: str) -> str:
+    """Lowercase and drop diacritics, like the FTS5 unicode61 tokenizer"""
+    text = text.lower()
+    if not text.isascii():
+        decomposed = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return text
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN.findall(fold(text))
+
+
+class CommandHistory:
+    """Long-term command history in SQLite with full-text search.
+
+    Inserts are batched by a background writer so callers never wait on disk.
+    Searches rank the most recent full-text matches by IDF-weighted term
+    overlap, favouring hits in the command over hits in its output, and can be
+    filtered by success and time range.
+    """
+
+    def __init__(self, path: Path, flush_interval: float = 0.05):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self._queue: "queue.SimpleQueue[tp.Any]" = queue.SimpleQueue()
+        self._unoptimized = 0
+        self._db = self._connect()
+        with self._db:
+            self._db.executescript(SCHEMA)
+        self._writer = threading.Thread(
+            target=self._write_loop, name="history-writer", daemon=True
+        )
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def add(
+        self,
+        command: str,
+        result: str,
+        success: bool,
+        timestamp: tp.Optional[datetime] = None,
+    ):
+        """Queue a command for insertion"""
+        when = (timestamp or datetime.now()).timestamp()
+        self._queue.put((command, result[:MAX_RESULT_CHARS], int(success), when))
+
+    def _write_loop(self):
+        db = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            time.sleep(self.flush_interval)  # debounce bursts into one transaction
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            rows = [item for item in batch if isinstance(item, tuple)]
+            try:
+                with db:
+                    self._insert(db, rows)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not save command history: {e}")
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if _STOP in batch:
+                db.close()
+                return
+
+    def _insert(self, db: sqlite3.Connection, rows: list[tuple[tp.Any, ...]]):
+        docs: "collections.Counter[str]" = collections.Counter()
+        for command, result, success, timestamp in rows:
+            rowid = db.execute(
+                "INSERT INTO commands (command, result, success, timestamp)"
+                " VALUES (?, ?, ?, ?)",
+                (command, result, success, timestamp),
+            ).lastrowid
+            db.execute(
+                "INSERT INTO commands_fts (rowid, command, result) VALUES (?, ?, ?)",
+                (rowid, command, result),
+            )
+            docs.update(set(tokenize(f"{command} {result}")))
+        # Our own document frequencies: FTS5 can only count them by scanning
+        # every posting of a term, which is far too slow for common words
+        db.executemany(
+            "INSERT INTO terms (term, docs) VALUES (?, ?)"
+            " ON CONFLICT (term) DO UPDATE SET docs = docs + excluded.docs",
+            docs.items(),
+        )
+        self._unoptimized += len(rows)
+        if self._unoptimized >= OPTIMIZE_EVERY:
+            # Fewer index segments make newest-first scans several times faster
+            db.execute("INSERT INTO commands_fts (commands_fts) VALUES ('optimize')")
+            self._unoptimized = 0
+
+    def _weights(self, query: str) -> dict[str, float]:
+        """IDF of the most selective query terms that occur in the history"""
+        terms = list(dict.fromkeys(t for t in tokenize(query) if len(t) > 1))
+        if not terms:
+            return {}
+        placeholders = ", ".join("?" * len(terms))
+        with self.lock:
+            total = self._db.execute("SELECT MAX(id) FROM commands").fetchone()[0]
+            docs = self._db.execute(
+                f"SELECT term, docs FROM terms WHERE term IN ({placeholders})", terms
+            ).fetchall()
+        weights = {
+            term: math.log(1 + (total - count + 0.5) / (count + 0.5))
+            for term, count in docs
+        }
+        selective = sorted(weights, key=weights.__getitem__, reverse=True)
+        return {term: weights[term] for term in selective[:MAX_QUERY_TERMS]}
+
+    def search(
+        self,
+        query: tp.Optional[str] = None,
+        limit: int = 3,
+        success: tp.Optional[bool] = None,
+        since: tp.Optional[datetime] = None,
+        until: tp.Optional[datetime] = None,
+    ) -> list[JSON]:
+        """Most relevant commands for `query`, or the most recent without one"""
+        filters: list[str] = []
+        params: list[tp.Any] = []
+        if success is not None:
+            filters.append("c.success = ?")
+            params.append(int(success))
+        if since is not None:
+            filters.append("c.timestamp >= ?")
+            params.append(since.timestamp())
+        if until is not None:
+            filters.append("c.timestamp < ?")
+            params.append(until.timestamp())
+
+        if query:
+            weights = self._weights(query)
+            if not weights:
+                return []
+            # Rank the most recent matches rather than every match: scoring
+            # all postings of a common word is what makes full BM25 slow
+            sql = (
+                "SELECT c.command, c.result, c.success, c.timestamp"
+                " FROM commands_fts JOIN commands c ON c.id = commands_fts.rowid"
+                " WHERE commands_fts MATCH ?"
+                + "".join(f" AND {f}" for f in filters)
+                + " ORDER BY commands_fts.rowid DESC LIMIT ?"
+            )
+            expression = " OR ".join(f'"{term}"' for term in weights)
+            params = [expression, *params, CANDIDATES]
+        else:
+            sql = (
+                "SELECT c.command, c.result, c.success, c.timestamp FROM commands c"
+                + (" WHERE " + " AND ".join(filters) if filters else "")
+                + " ORDER BY c.id DESC LIMIT ?"
+            )
+            params.append(limit)
+        try:
+            with self.lock:
+                rows = self._db.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not search command history: {e}")
+            return []
+
+        if query:
+
+            def score(row: tuple[str, str, int, float]) -> float:
+                command, result = fold(row[0]), fold(row[1])
+                return sum(
+                    weight * COMMAND_WEIGHT if term in command else weight
+                    for term, weight in weights.items()
+                    if term in command or term in result
+                )
+
+            # Stable sort keeps newer entries first among equal scores
+            rows = sorted(rows, key=score, reverse=True)[:limit]
+        return [
+            {
+                "command": command,
+                "result": result,
+                "success": bool(ok),
+                "timestamp": datetime.fromtimestamp(timestamp).isoformat(),
+            }
+            for command, result, ok, timestamp in rows
+        ]
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self._db.execute("SELECT COUNT(*) FROM commands").fetchone()[0]
+
+    def flush(self, timeout: tp.Optional[float] = None) -> bool:
+        """Wait until every queued command is committed"""
+        if not self._writer.is_alive():
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Commit queued commands and stop the background writer"""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        with self.lock:
+            self._db.close()
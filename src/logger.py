@@ -1,27 +1,238 @@
 import datetime
+import json
+import queue
+import sys
 import threading
-import traceback
+import time
+import typing as tp
+from abc import ABC, abstractmethod
 from contextlib import contextmanager
 
 from rich.align import Align
-from rich.console import Console
+from rich.console import Console, RenderableType
+from rich.live import Live
 from rich.panel import Panel
+from rich.rule import Rule
+from rich.spinner import Spinner
+from rich.table import Table
 from rich.text import Text
 
+from .tracing import tracer
+from .typedefs import JSON
+
+MAX_EVENTS = 10_000  # queued before command output is dropped
+REFRESH_SECONDS = 1 / 12  # the renderer draws at most this often
+MAX_FRAME_LINES = 200  # command output lines drawn per frame, the latest kept
+
 console = Console()
 
+Event = tuple[float, str, JSON]
+
+
+class NullSink:
+    """Drops every event, for benchmarks and servers nobody watches"""
+
+    mode = "off"
+
+    def emit(self, kind: str, fields: JSON):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def stats(self) -> JSON:
+        return {"mode": self.mode}
+
+
+class QueueSink(ABC):
+    """Hands events to a thread of its own, which handles them in batches.
+
+    Callers only pay for a queue put. The thread takes everything queued up
+    at most every `interval` seconds, so bursts are coalesced. When the queue
+    is full, command output is dropped and counted instead of blocking the
+    caller; other events wait for room.
+    """
+
+    mode = "queue"
+
+    def __init__(self, interval: float, max_events: int = MAX_EVENTS):
+        self.interval = interval
+        self.events: "queue.Queue[tp.Optional[Event]]" = queue.Queue(max_events)
+        self.lock = threading.Lock()
+        self.count = 0
+        self.dropped = 0
+        self.unreported = 0  # dropped since the sink last said so
+        self.batches = 0
+        self.emit_ns = 0
+        self.handle_ns = 0
+        self._thread = threading.Thread(
+            target=self._run, name=f"log-{self.mode}", daemon=True
+        )
+        self._thread.start()
+
+    def emit(self, kind: str, fields: JSON):
+        start = time.perf_counter_ns()
+        dropped = 0
+        if kind == "command_output":
+            try:
+                self.events.put_nowait((time.time(), kind, fields))
+            except queue.Full:
+                dropped = 1
+        else:
+            self.events.put((time.time(), kind, fields))
+        with self.lock:
+            self.count += 1
+            self.dropped += dropped
+            self.unreported += dropped
+            self.emit_ns += time.perf_counter_ns() - start
+
+    @abstractmethod
+    def handle(self, events: list[Event]): ...
+
+    def take_unreported(self) -> int:
+        with self.lock:
+            dropped, self.unreported = self.unreported, 0
+            return dropped
+
+    def finish(self):
+        pass
+
+    def _run(self):
+        running = True
+        while running:
+            batch = [self.events.get()]
+            while True:
+                try:
+                    batch.append(self.events.get_nowait())
+                except queue.Empty:
+                    break
+            running = None not in batch
+            start = time.perf_counter_ns()
+            try:
+                self.handle([event for event in batch if event is not None])
+            except Exception as e:
+                print(f"Warning: logging failed: {e}", file=sys.stderr)
+            with self.lock:
+                self.batches += 1
+                self.handle_ns += time.perf_counter_ns() - start
+            for _ in batch:
+                self.events.task_done()
+            if running:
+                time.sleep(self.interval)
+        self.finish()
+
+    def flush(self):
+        """Wait until everything emitted so far has been handled"""
+        if self._thread.is_alive():
+            self.events.join()
+
+    def close(self):
+        if self._thread.is_alive():
+            self.events.put(None)
+            self._thread.join(timeout=5)
+
+    def stats(self) -> JSON:
+        with self.lock:
+            return {
+                "mode": self.mode,
+                "events": self.count,
+                "dropped": self.dropped,
+                "batches": self.batches,
+                "emit_ms": round(self.emit_ns / 1e6, 1),
+                "render_ms": round(self.handle_ns / 1e6, 1),
+            }
+
+
+class JsonLinesSink(QueueSink):
+    """One JSON object per event, for servers and log collectors"""
+
+    mode = "jsonl"
+
+    def __init__(self, file: tp.TextIO, interval: float = 0.1):
+        self.file = file
+        super().__init__(interval)
+
+    def handle(self, events: list[Event]):
+        dropped = self.take_unreported()
+        if dropped:
+            event = {"ts": round(time.time(), 3), "event": "dropped", "count": dropped}
+            self.file.write(json.dumps(event) + "\n")
+        for timestamp, kind, fields in events:
+            event = {"ts": round(timestamp, 3), "event": kind, **fields}
+            self.file.write(json.dumps(event, default=str, ensure_ascii=False))
+            self.file.write("\n")
+        self.file.flush()
+
+    def finish(self):
+        if self.file not in (sys.stdout, sys.stderr):
+            self.file.close()
 
-class StatusLogger:
-    def __init__(self):
-        self.start_time = None
-        self.current_status = None
-        self._status_lock = threading.Lock()
 
-    def _get_timestamp(self):
-        return datetime.datetime.now().strftime("%H:%M:%S")
+class RichRenderer(QueueSink):
+    """Draws events with rich, below which one live line shows the spinner"""
 
-    def _create_status_panel(self, title: str, message: str, style: str, emoji: str):
-        timestamp = self._get_timestamp()
+    mode = "rich"
+
+    def __init__(
+        self, console: Console = console, interval: float = REFRESH_SECONDS
+    ):
+        self.console = console
+        self.live = Live(
+            Text(""),
+            console=console,
+            refresh_per_second=1 / interval,
+            transient=True,
+            redirect_stdout=False,
+            redirect_stderr=False,
+        )
+        self.live.start()
+        super().__init__(interval)
+
+    def handle(self, events: list[Event]):
+        output: list[str] = []
+        for _, kind, fields in events:
+            if kind == "command_output":
+                output.append(fields["text"])
+                continue
+            self._print_output(output)
+            output = []
+            if kind == "status":
+                self._status(**fields)
+            elif kind == "clear":
+                self.console.clear()
+            else:
+                for renderable in getattr(self, f"_render_{kind}")(**fields):
+                    self.console.print(renderable)
+        self._print_output(output)
+
+    def finish(self):
+        self.live.stop()
+
+    def _status(self, message: tp.Optional[str], style: str):
+        if message is None:
+            self.live.update(Text(""))
+        else:
+            spinner = Spinner("dots", Text(message, style=style), style=style)
+            self.live.update(spinner)
+
+    def _print_output(self, output: list[str]):
+        """Command output that arrived during one frame, as one block"""
+        if not output:
+            return
+        lines = "\n".join(output).split("\n")
+        skipped = self.take_unreported()
+        if len(lines) > MAX_FRAME_LINES:
+            skipped += len(lines) - MAX_FRAME_LINES
+            lines = lines[-MAX_FRAME_LINES:]
+        if skipped:
+            lines.insert(0, f"… [{skipped} lines not shown]")
+        self.console.print(Text("\n".join(lines), style="dim white"))
+
+    def _status_panel(self, title: str, message: str, style: str, emoji: str):
+        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
         content = Text()
         content.append(f"[{timestamp}] ", style="dim")
         content.append(f"{emoji} {message}", style=style)
@@ -33,85 +244,46 @@ class StatusLogger:
             padding=(0, 1),
         )
 
-    @contextmanager
-    def _spinner_context(self, message: str, style: str = "cyan"):
-        with self._status_lock:
-            try:
-                if self.current_status:
-                    self.current_status.stop()
-                self.current_status = console.status(
-                    f"[{style}]{message}[/{style}]", spinner="dots"
-                )
-                self.current_status.start()
-                yield
-            except Exception as e:
-                self.error(f"Spinner context error: {e}")
-                traceback.print_exc()
-                raise
-            finally:
-                if self.current_status:
-                    self.current_status.stop()
-                    self.current_status = None
-
-    def listening(self):
-        console.clear()
-        panel = self._create_status_panel(
+    def _render_listening(self) -> list[RenderableType]:
+        panel = self._status_panel(
             "🎤 LISTENING", "Waiting for your voice...", "cyan", "🎤"
         )
-        console.print(panel)
-        console.print()
+        return [panel, ""]
 
-    def silence_detected(self):
-        console.print("[yellow]🔇 Silence detected, processing...[/yellow]")
-
-    def transcribing(self):
-        console.print()
-        self.start_time = datetime.datetime.now()
-        return self._spinner_context("📝 Transcribing audio...", "blue")
-
-    def transcription_complete(self, text: str):
-        duration = (
-            (datetime.datetime.now() - self.start_time).total_seconds()
-            if self.start_time
-            else 0
-        )
-
-        console.print(f"[green]✓ Transcription complete ({duration:.1f}s)[/green]")
-        console.print()
+    def _render_silence_detected(self) -> list[RenderableType]:
+        return ["[yellow]🔇 Silence detected, processing...[/yellow]"]
 
+    def _render_transcription_complete(
+        self, text: str, elapsed: tp.Optional[float]
+    ) -> list[RenderableType]:
         user_panel = Panel(
             Text(text, style="bold white"),
             title="[bold blue]👤 You said[/bold blue]",
             border_style="blue",
             padding=(1, 2),
         )
-        console.print(user_panel)
-        console.print()
+        return [
+            f"[green]✓ Transcription complete{_after_speech(elapsed)}[/green]",
+            "",
+            user_panel,
+            "",
+        ]
 
-    def generating_text(self):
-        self.start_time = datetime.datetime.now()
-        return self._spinner_context("🤖 Generating response...", "magenta")
-
-    def text_complete(self, text: str):
-        duration = (
-            (datetime.datetime.now() - self.start_time).total_seconds()
-            if self.start_time
-            else 0
-        )
-        console.print(f"[green]✓ Response ready ({duration:.1f}s)[/green]")
-        console.print()
+    def _render_text_complete(
+        self, elapsed: tp.Optional[float]
+    ) -> list[RenderableType]:
+        return [f"[green]✓ Response ready{_after_speech(elapsed)}[/green]", ""]
 
-    def executing_command(self, command: str):
-        console.print()
+    def _render_executing_command(self, command: str) -> list[RenderableType]:
         cmd_panel = Panel(
             Text(f"$ {command}", style="bold yellow"),
             title="[bold cyan]⚡ Executing Command[/bold cyan]",
             border_style="cyan",
             padding=(0, 1),
         )
-        console.print(cmd_panel)
+        return ["", cmd_panel]
 
-    def command_result(self, result: str):
+    def _render_command_result(self, result: str) -> list[RenderableType]:
         display_result = result[:500] + "..." if len(result) > 500 else result
 
         result_panel = Panel(
@@ -120,52 +292,54 @@ class StatusLogger:
             border_style="green",
             padding=(0, 1),
         )
-        console.print(result_panel)
-        console.print()
+        return [result_panel, ""]
 
-    def generating_speech(self):
-        self.start_time = datetime.datetime.now()
-        return self._spinner_context("🎵 Generating speech...", "blue")
+    def _render_playing_audio(
+        self, elapsed: tp.Optional[float]
+    ) -> list[RenderableType]:
+        return [f"[green]🔊 Playing audio{_after_speech(elapsed)}[/green]"]
 
-    def playing_audio(self):
-        duration = (
-            (datetime.datetime.now() - self.start_time).total_seconds()
-            if self.start_time
-            else 0
-        )
-        console.print(f"[green]🔊 Playing audio ({duration:.1f}s generation)[/green]")
+    def _render_audio_complete(self) -> list[RenderableType]:
+        return [
+            "[green]✓ Audio playback complete[/green]",
+            "",
+            Rule("[dim]Ready for next command[/dim]", style="dim"),
+            "",
+        ]
 
-    def audio_complete(self):
-        console.print("[green]✓ Audio playback complete[/green]")
-        console.print()
-        console.rule("[dim]Ready for next command[/dim]", style="dim")
-        console.print()
+    def _render_barge_in(self) -> list[RenderableType]:
+        return [
+            "[yellow]✋ Interrupted — listening to you[/yellow]",
+            "",
+            Rule(style="dim"),
+            "",
+        ]
 
-    def error(self, message: str):
+    def _render_error(self, message: str) -> list[RenderableType]:
         error_panel = Panel(
             Text(message, style="bold red"),
             title="[bold red]✗ ERROR[/bold red]",
             border_style="red",
             padding=(1, 2),
         )
-        console.print(error_panel)
-        console.print()
+        return [error_panel, ""]
 
-    def info(self, message: str):
-        console.print(f"[dim]ℹ {message}[/dim]")
+    def _render_info(self, message: str) -> list[RenderableType]:
+        return [Text(f"ℹ {message}", style="dim")]
 
-    def assistant_response(self, text: str):
+    def _render_warning(self, message: str) -> list[RenderableType]:
+        return [Text(f"⚠ {message}", style="yellow")]
+
+    def _render_assistant_response(self, text: str) -> list[RenderableType]:
         response_panel = Panel(
             Text(text, style="white"),
             title="[bold magenta]🤖 llmOS Assistant[/bold magenta]",
             border_style="magenta",
             padding=(1, 2),
         )
-        console.print(response_panel)
-        console.print()
+        return [response_panel, ""]
 
-    def system_startup(self):
-        console.clear()
+    def _render_system_startup(self) -> list[RenderableType]:
         startup_text = Text()
         startup_text.append("llmOS", style="bold magenta")
         startup_text.append(" - Voice Operating System", style="white")
@@ -176,11 +350,160 @@ class StatusLogger:
             border_style="cyan",
             padding=(1, 2),
         )
-        console.print(startup_panel)
-        console.print("[dim]Speak naturally to control your system...[/dim]")
-        console.print()
-
-    def __del__(self):
-        with self._status_lock:
-            if self.current_status:
-                self.current_status.stop()
+        return [
+            startup_panel,
+            "[dim]Speak naturally to control your system...[/dim]",
+            "",
+        ]
+
+    def _render_startup_profile(
+        self, rows: list[tuple[str, str, float]], ready: float
+    ) -> list[RenderableType]:
+        table = Table(title="🚀 Startup profile", border_style="cyan")
+        table.add_column("Phase", style="dim")
+        table.add_column("Component", style="bold")
+        table.add_column("Time", justify="right", style="green")
+        for phase, component, elapsed in rows:
+            table.add_row(phase, component, f"{elapsed * 1000:.1f} ms")
+        return [table, f"[green]🎤 Mic live after {ready * 1000:.0f} ms[/green]", ""]
+
+    def _render_trace_summary(
+        self, rows: list[tuple[str, int, float, float]]
+    ) -> list[RenderableType]:
+        table = Table(title="⏱️  Turn latency", border_style="cyan")
+        table.add_column("Stage", style="bold")
+        table.add_column("Count", justify="right", style="dim")
+        table.add_column("p50", justify="right", style="green")
+        table.add_column("p95", justify="right", style="yellow")
+        for stage, count, p50, p95 in rows:
+            table.add_row(stage, str(count), f"{p50:.1f} ms", f"{p95:.1f} ms")
+        return [table]
+
+
+Sink = tp.Union[NullSink, QueueSink]
+
+_sink: tp.Optional[Sink] = None
+_sink_lock = threading.Lock()
+
+
+def get_sink() -> Sink:
+    """Get the session-wide log sink, rendering with rich unless configured"""
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = RichRenderer()
+    return _sink
+
+
+def configure_logging(mode: str = "rich", path: tp.Optional[str] = None) -> Sink:
+    """Switch the log sink: "rich", "jsonl" (to `path` or stdout) or "off" """
+    global _sink
+    with _sink_lock:
+        if _sink is not None:
+            _sink.close()
+        if mode == "rich":
+            _sink = RichRenderer()
+        elif mode == "jsonl":
+            _sink = JsonLinesSink(open(path, "a") if path else sys.stdout)
+        elif mode == "off":
+            _sink = NullSink()
+        else:
+            raise ValueError(f"Unknown logging mode {mode!r}")
+        return _sink
+
+
+class StatusLogger:
+    """Reports what the voice loop is doing to the log sink.
+
+    Methods only queue an event; drawing happens on the sink's own thread,
+    so a slow terminal does not hold up the turn.
+    """
+
+    def _emit(self, kind: str, **fields: tp.Any):
+        get_sink().emit(kind, fields)
+
+    @contextmanager
+    def _spinner_context(self, message: str, style: str = "cyan"):
+        self._emit("status", message=message, style=style)
+        try:
+            yield
+        finally:
+            self._emit("status", message=None, style=style)
+
+    def listening(self):
+        self._emit("listening")
+
+    def silence_detected(self):
+        self._emit("silence_detected")
+
+    def transcribing(self):
+        return self._spinner_context("📝 Transcribing audio...", "blue")
+
+    def transcription_complete(self, text: str):
+        self._emit("transcription_complete", text=text, elapsed=_since_speech())
+
+    def generating_text(self):
+        return self._spinner_context("🤖 Generating response...", "magenta")
+
+    def text_complete(self, text: str):
+        self._emit("text_complete", elapsed=_since_speech())
+
+    def executing_command(self, command: str):
+        self._emit("executing_command", command=command)
+
+    def command_output(self, text: str):
+        self._emit("command_output", text=text)
+
+    def command_result(self, result: str):
+        self._emit("command_result", result=result)
+
+    def generating_speech(self):
+        return self._spinner_context("🎵 Generating speech...", "blue")
+
+    def playing_audio(self):
+        self._emit("playing_audio", elapsed=_since_speech())
+
+    def audio_complete(self):
+        self._emit("audio_complete")
+
+    def barge_in(self):
+        self._emit("barge_in")
+
+    def error(self, message: str):
+        self._emit("error", message=message)
+
+    def info(self, message: str):
+        self._emit("info", message=message)
+
+    def warning(self, message: str):
+        self._emit("warning", message=message)
+
+    def assistant_response(self, text: str):
+        self._emit("assistant_response", text=text)
+
+    def system_startup(self):
+        self._emit("clear")
+        self._emit("system_startup")
+
+    def startup_profile(self, rows: list[tuple[str, str, float]], ready: float):
+        self._emit("startup_profile", rows=rows, ready=ready)
+
+    def trace_summary(self, rows: list[tuple[str, int, float, float]]):
+        self._emit("trace_summary", rows=rows)
+
+    def flush(self):
+        get_sink().flush()
+
+    def stats(self) -> JSON:
+        """Events, drops, and time spent queueing and drawing them"""
+        return get_sink().stats()
+
+
+def _since_speech() -> tp.Optional[float]:
+    return tracer.since("speech.end")
+
+
+def _after_speech(elapsed: tp.Optional[float]) -> str:
+    """How long after the user stopped speaking, measured by the tracer"""
+    return f" ({elapsed:.1f}s after end of speech)" if elapsed is not None else ""
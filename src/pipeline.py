@@ -0,0 +1,122 @@
+# src/pipeline.py
+import queue
+import threading
+import time
+import typing as tp
+
+from .speaker import Speaker
+from .tracing import tracer
+
+if tp.TYPE_CHECKING:
+    from openai import OpenAI
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class SpeechPipeline:
+    """Synthesizes and plays sentences while later ones are still generated.
+
+    Sentences go through two bounded queues: one feeding a synthesis thread
+    and one feeding a playback thread with audio chunks as they stream in, so
+    sentence N+1 is synthesized while sentence N plays, and a slow speaker
+    applies backpressure to the producer.
+    """
+
+    def __init__(
+        self,
+        speaker: Speaker,
+        client: "OpenAI",
+        max_pending: int = 2,
+        max_chunks: int = 256,
+        on_first_audio: tp.Optional[tp.Callable[[], None]] = None,
+    ):
+        self.speaker = speaker
+        self.client = client
+        self.on_first_audio = on_first_audio
+        self.sentences: "queue.Queue[tp.Any]" = queue.Queue(maxsize=max_pending)
+        self.clips: "queue.Queue[tp.Any]" = queue.Queue(maxsize=max_chunks)
+        self.error: tp.Optional[BaseException] = None
+        self._stopped = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._synthesize, name="tts", daemon=True),
+            threading.Thread(target=self._play, name="playback", daemon=True),
+        ]
+
+    def start(self) -> "SpeechPipeline":
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def put(self, sentence: str):
+        """Queue a sentence for speech, blocking while the pipeline is full"""
+        if sentence.strip() and not self._stopped.is_set():
+            self.sentences.put(sentence.strip())
+
+    def cancel(self):
+        """Drop everything not yet played; workers keep draining their queues"""
+        self._stopped.set()
+
+    def close(self, raise_error: bool = True):
+        """Wait until everything queued has been played (or dropped).
+
+        A worker's error is raised here unless `raise_error` is False; it
+        stays in `error` either way.
+        """
+        self.sentences.put(_DONE)
+        for thread in self._threads:
+            thread.join()
+        if raise_error and self.error is not None:
+            raise self.error
+
+    def _fail(self, error: BaseException):
+        if self.error is None:
+            self.error = error
+        self._stopped.set()
+
+    def _synthesize(self):
+        try:
+            while (sentence := self.sentences.get()) is not _DONE:
+                if self._stopped.is_set():
+                    continue
+                for audio_data in self.speaker.run(
+                    content=sentence, client=self.client
+                ):
+                    self.clips.put(audio_data)
+        except Exception as e:
+            self._fail(e)
+            # Keep draining so the producer never blocks on a dead stage
+            while self.sentences.get() is not _DONE:
+                pass
+        finally:
+            self.clips.put(_DONE)
+
+    def _play(self):
+        started = 0
+        try:
+            while (audio_data := self.clips.get()) is not _DONE:
+                if self._stopped.is_set():
+                    continue
+                if not started:
+                    started = time.perf_counter_ns()
+                    tracer.mark_once("playback.start")
+                    if self.on_first_audio:
+                        self.on_first_audio()
+                self.speaker.play_audio(audio_data=audio_data)
+        except Exception as e:
+            self._fail(e)
+            while self.clips.get() is not _DONE:
+                pass
+        finally:
+            if started:
+                tracer.record("playback", started, time.perf_counter_ns())
+                tracer.mark("playback.end")
+
+    def __enter__(self) -> "SpeechPipeline":
+        return self.start()
+
+    def __exit__(self, exc_type: tp.Any, *exc: tp.Any):
+        if exc_type is not None:
+            self.cancel()
+        # Let the exception leaving the block through instead of a worker's
+        self.close(raise_error=exc_type is None)
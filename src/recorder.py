@@ -1,40 +1,116 @@
 # src/recorder.py
-from copy import copy
+import time
+import typing as tp
 
-import pyaudio
+import numpy as np
 import typing_extensions as tpe
 
-from .typedefs import Component, TypedDict
+from .buffers import CaptureRing, RingCursor
+from .devices import (
+    PA_CONTINUE,
+    PA_INPUT_OVERFLOW,
+    PA_INT16,
+    AudioDeviceManager,
+    get_device_manager,
+)
+from .logger import StatusLogger
+from .typedefs import JSON, Component, TypedDict
 
 # Constants
 CHUNK = 2048  # Increased buffer size to prevent overflow
-FORMAT = pyaudio.paInt16  # Audio format (16-bit PCM)
+FORMAT = PA_INT16  # Audio format (16-bit PCM)
 CHANNELS = 1  # Mono audio
 RATE = 44100  # Sample rate in Hz
+RING_SECONDS = 30.0  # audio kept for consumers that fall behind
+
+logger = StatusLogger()
 
 
 class Recorder(Component[TypedDict]):
+    def __init__(
+        self, devices: tp.Optional[AudioDeviceManager] = None, callback: bool = False
+    ):
+        self.devices = devices or get_device_manager()
+        self.callback = callback
+        self.ring = CaptureRing(rate=RATE, seconds=RING_SECONDS)
+        self.cursors: list[RingCursor] = []
+        self.live: tp.Optional[RingCursor] = None  # the cursor `run` reads
+
+    def start(self):
+        """Start callback capture into the ring; it runs until the devices close"""
+        self.state = self.devices.input_stream(
+            format=FORMAT,
+            channels=CHANNELS,
+            rate=RATE,
+            frames_per_buffer=CHUNK,
+            stream_callback=self._capture,
+        )
+
+    def _capture(
+        self, in_data: bytes, frame_count: int, time_info: tp.Any, status: int
+    ) -> tuple[None, int]:
+        # PortAudio's thread: one copy into the ring, no locks, no allocation
+        if status & PA_INPUT_OVERFLOW:
+            self.ring.overflows += 1
+        self.ring.write(np.frombuffer(in_data, dtype=np.int16))
+        return None, PA_CONTINUE
+
+    def cursor(self, position: tp.Optional[int] = None) -> RingCursor:
+        """A reader of its own over the captured audio, by default from now"""
+        cursor = self.ring.cursor(position)
+        self.cursors.append(cursor)
+        return cursor
+
+    def release(self, cursor: RingCursor):
+        """Stop tracking a cursor whose reader is done"""
+        if cursor in self.cursors:
+            self.cursors.remove(cursor)
+        if self.live is cursor:
+            self.live = None
+
+    def skip_to(self, position: int):
+        """Move `run`'s reader forward to sequence number `position`.
+
+        Only call this while the consumer of `run` is not reading, e.g. from
+        the loop that consumes it.
+        """
+        live = self.live
+        if live is not None and position > live.position:
+            live.position = min(position, self.ring.written)
+
+    def stats(self) -> JSON:
+        return {
+            **self.ring.stats(),
+            "lost": [round(c.lost / RATE, 2) for c in self.cursors],
+        }
+
     def run(self, **kwargs: tpe.Unpack[TypedDict]):
         """
         Generator function that reads audio from the Mac OS microphone.
 
+        The input stream belongs to the device manager and stays open between
+        turns; audio buffered while nobody was reading is dropped first.
+
+        With `callback` capture, audio goes into a ring buffer continuously
+        instead, and chunks are views into it read through a cursor of this
+        run's own, so nothing said while the consumer was busy is lost.
+
         Yields:
-                bytes: The next chunk of audio data from the microphone.
+                AudioChunk: The next chunk of audio data from the microphone.
         """
-        p = pyaudio.PyAudio()
+        if self.callback:
+            yield from self._run_callback()
+            return
 
-        # Open a stream to capture audio with larger buffer to prevent overflow
-        stream = p.open(
+        self.state = self.devices.input_stream(
             format=FORMAT,
             channels=CHANNELS,
             rate=RATE,
-            input=True,
             frames_per_buffer=CHUNK,
-            input_device_index=None,  # Use default input device
         )
-        self.state = copy(stream)
-
-        print("Listening...")
+        stale = self.state.get_read_available()
+        if stale:
+            self.state.read(stale, exception_on_overflow=False)
 
         try:
             while True:
@@ -44,14 +120,26 @@ class Recorder(Component[TypedDict]):
                 except OSError as e:
                     if "Input overflowed" in str(e):
                         # Skip overflowed data and continue
-                        print("Audio buffer overflow - skipping chunk")
+                        logger.warning("Audio buffer overflow - skipping chunk")
                         continue
                     else:
                         raise e
         except KeyboardInterrupt:
             pass  # Allow user to stop by pressing Ctrl+C
 
-        # Stop and close the stream, and terminate the PyAudio session
-        self.state.stop_stream()
-        self.state.close()
-        p.terminate()
+    def _run_callback(self) -> tp.Generator[np.ndarray, None, None]:
+        if not hasattr(self, "state"):
+            self.start()
+        cursor = self.live = self.cursor()
+
+        try:
+            while True:
+                missing = CHUNK - cursor.available()
+                if missing > 0:
+                    time.sleep(missing / RATE)
+                    continue
+                yield cursor.read(CHUNK)
+        except KeyboardInterrupt:
+            pass  # Allow user to stop by pressing Ctrl+C
+        finally:
+            self.release(cursor)
@@ -0,0 +1,308 @@
+# src/reducer.py
+import collections
+import re
+import typing as tp
+
+from .typedefs import JSON
+
+CHARS_PER_TOKEN = 4
+MIN_SECTION_TOKENS = 100
+LIST_PREVIEW = 10
+# Status lines `Terminal.format_result` and task reports put around output
+FRAMING = ("✅", "❌", "📁", "⏭️", "$ ")
+
+ANSI = re.compile(r"\x1b\[[0-9;?]*[ -/]*[@-~]|\x1b\][^\x07]*(\x07|\x1b\\)")
+PERCENT = re.compile(r"\b\d{1,3}(\.\d+)?\s?%")
+BAR = re.compile(r"[#=█▏▎▍▌▋▊▉░▒▓━─>·]{8,}")
+RATE = re.compile(r"\d(\.\d+)?\s?[kKMG]i?B/s\b|\beta\s+\d|\bETA\b")
+DIGITS = re.compile(r"\d+")
+
+GIT_SECTIONS = {
+    "Changes to be committed:": "staged",
+    "Changes not staged for commit:": "modified",
+    "Unmerged paths:": "conflicts",
+    "Untracked files:": "untracked",
+}
+TEST_COMMAND = re.compile(
+    r"\b(pytest|py\.test|unittest|tox|nox|jest|vitest|mocha|go test|cargo test|"
+    r"npm (run )?test|yarn test|pnpm test|make test|rspec|phpunit)\b"
+)
+TEST_SUMMARY = re.compile(
+    r"^=+ .*\b(passed|failed|errors?|skipped)\b.* =+$"  # pytest
+    r"|^(Tests|Test Suites|Snapshots):\s"  # jest
+    r"|^test result:"  # cargo
+    r"|^(ok|FAIL)\s+\S+\s+[\d.]+s$"  # go
+    r"|^Ran \d+ tests? in"  # unittest
+)
+# unittest's verdict. Too common a line to identify test output by itself,
+# but worth keeping once a runner is known to have produced the output
+TEST_VERDICT = re.compile(r"^(OK|FAILED)\b")
+TEST_PROBLEM = re.compile(
+    r"\b(FAIL(ED|URE)?|ERROR|Error|Exception|Traceback|assert(ion)?|panicked)\b"
+    r"|^E\s|✕|✗"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting, about 4 characters per token"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def clip_output(text: str, max_tokens: int) -> str:
+    """Keep the head and tail of long command output"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    head, tail = text[: max_chars * 2 // 3], text[-(max_chars // 3) :]
+    omitted = len(text) - len(head) - len(tail)
+    return f"{head}\n… [{omitted} characters omitted] …\n{tail}"
+
+
+def is_progress(line: str) -> bool:
+    """Progress bars, download meters and percentage counters"""
+    if BAR.search(line):
+        return True
+    return bool(PERCENT.search(line) and RATE.search(line))
+
+
+def normalize(text: str) -> list[str]:
+    """Lines as a terminal would show them, without colors or overwritten text"""
+    lines: list[str] = []
+    for line in ANSI.sub("", text).replace("\r\n", "\n").split("\n"):
+        # A carriage return redraws the line: only the last redraw is visible
+        if "\r" in line:
+            line = next((part for part in reversed(line.split("\r")) if part), "")
+        lines.append(line.rstrip())
+    return lines
+
+
+def collapse_progress(lines: list[str]) -> list[str]:
+    """Keep only the last line of each run of progress updates"""
+    kept: list[str] = []
+    run = 0
+    for line in lines:
+        if is_progress(line):
+            if run:
+                kept.pop()
+            kept.append(line)
+            run += 1
+            continue
+        if run > 1:
+            kept[-1] += f"  [{run - 1} progress updates collapsed]"
+        run = 0
+        kept.append(line)
+    if run > 1:
+        kept[-1] += f"  [{run - 1} progress updates collapsed]"
+    return kept
+
+
+def fold_repeats(lines: list[str]) -> list[str]:
+    """Fold runs of identical lines into one with a count"""
+    kept: list[str] = []
+    count = 0
+    for i, line in enumerate(lines):
+        count += 1
+        if i + 1 < len(lines) and lines[i + 1] == line:
+            continue
+        kept.append(f"{line}  [×{count}]" if count > 1 and line.strip() else line)
+        count = 0
+    return kept
+
+
+def fold_similar(lines: list[str], run: int = 4) -> list[str]:
+    """Fold runs of lines that differ only in their numbers"""
+    kept: list[str] = []
+    i = 0
+    while i < len(lines):
+        shape = DIGITS.sub("#", lines[i])
+        j = i + 1
+        while j < len(lines) and DIGITS.sub("#", lines[j]) == shape:
+            j += 1
+        if j - i >= run and lines[i].strip():
+            kept += [lines[i], f"… [{j - i - 2} similar lines] …", lines[j - 1]]
+        else:
+            kept += lines[i:j]
+        i = j
+    return kept
+
+
+def _preview(items: list[str], limit: int = LIST_PREVIEW) -> list[str]:
+    shown = [f"  {item}" for item in items[:limit]]
+    if len(items) > limit:
+        shown.append(f"  … and {len(items) - limit} more")
+    return shown
+
+
+def summarize_ls(lines: list[str]) -> list[str]:
+    entries: list[str] = []
+    directories = 0
+    for line in lines:
+        if not line.strip() or line.startswith("total "):
+            continue
+        fields = line.split()
+        if len(fields) >= 9 and re.match(r"^[-dlbcps][-rwxsStT@+.]{9}", fields[0]):
+            directories += fields[0].startswith("d")
+            entries.append(line.split(None, 8)[-1])
+        else:
+            entries += fields
+    extensions = collections.Counter(
+        entry.rsplit(".", 1)[-1] if "." in entry.strip(".") else "(none)"
+        for entry in entries
+    )
+    common = ", ".join(f".{ext}×{n}" for ext, n in extensions.most_common(5))
+    header = f"{len(entries)} entries"
+    if directories:
+        header += f" ({directories} directories)"
+    return [f"{header}; by extension: {common}", *_preview(entries, 20)]
+
+
+def summarize_paths(lines: list[str]) -> list[str]:
+    paths = [line for line in lines if line.strip()]
+    groups = collections.Counter(
+        "/".join(path.split("/")[: 3 if path.startswith("./") else 2])
+        for path in paths
+    )
+    top = ", ".join(f"{group} ({n})" for group, n in groups.most_common(8))
+    return [f"{len(paths)} paths; most under: {top}", *_preview(paths)]
+
+
+def summarize_git_status(lines: list[str]) -> list[str]:
+    summary: list[str] = []
+    sections: dict[str, list[str]] = {}
+    current = ""
+    for line in lines:
+        stripped = line.strip()
+        if stripped in GIT_SECTIONS:
+            current = GIT_SECTIONS[stripped]
+            sections[current] = []
+        elif current and line.startswith(("\t", "        ")) and stripped:
+            sections[current].append(stripped)
+        elif stripped.startswith(("On branch", "Your branch", "HEAD detached")):
+            summary.append(stripped)
+        elif len(stripped) > 3 and stripped[2] == " " and not current:
+            # --short / --porcelain: XY path
+            code = stripped[:2]
+            name = "untracked" if code == "??" else "changed"
+            sections.setdefault(name, []).append(stripped)
+    for name, files in sections.items():
+        summary.append(f"{name}: {len(files)}")
+        summary += _preview(files)
+    return summary or lines
+
+
+def summarize_git_log(lines: list[str]) -> list[str]:
+    commits: list[str] = []
+    commit = ""
+    for line in lines:
+        if line.startswith("commit "):
+            commit = line.split()[1][:10]
+        elif commit and line.startswith("    ") and line.strip():
+            commits.append(f"{commit} {line.strip()}")
+            commit = ""
+    if not commits:
+        return lines
+    return [f"{len(commits)} commits (hash subject):", *_preview(commits, 30)]
+
+
+def summarize_tests(lines: list[str]) -> list[str]:
+    """Failures with a little context, and the runner's summary lines"""
+    keep: set[int] = set()
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if TEST_SUMMARY.search(stripped) or TEST_VERDICT.search(stripped):
+            keep.add(i)
+        elif TEST_PROBLEM.search(line):
+            keep.update(range(max(0, i - 2), min(len(lines), i + 3)))
+    if not keep:
+        return lines
+    kept: list[str] = []
+    previous = -1
+    for i in sorted(keep):
+        if i > previous + 1:
+            kept.append("…")
+        kept.append(lines[i])
+        previous = i
+    return kept
+
+
+def summarizer(
+    command: str, lines: list[str]
+) -> tp.Optional[tp.Callable[[list[str]], list[str]]]:
+    """The structured summary that fits this command's output, if any"""
+    command = command.strip()
+    if re.match(r"^(ls|exa|eza)\b", command):
+        return summarize_ls
+    if re.match(r"^(find|fd|locate|git ls-files)\b", command):
+        return summarize_paths
+    if re.match(r"^git\s+status\b", command):
+        return summarize_git_status
+    if re.match(r"^git\s+log\b", command) and "--oneline" not in command:
+        return summarize_git_log
+    if TEST_COMMAND.search(command) or any(
+        TEST_SUMMARY.search(line.strip()) for line in lines[-30:]
+    ):
+        return summarize_tests
+    return None
+
+
+class OutputReducer:
+    """Shrinks command output before it goes to the LLM.
+
+    Colors, overwritten progress lines and repeated lines are always removed.
+    Output that is still over budget is summarized when the command is a known
+    one (ls, find, git status, git log, test runners), or else has runs of
+    lines that differ only in their numbers folded. Whatever is left is
+    clipped to its head and tail.
+    """
+
+    def __init__(self, max_tokens: int = 600):
+        self.max_tokens = max_tokens
+        self.outputs = 0
+        self.tokens_saved = 0
+        self.summarized: collections.Counter[str] = collections.Counter()
+
+    def reduce(
+        self, command: str, output: str, max_tokens: tp.Optional[int] = None
+    ) -> str:
+        budget = max_tokens or self.max_tokens
+        lines = fold_repeats(collapse_progress(normalize(output)))
+        text = "\n".join(lines).strip("\n")
+        if estimate_tokens(text) > budget:
+            summarize = summarizer(command, lines)
+            if summarize is not None:
+                head, body, tail = _split_framing(lines)
+                lines = head + summarize(body) + tail
+                self.summarized[summarize.__name__.replace("summarize_", "")] += 1
+            else:
+                lines = fold_similar(lines)
+            text = "\n".join(lines).strip("\n")
+        text = clip_output(text, budget)
+        self.outputs += 1
+        self.tokens_saved += estimate_tokens(output) - estimate_tokens(text)
+        return text
+
+    def reduce_sections(
+        self, sections: list[tuple[str, str]], max_tokens: tp.Optional[int] = None
+    ) -> list[str]:
+        """Reduce the outputs of several commands to share one budget"""
+        budget = max_tokens or self.max_tokens
+        share = max(MIN_SECTION_TOKENS, budget // max(1, len(sections)))
+        return [self.reduce(command, output, share) for command, output in sections]
+
+    def stats(self) -> JSON:
+        return {
+            "outputs": self.outputs,
+            "tokens_saved": self.tokens_saved,
+            "summarized": dict(self.summarized),
+        }
+
+
+def _split_framing(lines: list[str]) -> tuple[list[str], list[str], list[str]]:
+    start, end = 0, len(lines)
+    while start < end and lines[start].startswith(FRAMING):
+        start += 1
+    while end > start and (
+        not lines[end - 1].strip() or lines[end - 1].startswith(FRAMING)
+    ):
+        end -= 1
+    return lines[:start], lines[start:end], lines[end:]
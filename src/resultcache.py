@@ -0,0 +1,247 @@
+# src/resultcache.py
+import os
+import shlex
+import threading
+import time
+import typing as tp
+from collections import OrderedDict
+
+from .typedefs import JSON
+
+MAX_DIR_ENTRIES = 1000  # entries checked per directory, besides its own mtime
+UNSAFE = ("$", "`", "\n")
+
+# Seconds a result may be reused, per program, on top of the mtime checks
+READ_ONLY: dict[str, float] = {
+    "ls": 60.0,
+    "cat": 60.0,
+    "head": 60.0,
+    "tail": 60.0,
+    "wc": 60.0,
+    "stat": 60.0,
+    "file": 60.0,
+    "grep": 60.0,
+    "sort": 60.0,
+    "cut": 60.0,
+    "pwd": 300.0,
+    "whoami": 300.0,
+    "id": 300.0,
+    "hostname": 300.0,
+    "uname": 300.0,
+    "which": 300.0,
+    "df": 10.0,
+    "git": 10.0,
+}
+GIT_READ_ONLY = {"status", "log", "diff", "show", "branch", "remote", "rev-parse"}
+# Flags that make an otherwise read-only program write or walk whole trees
+UNSAFE_FLAGS = {
+    "ls": {"-R", "--recursive"},
+    "grep": {"-r", "-R", "--recursive"},
+    "sort": {"-o", "--output"},
+    "diff": {"--output"},
+    "log": {"--output"},
+    "show": {"--output"},
+    "branch": {"-d", "-D", "-m", "-M", "-c", "-C", "--delete", "--move", "--copy"},
+    "remote": {"add", "remove", "rm", "rename", "set-url", "prune"},
+}
+
+
+def _options(args: list[str]) -> set[str]:
+    """Arguments as checked against UNSAFE_FLAGS.
+
+    `--output=x` counts as `--output`, and bundled short options such as
+    `-uo` count as each of their letters as well.
+    """
+    options = set(args)
+    for arg in args:
+        if arg.startswith("--"):
+            options.add(arg.split("=", 1)[0])
+        elif arg.startswith("-") and len(arg) > 2:
+            options.update(f"-{letter}" for letter in arg[1:])
+    return options
+
+
+def _words(command: str) -> tp.Optional[list[list[str]]]:
+    """The words of each stage of a pipeline, or None for anything fancier"""
+    if any(char in command for char in UNSAFE):
+        return None
+    try:
+        lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+        lexer.whitespace_split = True
+        tokens = list(lexer)
+    except ValueError:
+        return None
+    stages: list[list[str]] = [[]]
+    for token in tokens:
+        if token == "|":
+            stages.append([])
+        elif token and all(char in "();<>|&" for char in token):
+            return None  # redirections, command lists, subshells
+        else:
+            stages[-1].append(token)
+    return stages if all(stages) else None
+
+
+def _git_paths(cwd: str) -> list[str]:
+    directory = cwd
+    while True:
+        git = os.path.join(directory, ".git")
+        if os.path.exists(git):
+            return [
+                os.path.join(git, name)
+                for name in ("HEAD", "index", "refs", "packed-refs")
+            ] + [directory]
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return []
+        directory = parent
+
+
+def classify(command: str, cwd: str) -> tp.Optional[tuple[float, list[str]]]:
+    """TTL and paths to watch if `command` only reads, otherwise None"""
+    stages = _words(command)
+    if stages is None:
+        return None
+    ttl = float("inf")
+    paths: list[str] = []
+    for words in stages:
+        program, args = os.path.basename(words[0]), words[1:]
+        if program not in READ_ONLY:
+            return None
+        if program == "git":
+            if not args or args[0] not in GIT_READ_ONLY:
+                return None
+            program, args = args[0], args[1:]
+            paths += _git_paths(cwd)
+        if UNSAFE_FLAGS.get(program, set()) & _options(args):
+            return None
+        if program == "branch" and any(not arg.startswith("-") for arg in args):
+            return None  # `git branch name` creates a branch
+        ttl = min(ttl, READ_ONLY[os.path.basename(words[0])])
+        operands = [arg for arg in args if not arg.startswith("-")]
+        if program == "grep":
+            operands = operands[1:]  # the first one is the pattern
+        elif program == "ls" and not operands:
+            operands = ["."]
+        for operand in operands:
+            if any(char in operand for char in "*?["):
+                operand = os.path.dirname(operand) or "."
+            paths.append(os.path.join(cwd, os.path.expanduser(operand)))
+    return ttl, paths
+
+
+def fingerprint(paths: list[str]) -> int:
+    """Changes when any of the paths, or a directory's entries, change"""
+    state: list[tp.Any] = []
+    for path in paths:
+        try:
+            info = os.stat(path)
+        except OSError:
+            state.append((path, None))
+            continue
+        state.append((path, info.st_mtime_ns, info.st_size, info.st_ino))
+        if os.path.isdir(path):
+            try:
+                with os.scandir(path) as entries:
+                    for i, entry in enumerate(entries):
+                        if i >= MAX_DIR_ENTRIES:
+                            break
+                        stat = entry.stat(follow_symlinks=False)
+                        state.append((entry.name, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                pass
+    return hash(tuple(state))
+
+
+class CacheEntry:
+    """A read-only command's result and the state of what it read"""
+
+    def __init__(
+        self, command: str, cwd: str, ttl: float, paths: list[str], stamp: int
+    ):
+        self.command = command
+        self.cwd = cwd
+        self.ttl = ttl
+        self.paths = paths
+        self.stamp = stamp
+        self.expires = 0.0
+        self.result: JSON = {}
+        self.seconds = 0.0
+
+
+class ResultCache:
+    """Results of read-only commands, reused while what they read is unchanged.
+
+    An entry is keyed by command and working directory and is valid until its
+    TTL runs out or the mtime, size or entries of the paths the command reads
+    change. Any command that is not read-only may change anything, so it
+    clears the whole cache.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self._entries: "OrderedDict[tuple[str, str], CacheEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.seconds_saved = 0.0
+
+    def lookup(
+        self, command: str, cwd: str
+    ) -> tuple[tp.Optional[JSON], tp.Optional[CacheEntry]]:
+        """A cached result, or else an entry to `put` once the command ran.
+
+        Both are None when the command is not read-only.
+        """
+        rule = classify(command, cwd)
+        if rule is None:
+            return None, None
+        ttl, paths = rule
+        start = time.perf_counter()
+        # Stamped before the command runs, so changes made meanwhile show up
+        stamp = fingerprint(paths)
+        checked = time.perf_counter() - start
+        with self.lock:
+            entry = self._entries.get((cwd, command))
+            if (
+                entry is not None
+                and time.monotonic() < entry.expires
+                and entry.stamp == stamp
+            ):
+                self._entries.move_to_end((cwd, command))
+                self.hits += 1
+                self.seconds_saved += max(0.0, entry.seconds - checked)
+                return {**entry.result, "cached": True}, None
+            self.misses += 1
+        return None, CacheEntry(command, cwd, ttl, paths, stamp)
+
+    def put(self, entry: CacheEntry, result: JSON, seconds: float):
+        if not result.get("success"):
+            return
+        entry.result = result
+        entry.seconds = seconds
+        entry.expires = time.monotonic() + entry.ttl
+        key = (entry.cwd, entry.command)
+        with self.lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self.lock:
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+
+    def stats(self) -> JSON:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "seconds_saved": round(self.seconds_saved, 3),
+            "invalidations": self.invalidations,
+            "entries": len(self._entries),
+        }
@@ -0,0 +1,144 @@
+# src/segmenter.py
+import re
+import typing as tp
+
+# Sentence terminators and the closing characters that may trail them
+TERMINATORS = ".!?…"
+CLOSERS = "\"')]}»”’"
+
+# Per-language abbreviations that end with a period but do not end a sentence
+ABBREVIATIONS: dict[str, frozenset[str]] = {
+    "en": frozenset(
+        {
+            "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc",
+            "e.g", "i.e", "inc", "ltd", "co", "corp", "approx", "dept", "est",
+            "fig", "no", "vol", "jan", "feb", "mar", "apr", "jun", "jul",
+            "aug", "sep", "sept", "oct", "nov", "dec",
+        }
+    ),
+    "es": frozenset(
+        {
+            "sr", "sra", "srta", "dr", "dra", "lic", "ing", "arq", "prof",
+            "ud", "uds", "vd", "vds", "etc", "p.ej", "pág", "págs", "núm",
+            "no", "tel", "av", "avda", "c", "cía", "dto", "aprox", "ej",
+            "ene", "feb", "mar", "abr", "may", "jun", "jul", "ago", "sept",
+            "oct", "nov", "dic", "admin", "atte", "depto", "vol",
+        }
+    ),
+}
+
+_WORD_BEFORE = re.compile(r"([\w.]+)$")
+
+
+class SentenceSegmenter:
+    """Incrementally splits a streamed text into completed sentences.
+
+    Only the characters that arrived since the previous call are scanned, and
+    the unfinished tail is kept until a boundary (or `flush`) completes it.
+    """
+
+    def __init__(self, language: str = "es", min_chars: int = 12):
+        self.language = language
+        self.abbreviations = ABBREVIATIONS.get(language, frozenset())
+        self.min_chars = min_chars
+        self._buffer = ""
+        self._scan_pos = 0
+
+    def feed(self, delta: str) -> list[str]:
+        """Append a streamed delta and return the sentences it completed"""
+        if not delta:
+            return []
+        self._buffer += delta
+        sentences: list[str] = []
+        start = 0
+        i = self._scan_pos
+        end = len(self._buffer)
+
+        while i < end:
+            char = self._buffer[i]
+            if char == "\n":
+                if i + 1 == end:
+                    # The next delta may start with the other half of a blank line
+                    break
+                if self._buffer[i + 1] != "\n":
+                    i += 1
+                    continue
+                # Blank lines always close a block (lists, paragraphs)
+                boundary = i + 2
+            elif char in TERMINATORS:
+                boundary = self._boundary_after(i)
+                if boundary is None:
+                    # Not decidable until more text arrives
+                    break
+                if boundary < 0:
+                    i += 1
+                    continue
+            else:
+                i += 1
+                continue
+
+            # Very short fragments ("Ok.", "1.") are merged into the next one
+            sentence = self._buffer[start:boundary].strip()
+            if len(sentence) >= self.min_chars:
+                sentences.append(sentence)
+                start = boundary
+            i = boundary
+
+        if start:
+            self._buffer = self._buffer[start:]
+            i -= start
+        self._scan_pos = i
+        return sentences
+
+    def flush(self) -> str:
+        """Return whatever is left in the buffer and reset the segmenter"""
+        tail = self._buffer.strip()
+        self._buffer = ""
+        self._scan_pos = 0
+        return tail
+
+    def _boundary_after(self, i: int) -> tp.Optional[int]:
+        """Resolve the terminator at `i`.
+
+        Returns the index just past the sentence end, -1 when the terminator
+        does not end a sentence, or None when more text is needed to decide.
+        """
+        buffer = self._buffer
+        end = len(buffer)
+        j = i + 1
+        # Swallow runs like "?!", "..." and trailing quotes or brackets
+        while j < end and (buffer[j] in TERMINATORS or buffer[j] in CLOSERS):
+            j += 1
+        if j >= end:
+            return None
+        if not buffer[j].isspace():
+            # "3.14", "file.txt", "e.g." mid-token
+            return -1
+
+        if buffer[i] == "." and j == i + 1:
+            match = _WORD_BEFORE.search(buffer, max(0, i - 32), i)
+            if match:
+                word = match.group(1).lower()
+                if word in self.abbreviations:
+                    return -1
+                if len(word) == 1 and word.isalpha():
+                    # Initials such as "J. Smith"
+                    return -1
+                if word.isdigit():
+                    # Ordinals like "1." in numbered lists or "3. de mayo"
+                    line_start = buffer.rfind("\n", 0, i) + 1
+                    if buffer[line_start:i].strip() == word:
+                        return -1
+        return j
+
+
+def segment_stream(
+    deltas: tp.Iterable[str], language: str = "es"
+) -> tp.Generator[str, None, None]:
+    """Yield completed sentences from an iterable of streamed text deltas"""
+    segmenter = SentenceSegmenter(language=language)
+    for delta in deltas:
+        yield from segmenter.feed(delta)
+    tail = segmenter.flush()
+    if tail:
+        yield tail
@@ -1,22 +1,53 @@
 # src/speaker.py
-import io
 import os
 import tempfile
+import threading
+import time
+import typing as tp
 
-import pyaudio
 import typing_extensions as tpe
-from pydub import AudioSegment  # type: ignore
-from pydub.playback import play  # type: ignore
 from src.typedefs import Component, SpeakerKwargs  # type: ignore
 
+from .devices import PA_INT16, AudioDeviceManager, AudioStream, get_device_manager
+from .logger import StatusLogger
+from .speechcache import SpeechCache, cache_key
+from .tracing import tracer
+
+# Raw PCM as returned by the speech endpoint with response_format="pcm"
+PCM_FORMAT = PA_INT16
+PCM_CHANNELS = 1
+PCM_RATE = 24000
+PCM_CHUNK = 1024
+
+logger = StatusLogger()
+
 
 class Speaker(Component[SpeakerKwargs]):
 
-    def __init__(self):
-        self.p = pyaudio.PyAudio()
+    def __init__(
+        self,
+        response_format: str = "pcm",
+        devices: tp.Optional[AudioDeviceManager] = None,
+        cache: tp.Optional[SpeechCache] = None,
+    ):
+        self.model = "tts-1-hd"
+        self.voice = "es-es-standard-a"
+        self.response_format = response_format
+        self.devices = devices or get_device_manager()
+        self.cache = cache
+        self.interrupted = threading.Event()
+        self._interrupted_ns = 0
+
+    def interrupt(self):
+        """Stop playback within one chunk and drop the rest of the synthesis"""
+        self._interrupted_ns = time.perf_counter_ns()
+        self.interrupted.set()
 
     def play_audio_with_pydub(self, audio_data: bytes):
         """Play audio using pydub for better format handling"""
+        from pydub import AudioSegment  # type: ignore
+        from pydub.playback import play  # type: ignore
+
         try:
             # Create temporary file
             with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
@@ -28,7 +59,7 @@ class Speaker(Component[SpeakerKwargs]):
             play(audio)  # type: ignore
 
         except Exception as e:
-            print(f"Pydub playback failed: {e}, trying raw PCM...")
+            logger.warning(f"Pydub playback failed: {e}, trying raw PCM...")
             self.play_audio_raw_pcm(audio_data)
         finally:
             # Clean up temp file
@@ -37,60 +68,132 @@ class Speaker(Component[SpeakerKwargs]):
             except:
                 pass
 
-    def play_audio_raw_pcm(self, audio_data: bytes):
-        """Fallback: Play as raw PCM data"""
-        FORMAT = pyaudio.paInt16
-        CHANNELS = 1
-        RATE = 24000  # Try common TTS rate
-        CHUNK = 1024
-
-        stream = self.p.open(
-            format=FORMAT,
-            channels=CHANNELS,
-            rate=RATE,
-            output=True,
-            frames_per_buffer=CHUNK,
+    def output_stream(self) -> AudioStream:
+        """Output stream for raw PCM, kept open by the device manager"""
+        return self.devices.output_stream(
+            format=PCM_FORMAT,
+            channels=PCM_CHANNELS,
+            rate=PCM_RATE,
+            frames_per_buffer=PCM_CHUNK,
         )
 
-        try:
-            audio_io = io.BytesIO(audio_data)
-            while True:
-                chunk = audio_io.read(CHUNK * 2)
-                if not chunk:
-                    break
-                stream.write(chunk)
-        finally:
-            stream.stop_stream()
-            stream.close()
+    def play_audio_raw_pcm(self, audio_data: bytes):
+        """Write raw PCM to the output stream a chunk at a time.
+
+        Each write blocks until the device has room, so checking for an
+        interrupt between chunks stops playback within about one chunk.
+        """
+        if not audio_data:
+            return
+        stream = self.output_stream()
+        step = PCM_CHUNK * 2
+        for i in range(0, len(audio_data), step):
+            if self.interrupted.is_set():
+                self._stopped()
+                return
+            stream.write(audio_data[i : i + step])
+
+    def _stopped(self):
+        """Record, once per interrupt, how long playback took to stop"""
+        started, self._interrupted_ns = self._interrupted_ns, 0
+        if started:
+            tracer.record("playback.stop", started, time.perf_counter_ns())
 
     def play_audio(self, audio_data: bytes):
-        """Play audio data through speakers with format detection"""
-        # Try pydub first (handles MP3, WAV, etc.)
-        self.play_audio_with_pydub(audio_data)
+        """Play a clip or a streamed chunk in the requested response format"""
+        if self.interrupted.is_set():
+            self._stopped()
+            return
+        if self.response_format == "pcm":
+            self.play_audio_raw_pcm(audio_data)
+        else:
+            # Encoded clips (MP3, WAV, ...) need the whole file to decode
+            self.play_audio_with_pydub(audio_data)
 
     def run(self, **kwargs: tpe.Unpack[SpeakerKwargs]):
-        client = kwargs["client"]
-        content = kwargs["content"]
-        response = client.audio.speech.create(
-            input=content,
-            model="tts-1-hd",
-            voice="es-es-standard-a",
-            response_format="mp3",  # Explicitly request MP3 format
-        )
+        """Yield synthesized audio, from the cache or as it arrives.
 
-        # Collect all audio data
-        audio_data = b""
-        for chunk in response.iter_bytes():
-            audio_data += chunk
+        PCM is yielded in whole-sample chunks; any other format is yielded as
+        a single complete clip. Nothing more is yielded once interrupted.
+        """
+        if self.cache is None:
+            yield from self.synthesize(**kwargs)
+            return
 
-        # Debug: Check audio format
-        print(f"Audio data size: {len(audio_data)} bytes")
-        print(
-            f"First few bytes: {audio_data[:10].hex() if len(audio_data) >= 10 else 'N/A'}"
+        key = cache_key(
+            kwargs["content"], self.model, self.voice, self.response_format
         )
-        # Play the complete audio
-        yield audio_data  # Still yield for compatibility
+        audio_data = self.cache.get(key)
+        if audio_data is not None:
+            tracer.mark_once("tts.first_byte", source="cache")
+            if self.response_format != "pcm":
+                yield audio_data
+                return
+            step = PCM_CHUNK * 2
+            for i in range(0, len(audio_data), step):
+                if self.interrupted.is_set():
+                    return
+                yield audio_data[i : i + step]
+            return
+
+        parts: list[bytes] = []
+        for chunk in self.synthesize(**kwargs):
+            parts.append(chunk)
+            yield chunk
+        # A cut-off clip must not be replayed as the whole phrase
+        if not self.interrupted.is_set():
+            self.cache.put(key, b"".join(parts))
+
+    def prefetch(self, **kwargs: tpe.Unpack[SpeakerKwargs]):
+        """Synthesize into the cache without playing anything"""
+        for _ in self.run(**kwargs):
+            pass
+
+    def synthesize(self, **kwargs: tpe.Unpack[SpeakerKwargs]):
+        """Stream audio for `content` from the speech endpoint.
 
-    def __del__(self):
-        """Cleanup PyAudio instance"""
-        self.p.terminate()
+        Once interrupted, the response is closed without reading the rest, so
+        the server stops synthesizing too.
+        """
+        client = kwargs["client"]
+        content = kwargs["content"]
+        if self.interrupted.is_set():
+            return
+        start = time.perf_counter_ns()
+        size = 0
+        try:
+            with client.audio.speech.with_streaming_response.create(
+                input=content,
+                model=self.model,
+                voice=self.voice,
+                response_format=self.response_format,  # type: ignore
+            ) as response:
+                if self.response_format != "pcm":
+                    audio_data = response.read()
+                    size = len(audio_data)
+                    tracer.mark_once("tts.first_byte", source="api")
+                    yield audio_data
+                    return
+
+                # Network chunks can split a 16-bit sample; carry the odd byte
+                carry = b""
+                for chunk in response.iter_bytes(PCM_CHUNK * 2):
+                    if self.interrupted.is_set():
+                        return
+                    if carry:
+                        chunk = carry + chunk
+                    cut = len(chunk) - len(chunk) % 2
+                    carry = chunk[cut:]
+                    if cut:
+                        if not size:
+                            tracer.mark_once("tts.first_byte", source="api")
+                        size += cut
+                        yield chunk[:cut]
+        finally:
+            tracer.record(
+                "tts.request",
+                start,
+                time.perf_counter_ns(),
+                chars=len(content),
+                bytes=size,
+            )
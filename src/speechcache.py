@@ -0,0 +1,158 @@
+# src/speechcache.py
+import hashlib
+import os
+import re
+import threading
+import typing as tp
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
+from .logger import StatusLogger
+from .typedefs import JSON
+
+logger = StatusLogger()
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and unicode variants that do not change the speech"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def cache_key(text: str, model: str, voice: str, response_format: str) -> str:
+    payload = "\x00".join((normalize_text(text), model, voice, response_format))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SpeechCache:
+    """Content-addressed TTS audio with an in-memory LRU and a disk tier.
+
+    Both tiers are bounded in bytes and evict least recently used entries.
+    Disk entries are plain files named after their key, so the tier survives
+    restarts and its index is rebuilt from the directory listing.
+    """
+
+    def __init__(
+        self,
+        directory: tp.Optional[Path] = None,
+        memory_bytes: int = 32 * 1024 * 1024,
+        disk_bytes: int = 512 * 1024 * 1024,
+    ):
+        self.directory = directory or Path.home() / ".cache" / "llmos" / "tts"
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_size = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._load_index()
+
+    def _load_index(self):
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            entries = sorted(
+                (entry.stat().st_mtime, entry.name, entry.stat().st_size)
+                for entry in os.scandir(self.directory)
+                if entry.is_file() and not entry.name.endswith(".tmp")
+            )
+        except OSError as e:
+            logger.warning(f"Could not open TTS cache: {e}")
+            self.disk_bytes = 0
+            return
+        for _, name, size in entries:
+            self._disk[name] = size
+            self._disk_size += size
+
+    def get(self, key: str) -> tp.Optional[bytes]:
+        with self.lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                self.bytes_saved += len(audio)
+                return audio
+            if key not in self._disk:
+                self.misses += 1
+                return None
+        try:
+            path = self.directory / key
+            audio = path.read_bytes()
+            os.utime(path)  # mtime doubles as the LRU order across restarts
+        except OSError:
+            with self.lock:
+                self._forget_disk(key)
+                self.misses += 1
+            return None
+        with self.lock:
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            self.disk_hits += 1
+            self.bytes_saved += len(audio)
+            self._remember(key, audio)
+        return audio
+
+    def put(self, key: str, audio: bytes):
+        if not audio:
+            return
+        with self.lock:
+            self._remember(key, audio)
+            if len(audio) > self.disk_bytes or key in self._disk:
+                return
+        path = self.directory / key
+        try:
+            # Write-then-rename so a crash never leaves a truncated entry; the
+            # temp name is per thread, as two threads may store the same key
+            temp = path.with_name(f"{key}.{threading.get_ident()}.tmp")
+            temp.write_bytes(audio)
+            temp.replace(path)
+        except OSError as e:
+            logger.warning(f"Could not write TTS cache entry: {e}")
+            return
+        with self.lock:
+            # Another thread may have stored the key meanwhile: count it once
+            self._forget_disk(key)
+            self._disk[key] = len(audio)
+            self._disk_size += len(audio)
+            while self._disk_size > self.disk_bytes and self._disk:
+                oldest = next(iter(self._disk))
+                try:
+                    (self.directory / oldest).unlink()
+                except OSError:
+                    pass
+                self._forget_disk(oldest)
+
+    def _remember(self, key: str, audio: bytes):
+        if len(audio) > self.memory_bytes:
+            return
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = audio
+        self._memory_size += len(audio)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def _forget_disk(self, key: str):
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_size -= size
+
+    def stats(self) -> JSON:
+        with self.lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+                "memory_bytes": self._memory_size,
+                "disk_bytes": self._disk_size,
+            }
@@ -0,0 +1,64 @@
+# src/startup.py
+import importlib
+import threading
+import time
+import typing as tp
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    """Records the import-time and init-time cost of each component"""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.rows: list[tuple[str, str, float]] = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, phase: str, component: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.rows.append((phase, component, elapsed))
+
+    def since_start(self) -> float:
+        """Seconds elapsed since the profile (i.e. the process) started"""
+        return time.perf_counter() - self.origin
+
+
+# Created when `src` is first imported, so it covers the whole startup path
+profile = StartupProfile()
+
+# Heavy third-party modules loaded off the critical path
+HEAVY_MODULES = ("openai",)
+
+
+def warm_up(
+    tasks: tp.Sequence[tuple[str, tp.Callable[[], tp.Any]]] = (),
+) -> threading.Thread:
+    """Import heavy modules and run init tasks on a background thread.
+
+    Everything here is also loaded lazily on first use, so a failure only
+    costs the warm-up, never the voice loop.
+    """
+
+    def _run():
+        for name in HEAVY_MODULES:
+            try:
+                with profile.measure("import", name):
+                    importlib.import_module(name)
+            except Exception:
+                pass
+        for component, task in tasks:
+            try:
+                with profile.measure("init", component):
+                    task()
+            except Exception:
+                pass
+
+    thread = threading.Thread(target=_run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,152 @@
+# src/tasks.py
+import time
+import typing as tp
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from .typedefs import JSON
+
+
+class TaskStep:
+    """One command of a multi-step task and the steps it waits for"""
+
+    def __init__(
+        self,
+        number: int,
+        command: str,
+        description: str = "",
+        continue_on_error: bool = False,
+        depends_on: tp.Iterable[int] = (),
+    ):
+        self.number = number
+        self.command = command
+        self.description = description
+        self.continue_on_error = continue_on_error
+        self.depends_on = set(depends_on)
+        self.results: list[str] = []
+        self.status = "pending"  # then "running", "ok", "failed" or "skipped"
+        self.seconds = 0.0
+
+    @property
+    def failed(self) -> bool:
+        return self.status == "failed"
+
+
+def _is_cd(command: str) -> bool:
+    return command == "cd" or command.startswith("cd ")
+
+
+def plan_steps(commands: list[JSON]) -> list[TaskStep]:
+    """Steps with their dependencies resolved.
+
+    A step waits for the steps listed in `depends_on` (1-based numbers of
+    earlier steps), for nothing if it is marked `parallel`, and otherwise for
+    the step before it. `cd` changes the terminal's directory for everything
+    after it, so it waits for all earlier steps and all later steps wait for it.
+    """
+    steps: list[TaskStep] = []
+    barrier: tp.Optional[int] = None
+    for number, info in enumerate(commands, 1):
+        command = (info.get("command") or "").strip()
+        if _is_cd(command):
+            depends_on = set(range(1, number))
+        elif info.get("depends_on") is not None:
+            depends_on = {
+                int(dep) for dep in info["depends_on"] if 1 <= int(dep) < number
+            }
+        elif info.get("parallel"):
+            depends_on = set()
+        else:
+            depends_on = {number - 1} if number > 1 else set()
+        if barrier is not None:
+            depends_on.add(barrier)
+        if _is_cd(command):
+            barrier = number
+        steps.append(
+            TaskStep(
+                number,
+                command,
+                info.get("description", ""),
+                bool(info.get("continue_on_error", False)),
+                depends_on,
+            )
+        )
+    return steps
+
+
+class TaskRunner:
+    """Runs task steps on a bounded worker pool as their dependencies finish.
+
+    A failed step without `continue_on_error` stops the task: steps already
+    running finish, the rest are skipped. `on_start` and `on_finish` are
+    called from the scheduling thread, in the order steps start and finish;
+    `on_output` is called from the step's worker with each result it yields.
+    """
+
+    def __init__(
+        self,
+        execute: tp.Callable[[str], tp.Iterable[str]],
+        max_workers: int = 4,
+        on_start: tp.Optional[tp.Callable[[TaskStep], None]] = None,
+        on_finish: tp.Optional[tp.Callable[[TaskStep], None]] = None,
+        on_output: tp.Optional[tp.Callable[[TaskStep, str], None]] = None,
+    ):
+        self.execute = execute
+        self.max_workers = max_workers
+        self.on_start = on_start
+        self.on_finish = on_finish
+        self.on_output = on_output
+        self.wall_seconds = 0.0
+
+    def _run_step(self, step: TaskStep):
+        start = time.perf_counter()
+        try:
+            if step.command:
+                for result in self.execute(step.command):
+                    step.results.append(result)
+                    if self.on_output:
+                        self.on_output(step, result)
+                    if "❌" in result or "error" in result.lower():
+                        step.status = "failed"
+        except Exception as e:
+            step.results.append(f"❌ Error: {str(e)}")
+            step.status = "failed"
+        if step.status != "failed":
+            step.status = "ok"
+        step.seconds = time.perf_counter() - start
+
+    def run(self, steps: list[TaskStep]) -> list[TaskStep]:
+        start = time.perf_counter()
+        finished: set[int] = set()
+        pending = list(steps)
+        running: "dict[Future[None], TaskStep]" = {}
+        stopped = False
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="task"
+        ) as pool:
+            while pending or running:
+                if not stopped:
+                    for step in [s for s in pending if s.depends_on <= finished]:
+                        pending.remove(step)
+                        step.status = "running"
+                        if self.on_start:
+                            self.on_start(step)
+                        running[pool.submit(self._run_step, step)] = step
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    finished.add(step.number)
+                    if self.on_finish:
+                        self.on_finish(step)
+                    if step.failed and not step.continue_on_error:
+                        stopped = True
+        for step in pending:
+            step.status = "skipped"
+        self.wall_seconds = time.perf_counter() - start
+        return steps
+
+    @staticmethod
+    def serial_seconds(steps: list[TaskStep]) -> float:
+        """How long the steps would have taken one after another"""
+        return sum(step.seconds for step in steps)
@@ -1,18 +1,582 @@
 # src/terminal.py
+import atexit
+import codecs
+import collections
+import functools
 import os
+import queue
+import secrets
+import shlex
+import shutil
+import signal
 import subprocess
+import threading
+import time
 import typing as tp
+import weakref
 
 import typing_extensions as tpe
 
+from .resultcache import CacheEntry, ResultCache
 from .typedefs import JSON, Component, TerminalKwargs
 
+CHUNK_BYTES = 65536
+MAX_LINE_CHARS = 8192  # longer lines are passed on in pieces
+QUEUE_CHUNKS = 32
+POLL_SECONDS = 0.1
+
+
+class OutputBuffer:
+    """Keeps the first `head` and last `tail` characters of a text stream"""
+
+    def __init__(self, head: int = 8000, tail: int = 8000):
+        self.head = head
+        self.tail = tail
+        self._head: list[str] = []
+        self._head_size = 0
+        self._tail: "collections.deque[str]" = collections.deque()
+        self._tail_size = 0
+        self.dropped = 0
+
+    def write(self, text: str):
+        if self._head_size < self.head:
+            kept = text[: self.head - self._head_size]
+            self._head.append(kept)
+            self._head_size += len(kept)
+            text = text[len(kept) :]
+        if not text:
+            return
+        self._tail.append(text)
+        self._tail_size += len(text)
+        while self._tail_size > self.tail:
+            excess = self._tail_size - self.tail
+            if len(self._tail[0]) <= excess:
+                excess = len(self._tail.popleft())
+            else:
+                self._tail[0] = self._tail[0][excess:]
+            self._tail_size -= excess
+            self.dropped += excess
+
+    def getvalue(self) -> str:
+        head, tail = "".join(self._head), "".join(self._tail)
+        if self.dropped:
+            return f"{head}\n… [{self.dropped} characters omitted] …\n{tail}"
+        return head + tail
+
+
+class CommandStream:
+    """Output of a running command, read as it arrives.
+
+    Iterating starts the command and yields its output as it arrives, in
+    blocks of whole lines from stdout or stderr. Afterwards `result` holds the
+    dictionary `execute_command` returns, with output kept to a bounded head
+    and tail. `cancel` may be
+    called from any thread, and closing the iterator early also stops the
+    command.
+    """
+
+    def __init__(self, command: str, cwd: str, env: dict[str, str], timeout: float):
+        self.command = command
+        self.cwd = cwd
+        self.env = env
+        self.timeout = timeout
+        self.result: JSON = {}
+        # Called with the result and the seconds the command took
+        self.on_result: tp.Optional[tp.Callable[[JSON, float], None]] = None
+        self._cancelled = threading.Event()
+        self._started = False
+        self._replay = ""
+
+    @classmethod
+    def finished(cls, result: JSON) -> "CommandStream":
+        """A stream that only replays its output, for commands that never run"""
+        stream = cls(result.get("command", ""), "", {}, 0)
+        stream.result = result
+        stream._started = True
+        stream._replay = result.get("output", "")
+        return stream
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def __iter__(self) -> tp.Iterator[str]:
+        if self._started:
+            if self._replay:
+                yield self._replay
+            return
+        self._started = True
+        start = time.perf_counter()
+        try:
+            process = subprocess.Popen(
+                self.command,
+                shell=True,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=self.cwd,
+                env=self.env,
+                start_new_session=True,  # so the whole process group can be killed
+            )
+        except Exception as e:
+            self.result = self._result(False, "", f"Execution error: {str(e)}")
+            return
+
+        # Bounded, so a fast writer waits for us instead of filling memory
+        chunks: "queue.Queue[tuple[str, tp.Optional[bytes]]]" = queue.Queue(
+            maxsize=QUEUE_CHUNKS
+        )
+        pipes = (("stdout", process.stdout), ("stderr", process.stderr))
+        readers = [
+            threading.Thread(target=_pump, args=(pipe, name, chunks), daemon=True)
+            for name, pipe in pipes
+        ]
+        for reader in readers:
+            reader.start()
+
+        buffers = {name: OutputBuffer() for name, _ in pipes}
+        decoders = {name: _decoder() for name, _ in pipes}
+        partial = {name: "" for name, _ in pipes}
+        deadline = time.monotonic() + self.timeout
+        open_pipes = len(readers)
+        error = ""
+        try:
+            while open_pipes:
+                error = self._stopped(deadline)
+                if error:
+                    break
+                remaining = deadline - time.monotonic()
+                try:
+                    name, chunk = chunks.get(timeout=min(POLL_SECONDS, remaining))
+                except queue.Empty:
+                    continue
+                if chunk is None:
+                    open_pipes -= 1
+                    text = decoders[name].decode(b"", final=True) + partial[name]
+                    partial[name] = ""
+                    if text:
+                        buffers[name].write(text)
+                        yield text
+                    continue
+                text = partial[name] + decoders[name].decode(chunk)
+                lines, _, partial[name] = text.rpartition("\n")
+                if len(partial[name]) > MAX_LINE_CHARS:
+                    lines, partial[name] = text, ""
+                if lines:
+                    buffers[name].write(lines + "\n")
+                    yield lines
+            else:
+                # Both pipes closed, but the process may still be running
+                while not error:
+                    try:
+                        process.wait(timeout=POLL_SECONDS)
+                        break
+                    except subprocess.TimeoutExpired:
+                        error = self._stopped(deadline)
+        finally:
+            if process.poll() is None:
+                _kill(process)
+                error = error or "Command cancelled"
+            # Unblock the readers so they can see the closed pipes and exit
+            while any(reader.is_alive() for reader in readers):
+                try:
+                    chunks.get(timeout=POLL_SECONDS)
+                except queue.Empty:
+                    pass
+            return_code = process.wait()
+            stderr = buffers["stderr"].getvalue().strip()
+            self.result = self._result(
+                not error and return_code == 0,
+                buffers["stdout"].getvalue().strip(),
+                error or stderr,
+                None if error else return_code,
+            )
+            if self.on_result is not None:
+                self.on_result(self.result, time.perf_counter() - start)
+
+    def _stopped(self, deadline: float) -> str:
+        """Why the command has to stop now, or an empty string"""
+        if self._cancelled.is_set():
+            return "Command cancelled"
+        if time.monotonic() >= deadline:
+            return f"Command timed out after {self.timeout:g} seconds"
+        return ""
+
+    def _result(
+        self,
+        success: bool,
+        output: str,
+        error: str,
+        return_code: tp.Optional[int] = None,
+    ) -> JSON:
+        result: JSON = {
+            "success": success,
+            "output": output,
+            "error": error,
+            "command": self.command,
+            "cwd": self.cwd,
+        }
+        if return_code is not None:
+            result["return_code"] = return_code
+        return result
+
+
+def _pump(
+    pipe: tp.IO[bytes],
+    name: str,
+    chunks: "queue.Queue[tuple[str, tp.Optional[bytes]]]",
+):
+    try:
+        # Whatever is available, up to CHUNK_BYTES, without waiting for more
+        read = getattr(pipe, "read1", pipe.read)
+        for chunk in iter(lambda: read(CHUNK_BYTES), b""):
+            chunks.put((name, chunk))
+    except (OSError, ValueError):
+        pass
+    finally:
+        chunks.put((name, None))
+
+
+def _decoder() -> codecs.IncrementalDecoder:
+    return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+def _kill(process: "subprocess.Popen[bytes]"):
+    """Stop a command and everything it started"""
+    killpg = getattr(os, "killpg", None)
+    try:
+        if killpg is not None:
+            killpg(process.pid, signal.SIGTERM)
+        else:
+            process.terminate()
+        process.wait(timeout=1.0)
+    except subprocess.TimeoutExpired:
+        if killpg is not None:
+            killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+
+class ShellSession:
+    """A long-lived shell that keeps its state between commands.
+
+    Commands run through `eval` in the same bash process, so `cd`, `export`,
+    `source`, aliases and functions carry over to the next command. After each
+    command the shell prints a sentinel with its exit status and working
+    directory to stdout, and another to stderr, which mark the end of its
+    output. A command that does not stop when interrupted takes the session
+    down with it; the next command starts a fresh shell.
+    """
+
+    def __init__(
+        self, cwd: str, env: dict[str, str], shell: tp.Optional[str] = None
+    ):
+        self.cwd = cwd
+        self.env = env
+        self.shell = shell or shutil.which("bash") or "/bin/sh"
+        self.process: "tp.Optional[subprocess.Popen[bytes]]" = None
+        self.chunks: "queue.Queue[tuple[str, tp.Optional[bytes]]]" = queue.Queue()
+        self.readers: list[threading.Thread] = []
+        self.lock = threading.Lock()  # one command at a time
+        self.token = secrets.token_hex(8)
+        self.commands = 0
+        self.restarts = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        if self.alive:
+            return
+        if self.process is not None:
+            self.restarts += 1
+        args = [self.shell]
+        if os.path.basename(self.shell) == "bash":
+            args += ["--noprofile", "--norc"]
+        self.process = subprocess.Popen(
+            args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=self.cwd,
+            env=self.env,
+            start_new_session=True,
+        )
+        self.chunks = queue.Queue(maxsize=QUEUE_CHUNKS)
+        self.readers = [
+            threading.Thread(
+                target=_pump, args=(pipe, name, self.chunks), daemon=True
+            )
+            for name, pipe in (
+                ("stdout", self.process.stdout),
+                ("stderr", self.process.stderr),
+            )
+        ]
+        for reader in self.readers:
+            reader.start()
+        # SIGINT stops the running command but not the shell itself
+        self.send("trap : INT\nshopt -s expand_aliases 2>/dev/null\n")
+
+    def send(self, script: str):
+        assert self.process is not None and self.process.stdin is not None
+        self.process.stdin.write(script.encode())
+        self.process.stdin.flush()
+
+    def frame(self, command: str) -> tuple[bytes, str]:
+        """The marker that ends a command's output and the script to send"""
+        self.commands += 1
+        marker = f"{self.token}:{self.commands}"
+        script = (
+            f"eval {shlex.quote(command)} </dev/null\n"
+            f"printf '{marker} %d %s\\n' $? \"$PWD\"\n"
+            f"printf '{marker}\\n' >&2\n"
+        )
+        return marker.encode(), script
+
+    def interrupt(self):
+        if self.alive:
+            assert self.process is not None
+            try:
+                os.killpg(self.process.pid, signal.SIGINT)
+            except ProcessLookupError:
+                pass
+
+    def stop(self):
+        """Kill the shell and everything it started"""
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        # Unblock the readers so they can see the closed pipes and exit
+        while any(reader.is_alive() for reader in self.readers):
+            try:
+                self.chunks.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                pass
+        self.process.wait()
+
+    def run(self, command: str, timeout: float) -> "SessionCommand":
+        return SessionCommand(self, command, timeout)
+
+
+class SessionCommand:
+    """A command run in a `ShellSession`, iterated like a `CommandStream`"""
+
+    def __init__(self, session: ShellSession, command: str, timeout: float):
+        self.session = session
+        self.command = command
+        self.timeout = timeout
+        self.result: JSON = {}
+        self.on_result: tp.Optional[tp.Callable[[JSON, float], None]] = None
+        self._cancelled = threading.Event()
+        self._started = False
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def __iter__(self) -> tp.Iterator[str]:
+        if self._started:
+            return
+        self._started = True
+        start = time.perf_counter()
+        session = self.session
+        with session.lock:
+            try:
+                session.start()
+                marker, script = session.frame(self.command)
+                session.send(script)
+            except Exception as e:
+                session.stop()
+                self.result = self._result(False, "", f"Execution error: {str(e)}")
+                return
+            reader = _FrameReader(marker)
+            deadline = time.monotonic() + self.timeout
+            error = ""
+            try:
+                while not reader.done and session.alive:
+                    if self._cancelled.is_set():
+                        error = "Command cancelled"
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        error = f"Command timed out after {self.timeout:g} seconds"
+                        break
+                    try:
+                        name, chunk = session.chunks.get(
+                            timeout=min(POLL_SECONDS, remaining)
+                        )
+                    except queue.Empty:
+                        continue
+                    yield from reader.feed(name, chunk)
+                if not reader.done and not error:
+                    assert session.process is not None
+                    status = session.process.wait()
+                    error = f"The shell exited with status {status}"
+            finally:
+                if not reader.done:
+                    error = error or "Command cancelled"
+                    self._interrupt(reader)
+                return_code = reader.return_code
+                if not reader.done:
+                    error += "; the shell session was reset"
+                    session.stop()
+                elif reader.cwd:
+                    session.cwd = reader.cwd
+                stderr = reader.buffers["stderr"].getvalue().strip()
+                self.result = self._result(
+                    not error and return_code == 0,
+                    reader.buffers["stdout"].getvalue().strip(),
+                    error or stderr,
+                    None if error else return_code,
+                )
+                if self.on_result is not None:
+                    self.on_result(self.result, time.perf_counter() - start)
+
+    def _interrupt(self, reader: "_FrameReader"):
+        """Stop the command and wait briefly for the shell to report back"""
+        session = self.session
+        session.interrupt()
+        deadline = time.monotonic() + 1.0
+        while not reader.done and session.alive and time.monotonic() < deadline:
+            try:
+                name, chunk = session.chunks.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                continue
+            for _ in reader.feed(name, chunk):
+                pass
+
+    def _result(
+        self,
+        success: bool,
+        output: str,
+        error: str,
+        return_code: tp.Optional[int] = None,
+    ) -> JSON:
+        result: JSON = {
+            "success": success,
+            "output": output,
+            "error": error,
+            "command": self.command,
+            "cwd": self.session.cwd,
+        }
+        if return_code is not None:
+            result["return_code"] = return_code
+        return result
+
+
+class _FrameReader:
+    """Splits a session's output into lines until both sentinels arrive"""
+
+    def __init__(self, marker: bytes):
+        self.marker = marker
+        self.pending = {"stdout": b"", "stderr": b""}
+        self.decoders = {name: _decoder() for name in self.pending}
+        self.buffers = {name: OutputBuffer() for name in self.pending}
+        self.framed: set[str] = set()
+        self.return_code: tp.Optional[int] = None
+        self.cwd = ""
+
+    @property
+    def done(self) -> bool:
+        return len(self.framed) == 2
+
+    def feed(self, name: str, chunk: tp.Optional[bytes]) -> tp.Iterator[str]:
+        if chunk is None or name in self.framed:
+            return
+        data = self.pending[name] + chunk
+        position = data.find(self.marker)
+        if position >= 0:
+            end = data.find(b"\n", position)
+            if end < 0:
+                self.pending[name] = data
+                return
+            self.framed.add(name)
+            self.pending[name] = b""
+            if name == "stdout":
+                fields = data[position + len(self.marker) : end].decode().split(" ", 2)
+                self.return_code = int(fields[1])
+                self.cwd = fields[2] if len(fields) > 2 else ""
+            data = data[:position]
+            lines = data[:-1] if data.endswith(b"\n") else data
+            rest = b""
+        else:
+            lines, newline, rest = data.rpartition(b"\n")
+            if not newline and len(rest) > MAX_LINE_CHARS:
+                # Hold back enough to still find a marker split across chunks
+                lines, rest = rest[: -len(self.marker)], rest[-len(self.marker) :]
+            self.pending[name] = rest
+        text = self.decoders[name].decode(lines, final=not rest and name in self.framed)
+        if text:
+            self.buffers[name].write(text + "\n")
+            yield text
+
+
+def _is_cd(command: str) -> bool:
+    return command == "cd" or command.startswith("cd ")
+
 
 class Terminal(Component[TerminalKwargs]):
-    def __init__(self):
+    def __init__(
+        self, timeout: float = 60.0, persistent: bool = False, cache: bool = False
+    ):
+        self.timeout = timeout
+        self.session: tp.Optional[ShellSession] = None
+        self.cache: tp.Optional[ResultCache] = None
         self.current_dir = os.getcwd()
         self.env = os.environ.copy()
         self.command_history: list[str] = []
+        # Commands started and not yet collected, so `cancel` can reach them
+        self._streams: "weakref.WeakSet[tp.Union[CommandStream, SessionCommand]]"
+        self._streams = weakref.WeakSet()
+        self._lock = threading.Lock()
+        if persistent:
+            self.use_session()
+        if cache:
+            self.use_cache()
+
+    @property
+    def current_dir(self) -> str:
+        return self.session.cwd if self.session is not None else self._current_dir
+
+    @current_dir.setter
+    def current_dir(self, path: str):
+        self._current_dir = path
+        if self.session is not None:
+            self.session.cwd = path
+
+    def use_session(self, enabled: bool = True):
+        """Run commands in one long-lived shell instead of a fresh one each"""
+        if enabled and self.session is None:
+            self.session = ShellSession(self.current_dir, self.env)
+            atexit.register(self.close)
+        elif not enabled and self.session is not None:
+            self.close()
+            self._current_dir = self.session.cwd
+            self.session = None
+
+    def use_cache(self, enabled: bool = True):
+        """Reuse results of read-only commands while what they read is unchanged"""
+        if enabled and self.cache is None:
+            self.cache = ResultCache()
+        elif not enabled:
+            self.cache = None
+
+    def cancel(self):
+        """Stop every command still running, from any thread"""
+        with self._lock:
+            streams = list(self._streams)
+        for stream in streams:
+            if not stream.result:
+                stream.cancel()
+
+    def close(self):
+        if self.session is not None:
+            self.session.stop()
 
     def _is_safe_command(self, command: str) -> tuple[bool, str]:
         """Check if command is safe to execute"""
@@ -58,93 +622,102 @@ class Terminal(Component[TerminalKwargs]):
                 return f"Error changing directory: {str(e)}"
         return ""
 
-    def execute_command(self, command: str) -> JSON:
-        """Execute a terminal command and return structured output"""
+    def stream_command(
+        self, command: str
+    ) -> "tp.Union[CommandStream, SessionCommand]":
+        """Start a command whose output can be read as it arrives"""
         command = command.strip()
         if not command:
-            return {"success": False, "output": "", "error": "Empty command"}
+            return CommandStream.finished(
+                {"success": False, "output": "", "error": "Empty command"}
+            )
 
         # Check for safety
         is_safe, safety_msg = self._is_safe_command(command)
         if not is_safe:
-            return {
-                "success": False,
-                "output": "",
-                "error": f"Command blocked for safety: {safety_msg}",
-                "command": command,
-            }
-
-        # Handle cd commands specially
-        cd_result = self._parse_cd_command(command)
-        if cd_result:
-            return {
-                "success": True,
-                "output": cd_result,
-                "error": "",
-                "command": command,
-                "cwd": self.current_dir,
-            }
-
-        # Store command in history
-        self.command_history.append(command)
+            return CommandStream.finished(
+                {
+                    "success": False,
+                    "output": "",
+                    "error": f"Command blocked for safety: {safety_msg}",
+                    "command": command,
+                }
+            )
 
-        try:
-            # Execute command in current directory
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=60,  # Increased timeout
-                cwd=self.current_dir,
-                env=self.env,
+        # Handle cd commands specially; a persistent shell runs them itself
+        cd_result = "" if self.session is not None else self._parse_cd_command(command)
+        if cd_result:
+            return CommandStream.finished(
+                {
+                    "success": True,
+                    "output": cd_result,
+                    "error": "",
+                    "command": command,
+                    "cwd": self.current_dir,
+                }
             )
 
-            return {
-                "success": result.returncode == 0,
-                "output": result.stdout.strip() if result.stdout else "",
-                "error": result.stderr.strip() if result.stderr else "",
-                "return_code": result.returncode,
-                "command": command,
-                "cwd": self.current_dir,
-            }
-
-        except subprocess.TimeoutExpired:
-            return {
-                "success": False,
-                "output": "",
-                "error": "Command timed out after 60 seconds",
-                "command": command,
-                "cwd": self.current_dir,
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "output": "",
-                "error": f"Execution error: {str(e)}",
-                "command": command,
-                "cwd": self.current_dir,
-            }
+        entry: tp.Optional[CacheEntry] = None
+        if self.cache is not None and not _is_cd(command):
+            cached, entry = self.cache.lookup(command, self.current_dir)
+            if cached is not None:
+                self.command_history.append(command)
+                return CommandStream.finished(cached)
+            if entry is None:
+                self.cache.invalidate()
 
-    def run(
-        self, **kwargs: tpe.Unpack[TerminalKwargs]
-    ) -> tp.Generator[str, None, None]:
-        """Execute command and yield formatted results"""
-        result = self.execute_command(kwargs["content"])
+        self.command_history.append(command)
+        stream: tp.Union[CommandStream, SessionCommand]
+        if self.session is not None:
+            # The shell reports the directory it ends up in after each command
+            stream = self.session.run(command, self.timeout)
+        else:
+            stream = CommandStream(command, self.current_dir, self.env, self.timeout)
+        if self.cache is not None and entry is not None:
+            stream.on_result = functools.partial(self.cache.put, entry)
+        with self._lock:
+            self._streams.add(stream)
+        return stream
+
+    def execute_command(self, command: str) -> JSON:
+        """Execute a terminal command and return structured output"""
+        stream = self.stream_command(command)
+        for _ in stream:
+            pass
+        return stream.result
+
+    def format_result(self, result: JSON, streamed: bool = False) -> list[str]:
+        """Status messages for a finished command.
 
-        # Format output for display
+        When its output was already `streamed` it is not repeated here.
+        """
+        messages: list[str] = []
         if result["success"]:
-            if result["output"]:
-                yield f"✅ Command executed successfully:\n{result['output']}"
+            if streamed:
+                messages.append("✅ Command executed successfully")
+            elif result["output"]:
+                output = result["output"]
+                messages.append(f"✅ Command executed successfully:\n{output}")
             else:
-                yield "✅ Command executed successfully (no output)"
+                messages.append("✅ Command executed successfully (no output)")
         else:
             error_msg = result["error"] or "Unknown error"
-            yield f"❌ Command failed:\n{error_msg}"
+            if streamed and result.get("return_code") is not None:
+                error_msg = f"exit code {result['return_code']}"
+            messages.append(f"❌ Command failed:\n{error_msg}")
 
         # Show current directory if it changed
         if "cwd" in result and result["cwd"] != os.getcwd():
-            yield f"\n📁 Current directory: {result['cwd']}"
+            messages.append(f"\n📁 Current directory: {result['cwd']}")
+        return messages
+
+    def run(
+        self, **kwargs: tpe.Unpack[TerminalKwargs]
+    ) -> tp.Generator[str, None, None]:
+        """Execute command, yielding its output as it arrives, then its status"""
+        stream = self.stream_command(kwargs["content"])
+        yield from stream
+        yield from self.format_result(stream.result, streamed=True)
 
     def get_current_directory(self) -> str:
         """Get current working directory"""
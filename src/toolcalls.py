@@ -0,0 +1,83 @@
+# src/toolcalls.py
+import json
+import typing as tp
+
+from .typedefs import JSON
+
+if tp.TYPE_CHECKING:
+    from openai.types.chat.chat_completion_chunk import ChoiceDeltaToolCall
+
+
+class ToolCall:
+    """A tool call assembled from streamed fragments"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.id = ""
+        self.name = ""
+        self.arguments = ""
+        self.parsed: tp.Optional[JSON] = None
+
+    def parse(self) -> bool:
+        """Decode the arguments once they form a complete JSON object"""
+        text = self.arguments.strip()
+        if not self.name or not text.endswith("}"):
+            return False
+        try:
+            parsed = json.loads(text)
+        except json.JSONDecodeError:
+            return False
+        self.parsed = parsed if isinstance(parsed, dict) else {}
+        return True
+
+    def message(self) -> JSON:
+        """The call as it goes in the assistant message's `tool_calls`"""
+        return {
+            "id": self.id,
+            "type": "function",
+            "function": {"name": self.name, "arguments": self.arguments},
+        }
+
+
+class ToolCallAccumulator:
+    """Assembles streamed tool-call deltas by index.
+
+    `feed` returns calls the moment their arguments parse, so they can run
+    while the model is still streaming; `finish` returns the calls that never
+    completed, with `parsed` left as None.
+    """
+
+    def __init__(self):
+        self.calls: dict[int, ToolCall] = {}
+        self._dispatched: set[int] = set()
+
+    def feed(self, deltas: "tp.Iterable[ChoiceDeltaToolCall]") -> list[ToolCall]:
+        ready: list[ToolCall] = []
+        for delta in deltas:
+            index = delta.index
+            if index is None:
+                # Some providers omit the index: a new id starts a new call
+                index = len(self.calls) if delta.id else max(self.calls, default=0)
+            call = self.calls.setdefault(index, ToolCall(index))
+            if delta.id:
+                call.id = delta.id
+            if delta.function:
+                call.name += delta.function.name or ""
+                call.arguments += delta.function.arguments or ""
+            if index not in self._dispatched and call.parse():
+                self._dispatched.add(index)
+                ready.append(call)
+        return ready
+
+    def finish(self) -> list[ToolCall]:
+        """Calls still pending at the end of the stream"""
+        pending = [
+            call
+            for index, call in sorted(self.calls.items())
+            if index not in self._dispatched
+        ]
+        self._dispatched.update(call.index for call in pending)
+        return pending
+
+    def ordered(self) -> list[ToolCall]:
+        return [call for _, call in sorted(self.calls.items())]
@@ -0,0 +1,199 @@
+# src/tracing.py
+import collections
+import json
+import math
+import os
+import threading
+import time
+import typing as tp
+from contextlib import contextmanager
+from pathlib import Path
+
+from .typedefs import JSON
+
+# Stage latencies measured from the end of speech, per turn
+TURN_MILESTONES = (
+    "stt.done",
+    "llm.first_token",
+    "tts.first_byte",
+    "playback.start",
+    "playback.end",
+)
+
+
+class Span:
+    """A timed stage of a turn; marks are spans with no duration"""
+
+    __slots__ = ("name", "turn", "start_ns", "end_ns", "thread", "args")
+
+    def __init__(
+        self, name: str, turn: int, start_ns: int, end_ns: int, args: JSON
+    ):
+        self.name = name
+        self.turn = turn
+        self.start_ns = start_ns
+        self.end_ns = end_ns
+        self.thread = threading.current_thread().name
+        self.args = args
+
+    @property
+    def ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile, `q` in [0, 100]"""
+    ordered = sorted(values)
+    rank = math.ceil(q / 100 * len(ordered)) - 1
+    return ordered[max(0, min(len(ordered) - 1, rank))]
+
+
+class Tracer:
+    """Spans and marks on the monotonic `perf_counter_ns` clock, by turn.
+
+    A turn starts when the end of speech is detected; everything recorded
+    until the next one belongs to it. Recording only appends to a bounded
+    deque under a lock, so it is cheap enough to leave on.
+    """
+
+    def __init__(self, max_spans: int = 100_000):
+        self.origin_ns = time.perf_counter_ns()
+        self.lock = threading.Lock()
+        self.spans: "collections.deque[Span]" = collections.deque(maxlen=max_spans)
+        self.turn = 0
+        self._once: set[str] = set()
+        self._first: dict[str, Span] = {}
+
+    def new_turn(self) -> int:
+        with self.lock:
+            self.turn += 1
+            self._once.clear()
+            self._first.clear()
+            return self.turn
+
+    def record(self, name: str, start_ns: int, end_ns: int, **args: tp.Any) -> Span:
+        with self.lock:
+            span = Span(name, self.turn, start_ns, end_ns, args)
+            self.spans.append(span)
+            self._first.setdefault(name, span)
+            return span
+
+    @contextmanager
+    def span(self, name: str, **args: tp.Any) -> tp.Iterator[JSON]:
+        """Time the block; the yielded dict collects extra args for the span"""
+        start = time.perf_counter_ns()
+        try:
+            yield args
+        finally:
+            self.record(name, start, time.perf_counter_ns(), **args)
+
+    def mark(self, name: str, **args: tp.Any):
+        now = time.perf_counter_ns()
+        self.record(name, now, now, **args)
+
+    def mark_once(self, name: str, **args: tp.Any) -> bool:
+        """Mark only the first occurrence of `name` in the current turn"""
+        with self.lock:
+            if name in self._once:
+                return False
+            self._once.add(name)
+        self.mark(name, **args)
+        return True
+
+    def since(self, name: str) -> tp.Optional[float]:
+        """Seconds since the first `name` of this turn started, if recorded"""
+        with self.lock:
+            span = self._first.get(name)
+        if span is None:
+            return None
+        return (time.perf_counter_ns() - span.start_ns) / 1e9
+
+    def stage_times(self) -> "dict[str, list[float]]":
+        """Milliseconds per span name, and per milestone since end of speech"""
+        with self.lock:
+            spans = list(self.spans)
+        stages: "dict[str, list[float]]" = collections.defaultdict(list)
+        speech_end: dict[int, int] = {}
+        for span in spans:
+            if span.name == "speech.end":
+                speech_end[span.turn] = span.end_ns
+            elif span.end_ns > span.start_ns:
+                stages[span.name].append(span.ms)
+        for span in spans:
+            if span.name in TURN_MILESTONES and span.turn in speech_end:
+                latency = (span.start_ns - speech_end[span.turn]) / 1e6
+                stages[f"speech.end → {span.name}"].append(latency)
+        return stages
+
+    def summary(self) -> list[tuple[str, int, float, float]]:
+        """(stage, count, p50 ms, p95 ms) rows"""
+        return [
+            (name, len(times), percentile(times, 50), percentile(times, 95))
+            for name, times in sorted(self.stage_times().items())
+        ]
+
+    def events(self) -> list[JSON]:
+        """Spans as JSON objects, times in microseconds since the tracer started"""
+        with self.lock:
+            spans = list(self.spans)
+        return [
+            {
+                "name": span.name,
+                "turn": span.turn,
+                "ts_us": (span.start_ns - self.origin_ns) / 1000,
+                "dur_us": (span.end_ns - span.start_ns) / 1000,
+                "thread": span.thread,
+                **({"args": span.args} if span.args else {}),
+            }
+            for span in spans
+        ]
+
+    def write_jsonl(self, path: Path):
+        with open(path, "w") as f:
+            for event in self.events():
+                f.write(json.dumps(event, default=str) + "\n")
+
+    def write_chrome(self, path: Path):
+        """Chrome trace event format, for chrome://tracing or Perfetto"""
+        threads: dict[str, int] = {}
+        trace: list[JSON] = []
+        for event in self.events():
+            tid = threads.setdefault(event["thread"], len(threads) + 1)
+            entry: JSON = {
+                "name": event["name"],
+                "cat": event["name"].split(".", 1)[0],
+                "pid": os.getpid(),
+                "tid": tid,
+                "ts": event["ts_us"],
+                "args": {"turn": event["turn"], **event.get("args", {})},
+            }
+            if event["dur_us"]:
+                entry.update(ph="X", dur=event["dur_us"])
+            else:
+                entry.update(ph="i", s="t")
+            trace.append(entry)
+        trace += [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": os.getpid(),
+                "tid": tid,
+                "args": {"name": name},
+            }
+            for name, tid in threads.items()
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f, default=str)
+
+    def export(self, directory: Path) -> list[Path]:
+        """Write the trace as JSONL and Chrome trace files; returns their paths"""
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = directory / time.strftime("trace-%Y%m%d-%H%M%S")
+        jsonl, chrome = stem.with_suffix(".jsonl"), stem.with_suffix(".json")
+        self.write_jsonl(jsonl)
+        self.write_chrome(chrome)
+        return [jsonl, chrome]
+
+
+# Created when `src` is first imported, like the startup profile
+tracer = Tracer()
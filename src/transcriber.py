@@ -1,78 +1,127 @@
-import io
+import collections
+import re
 import time
 import typing as tp
+from concurrent.futures import Future, ThreadPoolExecutor
 
 import numpy as np
-import torch
 import typing_extensions as tpe
-from pydub import AudioSegment  # type: ignore
 
-from .typedefs import Component, TranscriberKwargs
+from .buffers import UtteranceBuffer
+from .encoding import encode_flac, encode_wav, resample
+from .logger import StatusLogger
+from .tracing import tracer
+from .typedefs import AudioChunk, Component, TranscriberKwargs
+from .vad import SpectralVAD, VoiceActivityDetector
+
+if tp.TYPE_CHECKING:
+    from openai import OpenAI
+
+RATE = 44100
+UPLOAD_RATE = 16000  # Whisper resamples to 16 kHz mono anyway
+MAX_UPLOADS = 100  # recent uploads kept for stats
+
+logger = StatusLogger()
 
 
 class Transcriber(Component[TranscriberKwargs]):
 
-    def __init__(self):
-        self.audio: torch.Tensor | None = None
-        self.duration: float = 0
-        self.silence_threshold: float = 0.01
-        self.silence_duration: float = 0
-        self.last_audio_time: float = time.time()
+    def __init__(
+        self,
+        vad: tp.Optional[VoiceActivityDetector] = None,
+        upload_format: str = "flac",
+    ):
+        self.audio = UtteranceBuffer(rate=RATE)
+        self.upload_format = upload_format
+        self.uploads: collections.deque[dict[str, float]] = collections.deque(
+            maxlen=MAX_UPLOADS
+        )
+        self.vad = vad or SpectralVAD(rate=RATE)
+        self.silence_samples: int = 0
         self.min_audio_duration: float = 1.5
-        self.silence_timeout: float = 2.5
-
-    def load_audio(self, *, chunk: bytes) -> tuple[torch.Tensor, int]:
-        if not chunk:
-            return torch.tensor([]), 44100
-        audio_np = np.frombuffer(chunk, dtype=np.int16).astype(np.float32) / 32768.0
-        audio = torch.from_numpy(audio_np).unsqueeze(0)  # type: ignore
-        sr = 44100
-        return audio, sr
-
-    def is_silent(self, audio: torch.Tensor) -> bool:
-        if audio.numel() == 0:
+        self.max_pause: float = 1.0
+        self.silence_timeout: float = 1.2
+        # Cut an utterance that never ends, e.g. noise the VAD takes for speech
+        self.max_utterance: float = 30.0
+
+    @property
+    def silence_duration(self) -> float:
+        """Seconds of non-speech since the last speech frame"""
+        return self.silence_samples / RATE
+
+    def load_audio(self, *, chunk: AudioChunk) -> tuple[np.ndarray, int]:
+        """Zero-copy int16 view over a captured chunk"""
+        if isinstance(chunk, np.ndarray):
+            return chunk, RATE
+        return np.frombuffer(chunk, dtype=np.int16), RATE
+
+    def update_silence(self, audio: np.ndarray) -> bool:
+        """Run the VAD over a chunk, update the silence count and report speech"""
+        speech = self.vad.process(audio)
+        if speech.any():
+            # Only the frames after the last speech frame count as silence
+            trailing = len(speech) - 1 - int(np.flatnonzero(speech)[-1])
+            self.silence_samples = trailing * self.vad.frame_length
             return True
-        rms = torch.sqrt(torch.mean(audio**2))
-        return bool(rms < self.silence_threshold)
+        self.silence_samples += len(audio)
+        return False
 
-    def handle_stream(self, *, stream: tp.Generator[bytes, None, None]):
+    def handle_stream(self, *, stream: tp.Generator[AudioChunk, None, None]):
         for chunk in stream:
             audio, sr = self.load_audio(chunk=chunk)
 
-            if audio.numel() == 0:
+            if audio.size == 0:
                 continue
 
-            current_time = time.time()
-            chunk_duration = audio.shape[1] / sr
+            speaking = self.update_silence(audio)
 
-            if self.is_silent(audio):
-                self.silence_duration += current_time - self.last_audio_time
-            else:
-                self.silence_duration = 0
-
-            self.last_audio_time = current_time
-
-            # Only accumulate non-silent audio or audio during active speech
-            if not self.is_silent(audio) or (
-                self.audio is not None and self.silence_duration < 1.0
-            ):
-                if self.audio is None:
-                    self.audio = audio
-                    self.duration = chunk_duration
-                else:
-                    self.audio = torch.cat([self.audio, audio], dim=1)
-                    self.duration += chunk_duration
-
-            # Yield accumulated audio when silence threshold is reached
-            if self.silence_duration >= self.silence_timeout:
-                if self.audio is not None and self.duration >= self.min_audio_duration:
-                    yield self.audio.numpy().squeeze(), sr
+            # Only accumulate speech, plus short pauses once speech started
+            if speaking or (len(self.audio) and self.silence_duration < self.max_pause):
+                self.audio.append(audio)
+
+            # Yield accumulated audio when silence threshold or the cap is reached
+            capped = self.audio.duration >= self.max_utterance
+            if capped or self.silence_duration >= self.silence_timeout:
+                if self.audio.duration >= self.min_audio_duration:
+                    tracer.new_turn()
+                    tracer.mark("speech.end", seconds=self.audio.duration)
+                    # The view stays valid until the next chunk is appended
+                    yield self.audio.view(), sr
                 self._reset_buffer()
 
+    def close(self):
+        """Stop background transcription; this one runs inline and has none"""
+
     def _reset_buffer(self):
-        self.audio = None
-        self.duration = 0
-        self.silence_duration = 0
+        self.audio.clear()
+        self.silence_samples = 0
+
+    def encode(self, audio_array: np.ndarray, sr: int) -> tuple[str, bytes, str]:
+        """Resample to 16 kHz and encode the upload, recording size and cost"""
+        start = time.perf_counter()
+        samples = resample(audio_array, sr, UPLOAD_RATE)
+        if self.upload_format == "flac":
+            upload = ("audio.flac", encode_flac(samples, UPLOAD_RATE), "audio/flac")
+        else:
+            upload = ("audio.wav", encode_wav(samples, UPLOAD_RATE), "audio/wav")
+        self.uploads.append(
+            {
+                "seconds": len(audio_array) / sr,
+                "bytes": len(upload[1]),
+                "encode_ms": (time.perf_counter() - start) * 1000,
+            }
+        )
+        return upload
+
+    def transcribe(self, client: "OpenAI", audio_array: np.ndarray, sr: int) -> str:
+        with tracer.span("stt.encode"):
+            upload = self.encode(audio_array, sr)
+        with tracer.span("stt.request", bytes=len(upload[1])):
+            response = client.audio.transcriptions.create(
+                file=upload,
+                model="whisper-large-v3",
+            )
+        return response.text.strip()
 
     def run(self, **kwargs: tpe.Unpack[TranscriberKwargs]):
         for audio_array, sr in self.handle_stream(stream=kwargs["stream"]):
@@ -80,30 +129,129 @@ class Transcriber(Component[TranscriberKwargs]):
             if len(audio_array) == 0:
                 continue
 
-            # Convert float32 [-1.0, 1.0] to int16 for pydub
-            audio_int16 = (np.clip(audio_array, -1.0, 1.0) * 32767).astype(np.int16)
+            try:
+                text = self.transcribe(kwargs["client"], audio_array, sr)
+                tracer.mark("stt.done")
+                if text:  # Only yield non-empty transcriptions
+                    yield text
+            except Exception as e:
+                logger.error(f"Transcription error: {e}")
+                continue
 
-            # Create a WAV audio segment
-            segment = AudioSegment(
-                audio_int16.tobytes(),
-                frame_rate=sr,
-                sample_width=2,
-                channels=1,
-            )
 
-            # Export to in-memory WAV
-            buffer = io.BytesIO()
-            segment.export(buffer, format="wav")  # type: ignore
-            buffer.seek(0)
+def merge_transcripts(previous: str, current: str, max_overlap: int = 12) -> str:
+    """Join transcripts of two overlapping windows, dropping the repeated words.
 
-            try:
-                client = kwargs["client"]
-                response = client.audio.transcriptions.create(
-                    file=("audio.wav", buffer.read(), "audio/wav"),
-                    model="whisper-large-v3",
-                )
-                if response.text.strip():  # Only yield non-empty transcriptions
-                    yield response.text
-            except Exception as e:
-                print(f"Transcription error: {e}")
+    The words cut at a window edge are often misheard, so the match may skip
+    the last word of `previous` and the first word of `current`.
+    """
+    prev_words = previous.split()
+    cur_words = current.split()
+    prev = [re.sub(r"\W", "", w.lower()) for w in prev_words[-max_overlap:]]
+    cur = [re.sub(r"\W", "", w.lower()) for w in cur_words[:max_overlap]]
+
+    for size in range(min(len(prev), len(cur)), 0, -1):
+        for trim in (0, 1):
+            for skip in (0, 1):
+                if (trim or skip) and size < 2:
+                    continue
+                tail = prev[len(prev) - trim - size : len(prev) - trim]
+                if tail == cur[skip : skip + size]:
+                    kept = prev_words[: len(prev_words) - trim]
+                    return " ".join(kept + cur_words[skip + size :])
+    return " ".join(prev_words + cur_words)
+
+
+class StreamingTranscriber(Transcriber):
+    """Transcribes windows of the utterance while the user is still speaking.
+
+    A window is sent in the background once `min_window` seconds of new audio
+    have built up and the speaker pauses briefly, or unconditionally after
+    `max_window` seconds; forced cuts overlap the previous window by `overlap`
+    seconds and are merged by word overlap. At end of speech only the audio
+    after the last window is left to transcribe.
+    """
+
+    def __init__(
+        self,
+        vad: tp.Optional[VoiceActivityDetector] = None,
+        min_window: float = 3.0,
+        max_window: float = 8.0,
+        overlap: float = 1.0,
+        cut_pause: float = 0.25,
+    ):
+        super().__init__(vad)
+        self.min_window = min_window
+        self.max_window = max_window
+        self.overlap = overlap
+        self.cut_pause = cut_pause
+        self.executor = ThreadPoolExecutor(max_workers=2)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, **kwargs: tpe.Unpack[TranscriberKwargs]):
+        client = kwargs["client"]
+        # (future transcript, whether the window overlaps the previous one)
+        windows: list[tuple["Future[str]", bool]] = []
+        submitted = 0
+        speech_since_cut = False
+
+        def submit(start: int, end: int, overlapped: bool):
+            # Copy the window: the buffer is rewound and reused after the flush
+            samples = self.audio.view()[start:end].copy()
+            future = self.executor.submit(self.transcribe, client, samples, RATE)
+            windows.append((future, overlapped))
+
+        for chunk in kwargs["stream"]:
+            audio, _ = self.load_audio(chunk=chunk)
+            if audio.size == 0:
+                continue
+
+            speaking = self.update_silence(audio)
+            speech_since_cut = speech_since_cut or speaking
+            if speaking or (len(self.audio) and self.silence_duration < self.max_pause):
+                self.audio.append(audio)
+
+            held = len(self.audio)
+            pending = (held - submitted) / RATE
+            paused = self.silence_duration >= self.cut_pause
+            if speech_since_cut and pending >= self.min_window:
+                if paused:
+                    submit(submitted, held, overlapped=False)
+                    submitted, speech_since_cut = held, False
+                elif pending >= self.max_window:
+                    start = max(0, submitted - int(self.overlap * RATE))
+                    submit(start, held, overlapped=bool(submitted))
+                    submitted, speech_since_cut = held, False
+
+            capped = self.audio.duration >= self.max_utterance
+            if not capped and self.silence_duration < self.silence_timeout:
                 continue
+
+            if self.audio.duration >= self.min_audio_duration:
+                tracer.new_turn()
+                tracer.mark("speech.end", seconds=self.audio.duration)
+                if speech_since_cut and held > submitted:
+                    submit(submitted, held, overlapped=False)
+                text = ""
+                for future, overlapped in windows:
+                    try:
+                        part = future.result()
+                    except Exception as e:
+                        logger.error(f"Transcription error: {e}")
+                        continue
+                    if overlapped:
+                        text = merge_transcripts(text, part)
+                    else:
+                        text = f"{text} {part}".strip()
+                tracer.mark("stt.done", windows=len(windows))
+                if text:
+                    yield text
+            else:
+                for future, _ in windows:
+                    future.cancel()
+            windows = []
+            submitted = 0
+            speech_since_cut = False
+            self._reset_buffer()
@@ -0,0 +1,155 @@
+# src/transport.py
+import threading
+import time
+import typing as tp
+
+import httpx
+
+from .tracing import percentile
+from .typedefs import JSON
+
+if tp.TYPE_CHECKING:
+    from .clients import ClientPool
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class StageTransport(httpx.BaseTransport):
+    """Sends one stage's requests over the pool's shared transport.
+
+    Requests that fail before a response (connection refused or reset, a
+    keep-alive connection the server already closed) or get a retryable
+    status are retried with full jitter. httpcore's trace events tell
+    whether each request opened a new connection and how long that took.
+    """
+
+    def __init__(self, pool: "ClientPool", stage: str, retries: int):
+        self.pool = pool
+        self.stage = stage
+        self.retries = retries
+        self.requests = 0
+        self.connects = 0
+        self.connect_ms: list[float] = []
+        self.retried = 0
+        self.failed = 0
+        self.http2 = 0
+        self.pings = 0
+        self.warmed = 0  # connections opened by pings, ahead of requests
+        self.last_used = 0.0
+        self.lock = threading.Lock()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        ping = bool(request.extensions.get("ping"))
+        retries = 0 if ping else self.retries
+        attempt = 0
+        while True:
+            setup: list[float] = []
+            request.extensions["trace"] = _setup_tracer(setup)
+            try:
+                response = self.pool.transport.handle_request(request)
+            except (
+                httpx.ConnectError,
+                httpx.ConnectTimeout,
+                httpx.RemoteProtocolError,
+            ):
+                if attempt >= retries:
+                    self._count(ping, setup, failed=True)
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    self._count(ping, setup, response=response)
+                    content_type = response.headers.get("content-type", "")
+                    if content_type.startswith("text/event-stream"):
+                        response.stream = EventStream(response.stream)
+                    return response
+                response.read()  # so the connection goes back to the pool
+                response.close()
+            attempt += 1
+            with self.lock:
+                self.retried += 1
+            time.sleep(self.pool.backoff(attempt))
+
+    def _count(
+        self,
+        ping: bool,
+        setup: list[float],
+        response: tp.Optional[httpx.Response] = None,
+        failed: bool = False,
+    ):
+        with self.lock:
+            self.last_used = time.monotonic()
+            opened = len(setup) == 2
+            if opened:
+                self.connect_ms.append((setup[1] - setup[0]) * 1000)
+            if ping:
+                self.pings += 1
+                self.warmed += opened
+                return
+            self.requests += 1
+            self.connects += opened
+            self.failed += failed
+            if response is not None:
+                self.http2 += response.extensions.get("http_version") == b"HTTP/2"
+
+    def stats(self) -> JSON:
+        with self.lock:
+            reused = self.requests - self.connects
+            connect_ms = percentile(self.connect_ms, 50) if self.connect_ms else 0.0
+            return {
+                "requests": self.requests,
+                "connections": self.connects + self.warmed,
+                "reuse_rate": round(reused / max(1, self.requests), 2),
+                "connect_ms_p50": round(connect_ms, 1),
+                "retries": self.retried,
+                "failed": self.failed,
+                "pings": self.pings,
+                "http2": self.http2,
+            }
+
+    def close(self):
+        pass  # the pool owns the shared transport
+
+
+class EventStream(httpx.SyncByteStream):
+    """A server-sent event stream that is read to its end when closed at [DONE].
+
+    The OpenAI client stops reading a completion at the [DONE] event and
+    closes the response, which on HTTP/1.1 throws its connection away with
+    only the end of the chunked body unread. Reading that off first puts the
+    connection back in the pool. A stream closed before [DONE] (a cancelled
+    reply) is closed at once, as before.
+    """
+
+    def __init__(self, stream: httpx.SyncByteStream):
+        self.stream = stream
+        self.chunks = iter(stream)
+        self.done = False
+
+    def __iter__(self) -> tp.Iterator[bytes]:
+        for chunk in self.chunks:
+            self.done = chunk.rstrip().endswith(b"[DONE]")
+            yield chunk
+
+    def close(self):
+        if self.done:
+            try:
+                for _ in self.chunks:
+                    pass
+            except httpx.HTTPError:
+                pass
+        self.stream.close()
+
+
+def _setup_tracer(setup: list[float]) -> tp.Callable[[str, tp.Any], None]:
+    """An httpcore trace hook noting when a new connection starts and is ready"""
+
+    def trace(event: str, info: tp.Any):
+        if event == "connection.connect_tcp.started":
+            setup[:] = [time.perf_counter()]
+        elif setup and event in (
+            "connection.connect_tcp.complete",
+            "connection.start_tls.complete",
+        ):
+            setup[1:] = [time.perf_counter()]
+
+    return trace
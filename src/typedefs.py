@@ -2,9 +2,14 @@ import typing as tp
 from abc import ABC, abstractmethod
 
 import typing_extensions as tpe
-from openai import OpenAI
+
+if tp.TYPE_CHECKING:
+    import numpy as np
+    from openai import OpenAI
 
 JSON: tpe.TypeAlias = dict[str, tp.Any]
+# Captured audio: raw int16 bytes, or an int16 view into the capture ring
+AudioChunk: tpe.TypeAlias = tp.Union[bytes, "np.ndarray"]
 
 
 class TypedDict(tpe.TypedDict): ...
@@ -20,8 +25,8 @@ class Component(ABC, tp.Generic[T]):
 
 
 class TranscriberKwargs(TypedDict):
-    stream: tp.Generator[bytes, None, None]
-    client: OpenAI
+    stream: tp.Generator[AudioChunk, None, None]
+    client: "OpenAI"
 
 
 class TerminalKwargs(TypedDict):
@@ -29,7 +34,7 @@ class TerminalKwargs(TypedDict):
 
 
 class SpeakerKwargs(TerminalKwargs):
-    client: OpenAI
+    client: "OpenAI"
 
 
 ChatbotKwargs = SpeakerKwargs
@@ -1,12 +1,22 @@
 # src/utils.py
-import spacy
+import functools
+import typing as tp
 
-nlp = spacy.load("en_core_web_sm")
+if tp.TYPE_CHECKING:
+    from spacy.language import Language
+
+
+@functools.cache
+def get_nlp() -> "Language":
+    """Carga el modelo de spaCy la primera vez que se usa"""
+    import spacy
+
+    return spacy.load("en_core_web_sm")
 
 
 def chunk_sentences(text: str, n: int = 4) -> list[str]:
     """Divide el texto en bloques de n oraciones"""
-    doc = nlp(text)
+    doc = get_nlp()(text)
     sentences = [sent.text.strip() for sent in doc.sents]
     chunks = [" ".join(sentences[i : i + n]) for i in range(0, len(sentences), n)]
     return chunks
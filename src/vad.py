@@ -0,0 +1,147 @@
+# src/vad.py
+import collections
+import typing as tp
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+class VoiceActivityDetector(ABC):
+    """Classifies fixed-length frames of int16 audio as speech or not.
+
+    Samples that do not fill a whole frame are carried over to the next call,
+    so callers can feed chunks of any size and count time in samples.
+    """
+
+    def __init__(self, rate: int = 44100, frame_ms: float = 20.0):
+        self.rate = rate
+        self.frame_length = int(rate * frame_ms / 1000)
+        self._pending = np.zeros(0, dtype=np.int16)
+
+    def frames(self, samples: np.ndarray) -> np.ndarray:
+        """Split samples into a (n_frames, frame_length) float32 array"""
+        if len(self._pending):
+            samples = np.concatenate([self._pending, samples])
+        n_frames = len(samples) // self.frame_length
+        used = n_frames * self.frame_length
+        self._pending = samples[used:].copy()
+        return samples[:used].reshape(n_frames, self.frame_length) / np.float32(
+            32768.0
+        )
+
+    @property
+    def carried(self) -> int:
+        """Samples held over until they fill a frame"""
+        return len(self._pending)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Speech flags for every complete frame in `samples`"""
+        frames = self.frames(samples)
+        if not len(frames):
+            return np.zeros(0, dtype=bool)
+        return self.classify(frames)
+
+    @abstractmethod
+    def classify(self, frames: np.ndarray) -> np.ndarray: ...
+
+    def reset(self):
+        self._pending = np.zeros(0, dtype=np.int16)
+
+
+class EnergyVAD(VoiceActivityDetector):
+    """Fixed RMS threshold, the behaviour the transcriber started with"""
+
+    def __init__(
+        self, rate: int = 44100, frame_ms: float = 20.0, threshold: float = 0.01
+    ):
+        super().__init__(rate, frame_ms)
+        self.threshold = threshold
+
+    def classify(self, frames: np.ndarray) -> np.ndarray:
+        rms = np.sqrt(np.mean(np.square(frames), axis=1))
+        return rms >= self.threshold
+
+
+class SpectralVAD(VoiceActivityDetector):
+    """Energy, zero-crossing rate and speech-band ratio against an adaptive floor.
+
+    A frame is speech when its energy clears the noise floor by `margin_db`
+    and either most of its power sits in the voice band (voiced sounds) or it
+    crosses zero often (fricatives). The floor follows non-speech frames,
+    dropping immediately and rising slowly, and never sits below the quietest
+    frame of the last `floor_window` seconds, so it catches up with noise that
+    steps up and would otherwise count as speech forever.
+    """
+
+    def __init__(
+        self,
+        rate: int = 44100,
+        frame_ms: float = 20.0,
+        margin_db: float = 4.0,
+        min_energy_db: float = -60.0,
+        band: tuple[float, float] = (80.0, 4000.0),
+        min_band_ratio: float = 0.45,
+        fricative_zcr: float = 0.2,
+        floor_rise: float = 0.02,
+        floor_window: float = 3.0,
+    ):
+        super().__init__(rate, frame_ms)
+        self.margin_db = margin_db
+        self.min_energy_db = min_energy_db
+        self.min_band_ratio = min_band_ratio
+        self.fricative_zcr = fricative_zcr
+        self.floor_rise = floor_rise
+        self.noise_floor_db: tp.Optional[float] = None
+        self._lowest_floor_db = min_energy_db - margin_db
+        # Minimum statistics: speech has dips between words, noise does not
+        self._recent: collections.deque[float] = collections.deque(
+            maxlen=max(1, int(floor_window * 1000 / frame_ms))
+        )
+
+        freqs = np.fft.rfftfreq(self.frame_length, 1.0 / rate)
+        self._band = (freqs >= band[0]) & (freqs <= band[1])
+        self._window = np.hanning(self.frame_length).astype(np.float32)
+
+    def features(self, frames: np.ndarray) -> dict[str, np.ndarray]:
+        """Per-frame energy (dBFS), zero-crossing rate and voice-band ratio"""
+        energy = np.mean(np.square(frames), axis=1)
+        energy_db = 10.0 * np.log10(energy + 1e-12)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (
+            self.frame_length - 1
+        )
+        power = np.square(np.abs(np.fft.rfft(frames * self._window, axis=1)))
+        band_ratio = power[:, self._band].sum(axis=1) / (power.sum(axis=1) + 1e-12)
+        return {"energy_db": energy_db, "zcr": zcr, "band_ratio": band_ratio}
+
+    def classify(self, frames: np.ndarray) -> np.ndarray:
+        feats = self.features(frames)
+        energy_db = feats["energy_db"]
+        if self.noise_floor_db is None:
+            self.noise_floor_db = max(float(np.min(energy_db)), self._lowest_floor_db)
+
+        shaped = (feats["band_ratio"] >= self.min_band_ratio) | (
+            feats["zcr"] >= self.fricative_zcr
+        )
+        audible = energy_db >= self.min_energy_db
+
+        speech = np.zeros(len(frames), dtype=bool)
+        floor = self.noise_floor_db
+        # The floor is sequential by nature; there are only a few frames per chunk
+        for i, level in enumerate(energy_db):
+            speech[i] = audible[i] and shaped[i] and level >= floor + self.margin_db
+            if not speech[i]:
+                if level < floor:
+                    floor = max(level, self._lowest_floor_db)
+                else:
+                    floor += self.floor_rise * (level - floor)
+            self._recent.append(float(level))
+            if len(self._recent) == self._recent.maxlen:
+                floor = max(floor, min(self._recent))
+        self.noise_floor_db = floor
+        return speech
+
+    def reset(self):
+        super().reset()
+        self.noise_floor_db = None
+        self._recent.clear()